@@ -0,0 +1,85 @@
+"""
+Memory of the in-memory catalog: a list of ProductQueryOutput models (what
+load_products used to return) against the columnar CatalogStore, for a
+synthetic catalog of --products rows shaped like benchmarks.seed's.
+
+    python -m benchmarks.catalog_bench --products 100000
+
+No database needed. Also times a get_all_products-style shaping pass over
+each representation.
+"""
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+from benchmarks.seed import CATEGORIES, NOUNS, WORDS
+from src.core.catalog_store import STATUS_MAPPING, CatalogStore, CatalogView
+from src.core.shaping import budget_for, shape_products
+from src.Tools.product_discover import ProductQueryOutput
+
+
+def synthetic_rows(n: int, seed: int):
+    rnd = random.Random(seed)
+    for pid in range(1, n + 1):
+        name = f"{rnd.choice(WORDS)} {rnd.choice(NOUNS)} {pid}"
+        specs = {
+            "weight_kg": round(rnd.uniform(0.5, 250), 2),
+            "power_kW": round(rnd.uniform(0.1, 90), 1),
+            "range_km": rnd.randint(1, 800),
+            "certifications": rnd.sample(["CE", "FCC", "ITAR", "ISO9001", "MIL-STD-810"], 2),
+        }
+        yield (pid, name, rnd.choice(CATEGORIES), f"{name} short description",
+               " ".join(rnd.choice(WORDS).lower() for _ in range(rnd.randint(40, 160))),
+               json.dumps(specs), round(rnd.uniform(50, 250000), 2), rnd.choice([0, 1, 1, 1, 2, 3]))
+
+
+def as_models(rows):
+    return [ProductQueryOutput(id=r[0], product_name=r[1], category=r[2], short_description=r[3],
+                               long_description=r[4], tech_specs=json.loads(r[5]) if r[5] else None,
+                               base_price=float(r[6]), stock_status=STATUS_MAPPING.get(r[7], "Unknown"))
+            for r in rows]
+
+
+def traced(build):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - started
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catalog memory: Pydantic list vs columnar store.")
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    # Each build reads its own fresh rows (as from the database), so the strings count too
+    def rows():
+        return synthetic_rows(args.products, args.seed)
+
+    budget = budget_for("get_all_products")
+    results = {}
+    for label, build, wrap in (
+        ("pydantic list", lambda: as_models(rows()), lambda v: v),
+        ("catalog store", lambda: CatalogStore.from_rows(rows()), lambda v: CatalogView(v, ProductQueryOutput)),
+    ):
+        value, size, build_s = traced(build)
+        started = time.perf_counter()
+        shape_products(wrap(value), budget)
+        shape_ms = (time.perf_counter() - started) * 1000
+        results[label] = size
+        print(f"{label:14s} {size / 2**20:8.1f} MiB  {size / args.products:7.0f} B/product  "
+              f"build {build_s:6.2f}s  shape {shape_ms:8.1f} ms")
+        del value
+    print(f"store is {results['pydantic list'] / max(results['catalog store'], 1):.1f}x smaller")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import json
+import statistics
+import time
+from typing import Callable, List
+
+from agents.tool_context import ToolContext
+
+from src.core import db
+from src.core.settings import get_settings
+
+
+# -------------------------------------------------
+# DB helpers
+# -------------------------------------------------
+def get_bench_connection():
+    return db.connect()
+
+
+class QueryCounter:
+    """
+    Counts statements the server executed between two probes, using the
+    global `Questions` status counter. Works no matter which connection the
+    code under test opens, as long as nothing else talks to the server.
+    SQLite has no such counter; with DB_BACKEND=sqlite every count is 0.
+    """
+
+    def __init__(self):
+        self.enabled = get_settings().db_backend == "mysql"
+        if not self.enabled:
+            self.overhead = 0
+            return
+        self.conn = get_bench_connection()
+        self.cursor = self.conn.cursor()
+        # The probe itself is counted by the server; measure that once.
+        first = self._questions()
+        self.overhead = self._questions() - first
+
+    def _questions(self) -> int:
+        self.cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+        return int(self.cursor.fetchone()[1])
+
+    def start(self) -> int:
+        return self._questions() if self.enabled else 0
+
+    def stop(self, started: int) -> int:
+        if not self.enabled:
+            return 0
+        return max(self._questions() - started - self.overhead, 0)
+
+    def status(self, name: str) -> int:
+        if not self.enabled:
+            return 0
+        self.cursor.execute("SHOW GLOBAL STATUS LIKE %s", (name,))
+        row = self.cursor.fetchone()
+        return int(row[1]) if row else 0
+
+    def close(self):
+        if not self.enabled:
+            return
+        self.cursor.close()
+        self.conn.close()
+
+
+# -------------------------------------------------
+# Tool invocation
+# -------------------------------------------------
+async def invoke_tool(tool, args: dict):
+    """Call a @function_tool the same way the Runner does."""
+    ctx = ToolContext(context=None, tool_name=tool.name, tool_call_id="bench")
+    return await tool.on_invoke_tool(ctx, json.dumps(args))
+
+
+# -------------------------------------------------
+# Stats
+# -------------------------------------------------
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def summarize(latencies_ms: List[float], queries: List[int]) -> dict:
+    return {
+        "calls": len(latencies_ms),
+        "mean_ms": round(statistics.fmean(latencies_ms), 3) if latencies_ms else 0.0,
+        "min_ms": round(min(latencies_ms), 3) if latencies_ms else 0.0,
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p90_ms": round(percentile(latencies_ms, 90), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+        "max_ms": round(max(latencies_ms), 3) if latencies_ms else 0.0,
+        "queries_per_call": round(statistics.fmean(queries), 2) if queries else 0.0,
+    }
+
+
+async def measure(fn: Callable, iterations: int, counter: QueryCounter = None, warmup: int = 2) -> dict:
+    """Run `fn` (an async callable taking the iteration index) and summarize it."""
+    for i in range(warmup):
+        await fn(i)
+
+    latencies, queries = [], []
+    for i in range(iterations):
+        started = counter.start() if counter else 0
+        t0 = time.perf_counter()
+        await fn(i)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        if counter:
+            queries.append(counter.stop(started))
+    return summarize(latencies, queries)
+
+
+def print_table(results: dict):
+    header = f"{'benchmark':<28}{'calls':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'q/call':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        print(
+            f"{name:<28}{r['calls']:>7}{r['p50_ms']:>10.2f}{r['p90_ms']:>10.2f}"
+            f"{r['p99_ms']:>10.2f}{r['mean_ms']:>10.2f}{r['queries_per_call']:>8.1f}"
+        )
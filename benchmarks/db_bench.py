@@ -0,0 +1,147 @@
+"""
+Per-query cost of the hot statements through each access path.
+
+    python -m benchmarks.seed --reset
+    python -m benchmarks.db_bench --iterations 2000
+
+Paths, from what the tools used to do to what src/core/db.py does now:
+    connect/pure       new connection per call, pure-Python driver (old order_placement)
+    connect/cext       new connection per call, C extension (old tools)
+    pool/text          pooled connection, statement sent as text
+    pool/prepared      pooled connection, cached server-side prepared statement
+
+Also prints the server's Com_stmt_prepare / Com_stmt_execute deltas for the
+prepared path, which should show one prepare per statement per connection.
+
+With DB_BACKEND=sqlite only the pool paths run (there is no server to
+connect to); compare their numbers against a MySQL run of the same seed.
+"""
+import argparse
+import random
+import time
+
+import mysql.connector
+
+from benchmarks.common import QueryCounter, print_table, summarize
+from benchmarks.seed import BENCH_SESSION_ID
+from src.core import db
+from src.core.settings import get_settings
+
+CASES = {
+    "user_by_id": lambda rnd, args: (rnd.randint(1, args.users),),
+    "inventory_quantity": lambda rnd, args: (rnd.randint(1, args.products),),
+    "chatlog_recent": lambda rnd, args: (BENCH_SESSION_ID, 20),
+    "chatlog_insert": lambda rnd, args: ("bench-db-session", "hi", "hello", "greeting", "bench-db-session"),
+}
+
+
+def _run_text(conn, name, params):
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(db.STATEMENTS[name], params)
+    if cursor.with_rows:
+        cursor.fetchall()
+    cursor.close()
+
+
+def path_connect(use_pure: bool):
+    def call(name, params):
+        conn = mysql.connector.connect(**get_settings().db_config(), use_pure=use_pure)
+        try:
+            _run_text(conn, name, params)
+            conn.commit()
+        finally:
+            conn.close()
+    return call
+
+
+def path_pool_text(name, params):
+    conn = db.get_connection()
+    try:
+        _run_text(conn, name, params)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def path_pool_prepared(name, params):
+    conn = db.get_connection()
+    try:
+        if name.endswith("_insert"):
+            db.run(conn, name, params)
+        else:
+            db.query(conn, name, params)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+PATHS = {
+    "connect/pure": path_connect(True),
+    "connect/cext": path_connect(False),
+    "pool/text": path_pool_text,
+    "pool/prepared": path_pool_prepared,
+}
+
+
+def measure_sync(call, name, args, rnd, counter):
+    for _ in range(10):
+        call(name, CASES[name](rnd, args))
+    latencies, queries = [], []
+    for _ in range(args.iterations):
+        params = CASES[name](rnd, args)
+        started = counter.start()
+        t0 = time.perf_counter()
+        call(name, params)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        queries.append(counter.stop(started))
+    return summarize(latencies, queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot query access-path benchmark.")
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--statements", nargs="*", default=list(CASES), choices=list(CASES))
+    args = parser.parse_args()
+
+    counter = QueryCounter()
+    results = {}
+    paths = PATHS if get_settings().db_backend == "mysql" else {
+        k: v for k, v in PATHS.items() if k.startswith("pool/")}
+    for name in args.statements:
+        for path, call in paths.items():
+            if path == "connect/pure" and args.iterations > 500:
+                # A fresh pure-Python connection per call is slow; a smaller sample is enough.
+                sample = argparse.Namespace(**{**vars(args), "iterations": 500})
+            else:
+                sample = args
+            before = (counter.status("Com_stmt_prepare"), counter.status("Com_stmt_execute"))
+            results[f"{name} {path}"] = measure_sync(call, name, sample, random.Random(args.seed), counter)
+            if path == "pool/prepared":
+                prepares = counter.status("Com_stmt_prepare") - before[0]
+                executes = counter.status("Com_stmt_execute") - before[1]
+                results[f"{name} {path}"]["note"] = f"{prepares} prepares / {executes} executes"
+
+    print_table(results)
+    print()
+    print(f"{'statement':<22}{'old p50 ms':>12}{'new p50 ms':>12}{'saved/query':>14}{'prepared only':>15}")
+    if "connect/cext" not in paths:
+        print("pool:", db.snapshot())
+        counter.close()
+        return
+    for name in args.statements:
+        old = results[f"{name} connect/cext"]["p50_ms"]
+        text = results[f"{name} pool/text"]["p50_ms"]
+        new = results[f"{name} pool/prepared"]["p50_ms"]
+        print(f"{name:<22}{old:>12.3f}{new:>12.3f}{old - new:>13.3f}ms{text - new:>13.3f}ms")
+    for key, r in results.items():
+        if "note" in r:
+            print(f"{key}: {r['note']}")
+    print("pool:", db.snapshot())
+    counter.close()
+
+
+if __name__ == "__main__":
+    main()
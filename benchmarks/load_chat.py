@@ -0,0 +1,150 @@
+"""
+End-to-end load test for /chat with the stub model.
+
+    python -m benchmarks.seed --reset
+    python -m benchmarks.load_chat --sessions 200 --concurrency 50 --latency-ms 300
+
+By default the FastAPI app is driven in-process with its agent switched to
+StubModel. Pass --url to drive a running server instead (start one with
+`python -m benchmarks.stub_server`). Every session walks the full
+greeting -> identity -> discovery -> quote -> order flow.
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+from uuid import uuid4
+
+import httpx
+
+from benchmarks.common import QueryCounter, summarize
+
+FLOW = [
+    ("greeting", "Hello"),
+    ("identity", "My email is user{user}@example.com"),
+    ("discovery", "Show me your products"),
+    ("quote", "Quote {qty} units of product {product} for customer {user}"),
+    ("order", "Please place the order"),
+]
+
+
+class DBSampler:
+    """Samples server connection counters while the load runs."""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.counter = QueryCounter()
+        self.peak_threads = 0
+        self._stop = asyncio.Event()
+
+    def _read(self, name):
+        return self.counter.status(name)
+
+    async def __aenter__(self):
+        self.start_questions = await asyncio.to_thread(self._read, "Questions")
+        self.start_connections = await asyncio.to_thread(self._read, "Connections")
+        self.task = asyncio.create_task(self._run())
+        return self
+
+    async def _run(self):
+        while not self._stop.is_set():
+            threads = await asyncio.to_thread(self._read, "Threads_connected")
+            self.peak_threads = max(self.peak_threads, threads)
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def __aexit__(self, *exc):
+        self._stop.set()
+        await self.task
+        self.questions = await asyncio.to_thread(self._read, "Questions") - self.start_questions
+        self.connections = await asyncio.to_thread(self._read, "Connections") - self.start_connections
+        self.max_used = await asyncio.to_thread(self._read, "Max_used_connections")
+        self.counter.close()
+
+
+async def run_session(client, n, args, rnd, latencies, errors):
+    session_id = f"load-{uuid4().hex[:12]}"
+    values = {"user": rnd.randint(1, args.users), "product": rnd.randint(1, args.products),
+              "qty": rnd.randint(1, 5)}
+    for step, template in FLOW:
+        t0 = time.perf_counter()
+        try:
+            response = await client.post("/chat", json={"message": template.format(**values),
+                                                        "session_id": session_id})
+            if response.status_code != 200:
+                errors[f"{step}:{response.status_code}"] += 1
+        except Exception as e:
+            errors[f"{step}:{type(e).__name__}"] += 1
+        latencies[step].append((time.perf_counter() - t0) * 1000)
+
+
+async def run(args):
+    if args.url:
+        transport = None
+        base_url = args.url
+    else:
+        import main
+        from benchmarks.stub_model import use_stub_model
+        main.agent = use_stub_model(main.get_agent(), latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                                    seed=args.seed, rate_limit_rate=args.rate_limit_rate)
+        # Every simulated session comes from this one client; its token bucket would refuse most turns.
+        main.get_admission().client_rate = args.client_rate
+        transport = httpx.ASGITransport(app=main.app)
+        base_url = "http://loadtest"
+
+    rnd = random.Random(args.seed)
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    gate = asyncio.Semaphore(args.concurrency)
+
+    async def bounded(client, n):
+        async with gate:
+            await run_session(client, n, args, rnd, latencies, errors)
+
+    timeout = httpx.Timeout(args.timeout)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=timeout) as client:
+        async with DBSampler() as db:
+            t0 = time.perf_counter()
+            await asyncio.gather(*(bounded(client, n) for n in range(args.sessions)))
+            elapsed = time.perf_counter() - t0
+
+    all_latencies = [ms for step in latencies.values() for ms in step]
+    turns = len(all_latencies)
+
+    print(f"\n{args.sessions} sessions x {len(FLOW)} turns, concurrency {args.concurrency}, "
+          f"model latency {args.latency_ms}±{args.jitter_ms} ms")
+    print(f"throughput: {turns / elapsed:.1f} turns/s, {args.sessions / elapsed:.2f} sessions/s "
+          f"({elapsed:.1f}s total)")
+    print(f"\n{'step':<12}{'turns':>7}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for step, _ in FLOW + [("all", None)]:
+        s = summarize(all_latencies if step == "all" else latencies[step], [])
+        print(f"{step:<12}{s['calls']:>7}{s['p50_ms']:>10.1f}{s['p90_ms']:>10.1f}{s['p99_ms']:>10.1f}{s['max_ms']:>10.1f}")
+    print(f"\nDB: {db.questions / max(turns, 1):.1f} statements/turn, {db.connections} connections opened "
+          f"({db.connections / max(turns, 1):.1f}/turn), peak {db.peak_threads} concurrent, "
+          f"server max used {db.max_used}")
+    if errors:
+        print("errors:", dict(errors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /chat with a stub model.")
+    parser.add_argument("--url", help="drive a running server instead of the in-process app")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="stub model latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of model calls that 429")
+    parser.add_argument("--client-rate", type=float, default=0.0,
+                        help="in-process: per-client turns/s (CLIENT_RATE); off by default, all sessions share one client")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout (s)")
+    parser.add_argument("--users", type=int, default=2000, help="must match benchmarks.seed")
+    parser.add_argument("--products", type=int, default=5000, help="must match benchmarks.seed")
+    parser.add_argument("--seed", type=int, default=11)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
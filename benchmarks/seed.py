@@ -0,0 +1,191 @@
+"""
+Seeds a local database with a synthetic dataset for the benchmarks.
+
+    python -m benchmarks.seed --reset
+    DB_BACKEND=sqlite DB_SQLITE_PATH=/tmp/bench.sqlite python -m benchmarks.seed --reset
+
+Uses the DB_* settings from .env, so point DB_NAME (or DB_SQLITE_PATH) at a scratch database.
+The dataset is deterministic for a given --seed.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import get_bench_connection
+from src.core.settings import get_settings
+
+SCHEMA_DIR = os.path.join(os.path.dirname(__file__), "..", "src", "core")
+
+TABLES = [
+    "Leads", "support_tickets", "chatlogs", "orders", "quotes",
+    "inventory", "shipping_rules", "products", "users",
+]
+
+CATEGORIES = ["firewall", "robot", "drone", "weapon system", "sensor", "vehicle", "radar", "software"]
+WORDS = ["Among", "Important", "Republican", "Finally", "Book", "Five", "Successful", "Model",
+         "Film", "Seat", "Quantum", "Iron", "Silent", "Rapid", "Nova", "Delta", "Titan", "Echo"]
+NOUNS = ["Bot", "Wall", "Drone", "Blaster", "Shield", "Rover", "Eye", "Core", "Hawk", "Grid"]
+USER_TYPES = ["military", "corporate", "research", "guest"]
+COUNTRIES = ["USA", "India", "Germany", "France", "UK", "Spain", "Canada", "Japan", "Brazil", "Australia"]
+WAREHOUSES = ["Ahmedabad", "Mumbai", "Frankfurt", "Dallas", "Toronto", "Osaka"]
+INTENTS = ["greeting", "verify_identity", "product_discovery", "availability_check",
+           "generate_quote", "order_placement", "track_shipment", "open_support_ticket"]
+
+BENCH_SESSION_ID = "bench-session"
+
+
+def _batches(rows, size):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _insert(cursor, sql, rows, batch_size=1000):
+    for batch in _batches(rows, batch_size):
+        cursor.executemany(sql, batch)
+
+
+def create_schema(cursor, reset: bool):
+    if reset:
+        for table in TABLES:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    schema = "schema_sqlite.sql" if get_settings().db_backend == "sqlite" else "schema.sql"
+    with open(os.path.join(SCHEMA_DIR, schema), encoding="utf-8") as f:
+        for statement in f.read().split(";"):
+            lines = [l for l in statement.splitlines() if not l.strip().startswith("--")]
+            if "".join(lines).strip():
+                cursor.execute("\n".join(lines))
+
+
+def seed(args):
+    rnd = random.Random(args.seed)
+    conn = get_bench_connection()
+    cursor = conn.cursor()
+    t0 = time.perf_counter()
+
+    create_schema(cursor, args.reset)
+    conn.commit()
+
+    # --- Shipping rules ---
+    _insert(cursor,
+            "INSERT INTO shipping_rules (country, base_rate, per_kg_rate, hazmat_fee, avg_eta_days) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            [(c, round(rnd.uniform(10, 60), 2), round(rnd.uniform(0.5, 4), 2),
+              round(rnd.uniform(20, 120), 2), rnd.randint(2, 15)) for c in COUNTRIES])
+
+    # --- Users ---
+    users = []
+    for i in range(1, args.users + 1):
+        users.append((
+            f"{rnd.choice(WORDS)} {rnd.choice(NOUNS)} {i}",
+            f"user{i}@example.com",
+            rnd.choice([None, "Acme Corp", "Globex", "Initech", "Umbrella"]),
+            rnd.choice(USER_TYPES),
+            rnd.choice(COUNTRIES),
+            "State", "City", f"{rnd.randint(10000, 99999)}",
+            rnd.randint(18, 70),
+            date(2024, 1, 1) + timedelta(days=rnd.randint(0, 600)),
+            "yes" if rnd.random() > 0.1 else "no",
+        ))
+    _insert(cursor,
+            "INSERT INTO users (full_name, email, company, user_type, country, state_province, city, "
+            "postal_code, age, sign_up_date, verified) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            users)
+
+    # --- Products + inventory ---
+    products, inventory = [], []
+    for pid in range(1, args.products + 1):
+        name = f"{rnd.choice(WORDS)} {rnd.choice(NOUNS)} {pid}"
+        specs = {
+            "weight_kg": round(rnd.uniform(0.5, 250), 2),
+            "power_kW": round(rnd.uniform(0.1, 90), 1),
+            "range_km": rnd.randint(1, 800),
+            "certifications": rnd.sample(["CE", "FCC", "ITAR", "ISO9001", "MIL-STD-810"], 2),
+        }
+        products.append((
+            name, rnd.choice(CATEGORIES),
+            f"{name} short description",
+            " ".join(rnd.choice(WORDS).lower() for _ in range(rnd.randint(40, 160))),
+            json.dumps(specs),
+            round(rnd.uniform(50, 250000), 2),
+            rnd.choice([0, 1, 1, 1, 2, 3]),
+        ))
+        for warehouse in rnd.sample(WAREHOUSES, rnd.randint(1, 4)):
+            inventory.append((pid, warehouse, rnd.randint(0, 500),
+                              datetime(2025, 1, 1) + timedelta(hours=rnd.randint(0, 5000))))
+    _insert(cursor,
+            "INSERT INTO products (product_name, category, short_description, long_description, "
+            "tech_specs, base_price, stock_status) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            products)
+    _insert(cursor,
+            "INSERT INTO inventory (product_id, warehouse_location, quantity_left, last_counted) "
+            "VALUES (%s, %s, %s, %s)",
+            inventory)
+
+    # --- Quotes + orders ---
+    quotes, orders = [], []
+    for customer_id in range(1, args.users + 1):
+        for n in range(rnd.randint(0, args.orders_per_customer * 2)):
+            pid = rnd.randint(1, args.products)
+            qty = rnd.randint(1, 20)
+            price = round(rnd.uniform(50, 5000), 2)
+            subtotal = round(price * qty, 2)
+            tax = round(subtotal * 0.18, 2)
+            total = round(subtotal + tax + 25, 2)
+            items = json.dumps([{"product_id": pid, "product_name": f"Product {pid}",
+                                 "unit_price": price, "quantity": qty}])
+            quote_id = f"Q-{customer_id:05d}{n:03d}"
+            quotes.append((quote_id, customer_id, items, subtotal, 25, tax, total, "USD", "generated"))
+            orders.append((f"O-{customer_id:05d}{n:03d}", quote_id, customer_id, items, subtotal, tax, 25,
+                           total, "USD", "1 Bench Street", None, "card", "paid",
+                           rnd.choice(["pending", "shipped", "delivered"]), "ground", None))
+    _insert(cursor,
+            "INSERT INTO quotes (quote_id, customer_id, items, subtotal, shipping_cost, tax, total, "
+            "currency, status) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            quotes)
+    _insert(cursor,
+            "INSERT INTO orders (order_id, quote_id, customer_id, items, subtotal, tax, shipping_cost, "
+            "total, currency, ship_to_address, billing_address, payment_method, payment_status, "
+            "order_status, shipping_method, notes) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            orders)
+
+    # --- Chatlogs: one deep session plus a long tail of short ones ---
+    chatlogs = []
+    for turn in range(args.chat_depth):
+        chatlogs.append((BENCH_SESSION_ID, BENCH_SESSION_ID, f"bench user message {turn}",
+                         f"bench bot reply {turn} " + "lorem ipsum " * rnd.randint(5, 60),
+                         rnd.choice(INTENTS)))
+    for s in range(args.sessions):
+        session_id = f"seed-session-{s}"
+        for turn in range(rnd.randint(2, 30)):
+            chatlogs.append((session_id, session_id, f"message {turn}", f"reply {turn}", rnd.choice(INTENTS)))
+    _insert(cursor,
+            "INSERT INTO chatlogs (customer_id, session_id, user_message, bot_reply, intent_detected) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            chatlogs)
+
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+    print(f"Seeded {args.users} users, {args.products} products, {len(inventory)} inventory rows, "
+          f"{len(orders)} orders, {len(chatlogs)} chatlog rows in {time.perf_counter() - t0:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a local benchmark database.")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--orders-per-customer", type=int, default=10)
+    parser.add_argument("--chat-depth", type=int, default=2000, help="turns in the deep bench session")
+    parser.add_argument("--sessions", type=int, default=500, help="number of short seeded sessions")
+    seed(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+A local stand-in for the Gemini model, pluggable into the agents SDK.
+
+StubModel answers every model call after a configurable delay. For the
+current user message it either emits one scripted tool call (matched by
+regex against the message) or, once the tool output is in the input, a
+short final reply that echoes the tool result. No network, no quota.
+"""
+import asyncio
+import json
+import random
+import re
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+from uuid import uuid4
+
+from agents import Agent
+from agents.items import ModelResponse
+from agents.models.interface import Model
+from agents.usage import Usage
+from litellm.exceptions import RateLimitError
+from openai.types.responses import ResponseFunctionToolCall, ResponseOutputMessage, ResponseOutputText
+
+from src.core.llm_governor import GovernedModel
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+")
+QUOTE_ID_RE = re.compile(r"Q-[0-9a-f]{8}")
+NUMBER_RE = re.compile(r"\d+")
+
+
+def _numbers(text: str) -> List[int]:
+    return [int(n) for n in NUMBER_RE.findall(text)]
+
+
+def _quote_args(message: str, history: str) -> dict:
+    # "quote 2 units of product 17 for customer 12"
+    qty, product, customer = (_numbers(message) + [1, 1, 1])[:3]
+    return {"input": {"product_name": f" {product}", "quantity": qty, "customer_id": customer}}
+
+
+def _order_args(message: str, history: str) -> Optional[dict]:
+    quote_ids = QUOTE_ID_RE.findall(message) or QUOTE_ID_RE.findall(history)
+    if not quote_ids:
+        return None
+    return {"data": {"quote_id": quote_ids[-1], "ship_to_address": "1 Load Test Street",
+                     "payment_method": "card", "shipping_method": "ground"}}
+
+
+def _email_args(message: str, history: str) -> Optional[dict]:
+    match = EMAIL_RE.search(message)
+    return {"email": match.group(0), "requested_category": None} if match else None
+
+
+# (pattern, tool name, args builder). First match wins.
+DEFAULT_SCRIPT: List[Tuple[re.Pattern, str, Callable[[str, str], Optional[dict]]]] = [
+    (re.compile(r"\b(place|proceed|confirm)\b.*\border\b", re.I), "order_placement", _order_args),
+    (re.compile(r"\bquote\b", re.I), "generate_quote", _quote_args),
+    (re.compile(r"@"), "manage_user", _email_args),
+    (re.compile(r"\b(products?|catalog|show)\b", re.I), "get_all_products", lambda m, h: {}),
+    (re.compile(r"\b(stock|available|availability)\b", re.I), "availability_checker_tool",
+     lambda m, h: {"product_id": (_numbers(m) or [1])[0]}),
+    (re.compile(r"\b(hi|hello|hey|namaste|hola|bonjour)\b", re.I), "multi_language",
+     lambda m, h: {"user_input": m}),
+]
+
+
+def _item_get(item, key, default=None):
+    if isinstance(item, dict):
+        return item.get(key, default)
+    return getattr(item, key, default)
+
+
+def _text_of(item) -> str:
+    content = _item_get(item, "content")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(str(_item_get(c, "text", "")) for c in content)
+    output = _item_get(item, "output")
+    return str(output) if output is not None else ""
+
+
+class StubModel(Model):
+    """
+    Scripted model with configurable latency (milliseconds, uniform jitter).
+    `rate_limit_rate` is the fraction of calls that fail with a 429, to
+    exercise the governor's retry path.
+    """
+
+    def __init__(self, latency_ms: float = 300.0, jitter_ms: float = 100.0, script=None, seed: int = None,
+                 rate_limit_rate: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.script = script or DEFAULT_SCRIPT
+        self.random = random.Random(seed)
+        self.rate_limit_rate = rate_limit_rate
+        self.calls = 0
+
+    async def _sleep(self):
+        delay = self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)
+        await asyncio.sleep(max(delay, 0) / 1000)
+
+    def _decide(self, items: list, tool_names: set):
+        """Returns ("tool", name, args) or ("reply", text)."""
+        last_user = max((i for i, it in enumerate(items) if _item_get(it, "role") == "user"), default=-1)
+        message = _text_of(items[last_user]) if last_user >= 0 else ""
+        history = " ".join(_text_of(it) for it in items[:last_user])
+        after = items[last_user + 1:]
+
+        tool_outputs = [it for it in after if _item_get(it, "type") == "function_call_output"]
+        if tool_outputs:
+            return "reply", f"Done. {_text_of(tool_outputs[-1])[:400]}"
+
+        for pattern, tool, build_args in self.script:
+            if tool in tool_names and pattern.search(message):
+                args = build_args(message, history)
+                if args is not None:
+                    return "tool", tool, args
+        return "reply", "Can you please provide your email ID so I can assist you better?"
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema,
+                           handoffs, tracing, *, previous_response_id=None, prompt=None) -> ModelResponse:
+        self.calls += 1
+        await self._sleep()
+        if self.rate_limit_rate and self.random.random() < self.rate_limit_rate:
+            raise RateLimitError("Stub quota exceeded, retry in 1s", llm_provider="stub", model="stub")
+
+        items = [{"role": "user", "content": input}] if isinstance(input, str) else list(input)
+        decision = self._decide(items, {t.name for t in tools})
+
+        if decision[0] == "tool":
+            _, name, args = decision
+            output = [ResponseFunctionToolCall(
+                type="function_call", id=f"fc_{uuid4().hex[:12]}", call_id=f"call_{uuid4().hex[:12]}",
+                name=name, arguments=json.dumps(args), status="completed",
+            )]
+        else:
+            output = [ResponseOutputMessage(
+                type="message", id=f"msg_{uuid4().hex[:12]}", role="assistant", status="completed",
+                content=[ResponseOutputText(type="output_text", text=decision[1], annotations=[])],
+            )]
+
+        input_tokens = sum(len(_text_of(it)) for it in items) // 4
+        output_tokens = len(json.dumps([o.model_dump() for o in output])) // 4
+        usage = Usage(requests=1, input_tokens=input_tokens, output_tokens=output_tokens,
+                      total_tokens=input_tokens + output_tokens)
+        return ModelResponse(output=output, usage=usage, response_id=None)
+
+    def stream_response(self, *args, **kwargs) -> AsyncIterator:
+        raise NotImplementedError("StubModel does not support streaming")
+
+
+def use_stub_model(agent: Agent, **kwargs) -> Agent:
+    """
+    Returns a copy of `agent` that talks to a StubModel instead of the real
+    provider. If the agent's model is governed, the governor stays in front.
+    """
+    stub = StubModel(**kwargs)
+    if isinstance(agent.model, GovernedModel):
+        return agent.clone(model=agent.model.with_primary(stub))
+    return agent.clone(model=stub)
@@ -0,0 +1,33 @@
+"""
+Runs the chat app with its agent switched to StubModel.
+
+    python -m benchmarks.stub_server --port 8001 --latency-ms 300
+    python -m benchmarks.load_chat --url http://127.0.0.1:8001
+"""
+import argparse
+
+import uvicorn
+
+import main
+from benchmarks.stub_model import use_stub_model
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Serve the chat app with a stub model.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of model calls that 429")
+    parser.add_argument("--client-rate", type=float, default=0.0,
+                        help="per-client turns/s (CLIENT_RATE); load_chat is a single client, so off by default")
+    args = parser.parse_args()
+
+    main.get_admission().client_rate = args.client_rate
+    main.agent = use_stub_model(main.get_agent(), latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                                rate_limit_rate=args.rate_limit_rate)
+    uvicorn.run(main.app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,150 @@
+"""
+Microbenchmarks for the tool functions and MyCustomSession against a seeded DB.
+
+    python -m benchmarks.seed --reset
+    python -m benchmarks.tools_bench --save-baseline benchmarks/baseline.json
+    python -m benchmarks.tools_bench --compare benchmarks/baseline.json
+
+Each benchmark reports a latency distribution and the number of SQL statements
+the server executed per call. --compare exits non-zero when a benchmark's p50
+or queries-per-call regress by more than --threshold.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+
+from benchmarks.common import QueryCounter, invoke_tool, measure, print_table
+from benchmarks.seed import BENCH_SESSION_ID
+from src.core.config import MyCustomSession
+from src.Tools.Availability_check import availability_checker_tool
+from src.Tools.product_discover import get_all_products
+from src.Tools.Quote_generator import generate_quote
+from src.Tools.shipping_tool import shipping_calculator
+from src.Tools.user import manage_user
+
+
+def build_benchmarks(args, rnd: random.Random) -> dict:
+    def pick_user():
+        return rnd.randint(1, args.users)
+
+    def pick_product():
+        return rnd.randint(1, args.products)
+
+    session = MyCustomSession(BENCH_SESSION_ID)
+    write_session = MyCustomSession("bench-write-session")
+
+    async def bench_get_all_products(i):
+        await invoke_tool(get_all_products, {})
+
+    async def bench_shipping(i):
+        await invoke_tool(shipping_calculator, {"input_data": {
+            "customer_id": pick_user(), "product_id": pick_product(),
+            "quantity": rnd.randint(1, 10), "hazmat": rnd.random() < 0.2,
+        }})
+
+    async def bench_availability(i):
+        await invoke_tool(availability_checker_tool, {"product_id": pick_product()})
+
+    async def bench_quote(i):
+        await invoke_tool(generate_quote, {"input": {
+            "product_name": f" {pick_product()}", "quantity": 1, "customer_id": pick_user(),
+        }})
+
+    async def bench_manage_user(i):
+        await invoke_tool(manage_user, {"email": f"user{pick_user()}@example.com", "requested_category": None})
+
+    async def bench_get_items(i):
+        await session.get_items()
+
+    async def bench_get_items_limit(i):
+        await session.get_items(limit=20)
+
+    async def bench_add_items(i):
+        await write_session.add_items([
+            {"role": "user", "content": f"bench message {i}"},
+            {"role": "assistant", "content": '```json\n{"text": "**bench** reply"}\n```'},
+        ])
+
+    return {
+        "get_all_products": bench_get_all_products,
+        "shipping_calculator": bench_shipping,
+        "availability_checker_tool": bench_availability,
+        "generate_quote": bench_quote,
+        "manage_user": bench_manage_user,
+        "session.get_items": bench_get_items,
+        "session.get_items(limit=20)": bench_get_items_limit,
+        "session.add_items": bench_add_items,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    ok = True
+    print(f"\n{'benchmark':<28}{'base p50':>10}{'p50':>10}{'change':>9}{'base q':>8}{'q':>8}")
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base:
+            print(f"{name:<28}{'(new)':>10}")
+            continue
+        change = (r["p50_ms"] / base["p50_ms"] - 1) if base["p50_ms"] else 0.0
+        flag = ""
+        if change > threshold or r["queries_per_call"] > base["queries_per_call"]:
+            flag = "  REGRESSION"
+            ok = False
+        print(f"{name:<28}{base['p50_ms']:>10.2f}{r['p50_ms']:>10.2f}{change:>+9.1%}"
+              f"{base['queries_per_call']:>8.1f}{r['queries_per_call']:>8.1f}{flag}")
+    return ok
+
+
+async def run(args):
+    rnd = random.Random(args.seed)
+    benchmarks = build_benchmarks(args, rnd)
+    selected = args.only or list(benchmarks)
+    counter = QueryCounter()
+
+    # generate_quote writes a PDF per call into ./quotes; keep those out of the repo.
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="bench-quotes-")
+    os.chdir(workdir)
+    try:
+        results = {}
+        for name in selected:
+            results[name] = await measure(benchmarks[name], args.iterations, counter)
+    finally:
+        os.chdir(cwd)
+        counter.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tool-level microbenchmarks.")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--users", type=int, default=2000, help="must match benchmarks.seed")
+    parser.add_argument("--products", type=int, default=5000, help="must match benchmarks.seed")
+    parser.add_argument("--only", nargs="*", help="run only these benchmarks")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed p50 slowdown (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_table(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,44 @@
-from litellm.exceptions import RateLimitError
 from agents import Agent, Runner, set_tracing_disabled
-from dotenv import load_dotenv
-import uuid
+import importlib
+import threading
 import os
+import uuid
+import math
 import asyncio
 
-# --- Tools ---
-from src.core.config import MyCustomSession
+# --- Core ---
+from src.core.settings import get_settings
+from src.core.config import MyCustomSession, valid_session_id
+from src.core.llm_governor import PRIORITY_BATCH, GovernedModel, ModelBusyError, classify_priority, turn_priority
+from src.core.singleflight import group as single_flight_group
+from src.core.cache import get_cache
+from src.core.shaping import stats as shaping_stats
+from src.core.turns import TurnQueueFull, get_scheduler
+from src.core import analytics, catalog_version, customer_context, db, langdetect, outbox, profiler
+from src.core.admission import AdmissionRejected, client_key, get_controller as get_admission
+from src.core.batch import ADMISSION_ATTEMPTS, BatchRequest, run_batch, to_ndjson
+from src.core.assets import AssetFiles, GZipMiddleware, asset_url, image_set
 from src.Tools.instructions import instructions
-from src.Tools.user import manage_user
-from src.Tools.NLU import chatbot_engine_NLU
-from src.Tools.language import multi_language
-from src.Tools.product_discover import get_all_products
-from src.Tools.Availability_check import availability_checker_tool
-from src.Tools.Quote_generator import generate_quote
-from src.Tools.order_placement import order_placement
-from src.Tools.tech_QA_assistant import QA_assistant
-from src.Tools.support_bot import create_support_ticket
-from src.Tools.shipping_tool import shipping_calculator
 
 # --- FastAPI ---
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
+from datetime import date
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 
+try:
+    import orjson  # optional: faster JSON encoding for API responses
+    from fastapi.responses import ORJSONResponse as APIResponse
+except ImportError:
+    APIResponse = JSONResponse
+
 # -------------------------------------------------
 # ENV + KEYS
 # -------------------------------------------------
-load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+settings = get_settings()
+OPENAI_API_KEY = settings.openai_api_key
+GEMINI_API_KEY = settings.gemini_api_key
 
 # Disable tracing for cleaner logs
 set_tracing_disabled(True)
@@ -38,39 +46,85 @@ set_tracing_disabled(True)
 # -------------------------------------------------
 # AGENT SETUP
 # -------------------------------------------------
-model = "litellm/gemini/gemini-2.5-flash"
-
-agent = Agent(
-    name="Assistant",
-    instructions=instructions,
-    model=model,
-    tools=[
-        manage_user,
-        chatbot_engine_NLU,
-        multi_language,
-        get_all_products,
-        availability_checker_tool,
-        generate_quote,
-        order_placement,
-        QA_assistant,
-        create_support_ticket,
-        shipping_calculator,
-    ],
-)
-
-
-# One session (could extend for per-user sessions later)
-SESSION_ID = str(uuid.uuid4())
-session = MyCustomSession(SESSION_ID)
+# All model calls go through the governor: adaptive concurrency, 429 retries, optional fallback
+model = GovernedModel.from_names(settings.chat_model, settings.fallback_model)
+
+# Tool modules are imported on first use (module, attribute), not at startup
+TOOLS = [
+    ("src.Tools.user", "manage_user"),
+    ("src.Tools.NLU", "chatbot_engine_NLU"),
+    ("src.Tools.language", "multi_language"),
+    ("src.Tools.product_discover", "get_all_products"),
+    ("src.Tools.Availability_check", "availability_checker_tool"),
+    ("src.Tools.Quote_generator", "generate_quote"),
+    ("src.Tools.order_placement", "order_placement"),
+    ("src.Tools.tech_QA_assistant", "QA_assistant"),
+    ("src.Tools.support_bot", "create_support_ticket"),
+    ("src.Tools.shipping_tool", "shipping_calculator"),
+]
+
+agent = None
+_agent_lock = threading.Lock()
+
+
+def get_agent() -> Agent:
+    """Builds the agent (importing every tool module) once per process."""
+    global agent
+    if agent is None:
+        with _agent_lock:
+            if agent is None:
+                tools = [getattr(importlib.import_module(module), name) for module, name in TOOLS]
+                agent = Agent(
+                    name="Assistant",
+                    instructions=instructions,
+                    model=model,
+                    tools=tools,
+                )
+    return agent
+
+
+# Sessions are per request (cookie or session_id), so any worker can serve any turn
+SESSION_COOKIE = "session_id"
 
 # -------------------------------------------------
 # FASTAPI APP
 # -------------------------------------------------
-app = FastAPI()
+app = FastAPI(default_response_class=APIResponse)
+# /chat/batch streams NDJSON line by line; gzip would hold lines back until its buffer fills
+app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_min_size, compresslevel=settings.gzip_level,
+                   skip_prefixes=("/static", "/chat/batch"))
 
-# Static + templates
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Static + templates (fingerprinted assets come from `python -m src.core.assets build`)
+app.mount("/static", AssetFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
+templates.env.globals.update(asset_url=asset_url, image_set=image_set)
+
+
+@app.on_event("startup")
+async def warm_tools():
+    # Import tool modules in the background so the worker accepts traffic right away
+    if settings.warm_tools_on_startup:
+        asyncio.get_running_loop().run_in_executor(None, get_agent)
+
+
+@app.on_event("startup")
+async def watch_catalog_version():
+    # Catalog imports run in another process; this is how this worker hears about them
+    if settings.catalog_version_poll > 0:
+        asyncio.create_task(catalog_version.watch(settings.catalog_version_poll))
+
+
+@app.on_event("startup")
+async def start_analytics_refresh():
+    if settings.analytics_refresh_interval > 0:
+        asyncio.create_task(analytics.refresh_periodically(settings.analytics_refresh_interval))
+
+
+@app.on_event("startup")
+async def start_outbox_publisher():
+    # Downstream deliveries happen here, never inside the chat transaction
+    if settings.outbox_poll_interval > 0:
+        asyncio.create_task(outbox.publish_periodically(settings.outbox_poll_interval))
 
 # -------------------------------------------------
 # ROUTES
@@ -86,10 +140,191 @@ async def chat_api(request: Request):
     data = await request.json()
     user_message = data.get("message", "")
 
-    # Run agent
-    result = await Runner.run(agent, input=user_message, session=session)
-
-    return JSONResponse({"reply": result.final_output})
+    # Clients that track their own conversation (load tests, integrations) pass a session_id;
+    # the browser UI gets one in a cookie on its first turn
+    if data.get("session_id") and not valid_session_id(data["session_id"]):
+        raise HTTPException(400, "session_id must be 1-64 characters of letters, digits and _ . : @ -")
+    cookie = request.cookies.get(SESSION_COOKIE)
+    cookie = cookie if valid_session_id(cookie) else None
+    session_id = data.get("session_id") or cookie or str(uuid.uuid4())
+    chat_session = MyCustomSession(session_id)
+
+    async def run_turn():
+        current_agent = agent or await asyncio.to_thread(get_agent)
+        return await Runner.run(current_agent, input=user_message, session=chat_session)
+
+    # Run agent; order/urgent turns get served first when the model is saturated.
+    # Turns of one session run in order (a double send shares the running turn); sessions run in parallel.
+    # Admission: the client's rate is checked here; a global slot is taken only once the turn actually runs.
+    admission = get_admission()
+    token = turn_priority.set(classify_priority(user_message))
+    db_token = db.routing_key.set(session_id)  # this session's writes pin its reads to the primary
+    customer_token = customer_context.current_session.set(session_id)  # customer row loaded once per conversation
+    lang_token = langdetect.begin_turn(user_message)  # detected once, on first use, for the whole turn
+    profile = profiler.requested(request.headers.get(profiler.HEADER), session_id)  # None unless asked for
+    try:
+        admission.check_client(client_key(request))
+        with profiler.sampling(profile):
+            result = await get_scheduler().run(session_id, user_message, lambda: admission.run(run_turn))
+    except AdmissionRejected as e:
+        response = APIResponse(
+            {"reply": "We're handling a lot of requests right now. Please try again in a moment."
+             if e.reason != "rate_limited" else "You're sending messages too quickly. Please slow down.",
+             "retry_after": e.retry_after},
+            status_code=429,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except TurnQueueFull:
+        response = APIResponse(
+            {"reply": "Still working on your previous messages. Please wait for a reply before sending more.",
+             "retry_after": 1},
+            status_code=429,
+            headers={"Retry-After": "1"},
+        )
+    except ModelBusyError as e:
+        retry_after = math.ceil(e.retry_after)
+        response = APIResponse(
+            {"reply": "We're handling a lot of requests right now. Please try again in a moment.",
+             "retry_after": retry_after},
+            status_code=429,
+            headers={"Retry-After": str(retry_after)},
+        )
+    else:
+        response = APIResponse({"reply": result.final_output})
+    finally:
+        turn_priority.reset(token)
+        db.routing_key.reset(db_token)
+        customer_context.current_session.reset(customer_token)
+        langdetect.end_turn(lang_token)
+
+    if not data.get("session_id") and cookie is None:
+        response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="lax")
+    if profile is not None and profile.saved:
+        response.headers["X-Profile-Id"] = profile.name
+    return response
+
+
+# Batch chat: offline evaluation / bulk processing, results streamed as NDJSON
+async def batch_turn(session_id: str, message: str) -> str:
+    # Batch sessions are private to their run and processed one item at a time, so no turn scheduler;
+    # a per-item timeout cancels the turn outright.
+    token = turn_priority.set(PRIORITY_BATCH)
+    db_token = db.routing_key.set(session_id)
+    customer_token = customer_context.current_session.set(session_id)
+    lang_token = langdetect.begin_turn(message)
+    try:
+        current_agent = agent or await asyncio.to_thread(get_agent)
+
+        async def run_turn():
+            return await Runner.run(current_agent, input=message, session=MyCustomSession(session_id))
+
+        # Batch items count against the same in-flight cap as /chat. A refusal happens before the
+        # turn starts, so back off and try again; after ADMISSION_ATTEMPTS the item is reported "rejected".
+        admission = get_admission()
+        for attempt in range(ADMISSION_ATTEMPTS):
+            try:
+                result = await admission.run(run_turn)
+                return result.final_output
+            except AdmissionRejected as e:
+                if attempt == ADMISSION_ATTEMPTS - 1:
+                    raise
+                await asyncio.sleep(e.retry_after)
+    finally:
+        turn_priority.reset(token)
+        db.routing_key.reset(db_token)
+        customer_context.current_session.reset(customer_token)
+        langdetect.end_turn(lang_token)
+
+
+@app.post("/chat/batch")
+async def chat_batch(body: BatchRequest, request: Request):
+    if len(body.items) > settings.batch_max_items:
+        raise HTTPException(413, f"at most {settings.batch_max_items} items per batch")
+    try:
+        get_admission().check_client(client_key(request))
+    except AdmissionRejected as e:
+        return APIResponse({"error": str(e), "retry_after": e.retry_after}, status_code=429,
+                           headers={"Retry-After": str(e.retry_after)})
+
+    async def clear_history(session_id: str):
+        await MyCustomSession(session_id).clear_session()
+
+    results = run_batch(
+        body.items, batch_turn,
+        concurrency=min(body.concurrency or settings.batch_concurrency, settings.batch_max_concurrency),
+        timeout=body.timeout or settings.batch_item_timeout,
+        run_id=body.run_id,
+        finish=None if body.keep_history else clear_history,
+    )
+
+    async def ndjson():
+        async for result in results:
+            yield to_ndjson(result)
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+# Runtime counters
+@app.get("/metrics")
+async def metrics():
+    return APIResponse({
+        # Never build the agent here: that imports every tool on the event loop of a cold worker
+        "llm": (agent.model if agent is not None else model).snapshot(),
+        "single_flight": single_flight_group.snapshot(),
+        "cache": get_cache().snapshot(),
+        "customer_context": customer_context.snapshot(),
+        "turns": get_scheduler().snapshot(),
+        "admission": get_admission().snapshot(),
+        "tool_shaping": shaping_stats.snapshot(),
+        "db": db.snapshot(),
+        "outbox": outbox.get_publisher().snapshot() if settings.outbox_poll_interval > 0 else None,
+        "worker_pid": os.getpid(),
+    })
+
+
+# Profiling (PROFILE_TOKEN): arm the next /chat turn, list and fetch the results
+def _profile_admin(request: Request):
+    if not profiler.authorized(request.headers.get(profiler.TOKEN_HEADER)):
+        raise HTTPException(status_code=404)
+
+
+@app.post("/admin/profile")
+async def admin_profile(request: Request, session_id: Optional[str] = None):
+    _profile_admin(request)
+    profiler.arm(session_id)
+    return APIResponse({"armed": True, "session_id": session_id, "expires_in": profiler.ARM_SECONDS})
+
+
+@app.get("/admin/profiles")
+async def admin_profiles(request: Request):
+    _profile_admin(request)
+    return APIResponse({"profiles": list(profiler.recent)})
+
+
+@app.get("/admin/profiles/{profile_id}")
+async def admin_profile_file(profile_id: str, request: Request):
+    _profile_admin(request)
+    path = profiler.folded_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404)
+    with open(path, encoding="utf-8") as f:
+        return PlainTextResponse(f.read())
+
+
+# Dashboards: pre-aggregated daily rollups (default: last 7 days)
+@app.get("/analytics/intents")
+async def analytics_intents(start: Optional[date] = None, end: Optional[date] = None):
+    return await asyncio.to_thread(analytics.intent_mix, start, end)
+
+
+@app.get("/analytics/funnel")
+async def analytics_funnel(start: Optional[date] = None, end: Optional[date] = None):
+    return await asyncio.to_thread(analytics.funnel, start, end)
+
+
+@app.get("/analytics/sales")
+async def analytics_sales(start: Optional[date] = None, end: Optional[date] = None):
+    return await asyncio.to_thread(analytics.sales, start, end)
 
 
 
@@ -1,10 +1,7 @@
-import os
-import mysql.connector
 from agents import function_tool
-from dotenv import load_dotenv
-
-# Load environment variables from the .env file
-load_dotenv()
+from src.core import db
+from src.core.shaping import shape_output
+from src.core.singleflight import single_flight
 
 
 """
@@ -25,6 +22,8 @@ load_dotenv()
 
 
 @function_tool
+@shape_output("availability_checker_tool")
+@single_flight("availability_checker_tool")
 def availability_checker_tool(
     product_id: int,
     requested_quantity: int = None,
@@ -32,28 +31,20 @@ def availability_checker_tool(
 ) -> str:
     
     conn = None
-    cursor = None
 
     try:
-        # Connect to MySQL
-        conn = mysql.connector.connect(
-            host=os.getenv("DB_HOST"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME")
-        )
-        cursor = conn.cursor(dictionary=True)
+        # Stock read comes from a replica when configured; the status update below goes to the primary
+        conn = db.get_connection(read_only=True)
 
         # Step 1: Get inventory for product
-        query = "SELECT quantity_left, warehouse_location, last_counted FROM inventory WHERE product_id = %s"
         params = [product_id]
 
         # if warehouse_location:
         #     query += " AND LOWER(warehouse_location) = %s"
         #     params.append(warehouse_location.lower())
 
-        cursor.execute(query,params)
-        results = cursor.fetchall()
+        results = db.query(conn, "inventory_by_product", params)
+        conn.close()
 
         if not results:
             return "No inventory data found for that product."
@@ -63,10 +54,8 @@ def availability_checker_tool(
 
         # Step 3: Update stock_status in products table
         new_status = "Out of Stock" if total_quantity == 0 else "In Stock"
-        cursor.execute(
-            "UPDATE products SET stock_status = %s WHERE id = %s",
-            (new_status, product_id)
-        )
+        conn = db.get_connection()
+        db.run(conn, "product_set_stock_status", (new_status, product_id))
         conn.commit()
 
         # Step 4: Handle quantity request
@@ -87,8 +76,6 @@ def availability_checker_tool(
         return f" Error querying inventory: {str(e)}"
 
     finally:
-        if cursor:
-            cursor.close()
         if conn:
             conn.close()
 
@@ -1,17 +1,12 @@
+import asyncio
 import os
 import json
-import mysql.connector
 from typing import Optional, List
 from pydantic import BaseModel
 from agents import function_tool
-from dotenv import load_dotenv
+from src.core import customer_context, db, outbox, quote_cache
 from uuid import uuid4
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
 
-load_dotenv()
 
 # --- Constants ---
 TAX_RATE = 0.18
@@ -53,6 +48,12 @@ def calculate_shipping_cost(quantity: int) -> float:
 
 # --- PDF Generator ---
 def create_quote_pdf(quote: QuoteOutput, pdf_path: str):
+    # ReportLab is only needed here; importing it lazily keeps worker startup fast
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib import colors
+
     styles = getSampleStyleSheet()
     doc = SimpleDocTemplate(pdf_path, pagesize=A4)
     elements = []
@@ -94,33 +95,36 @@ def create_quote_pdf(quote: QuoteOutput, pdf_path: str):
 
 # --- Main Function ---
 @function_tool
-def generate_quote(input: QuoteRequestInput) -> Optional[QuoteOutput]:
+async def generate_quote(input: QuoteRequestInput) -> Optional[QuoteOutput]:
+    # Sync tools run on the event loop; the pool wait, queries and the PDF go to a worker thread instead.
+    return await asyncio.to_thread(_generate_quote, input)
+
+
+def _generate_quote(input: QuoteRequestInput) -> Optional[QuoteOutput]:
+    conn = None
     try:
-        conn = mysql.connector.connect(
-            host=os.getenv("DB_HOST"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME")
-        )
+        conn = db.get_connection()
         cursor = conn.cursor(dictionary=True)
 
-        # Get user info
-        cursor.execute("SELECT * FROM users WHERE id=%s", (input.customer_id,))
-        user = cursor.fetchone()
-        if not user:
+        # Get user info (usually already loaded for this session by manage_user)
+        user = customer_context.get(input.customer_id,
+                                    lambda: db.query_one(conn, "user_by_id", (input.customer_id,)))
+        # Discounts follow the users row as it is now, not as the session cached it
+        pricing = db.query_one(conn, "user_pricing", (input.customer_id,)) if user else None
+        if not pricing:
             return "Customer not found."
 
         # Get product info
         cursor.execute("SELECT * FROM products WHERE product_name LIKE %s LIMIT 1", (f"%{input.product_name}%",))
         product = cursor.fetchone()
+        cursor.close()
         if not product:
             return "Product not found."
 
         product_id = product['id']
 
         # Check inventory
-        cursor.execute("SELECT quantity_left FROM inventory WHERE product_id=%s", (product_id,))
-        inv = cursor.fetchone()
+        inv = db.query_one(conn, "inventory_quantity", (product_id,))
         if not inv or inv['quantity_left'] <= 0:
             return f"Product '{product['product_name']}' is out of stock."
         if input.quantity > inv['quantity_left']:
@@ -131,8 +135,8 @@ def generate_quote(input: QuoteRequestInput) -> Optional[QuoteOutput]:
         quantity = input.quantity
         base_total = unit_price * quantity
 
-        discount_percent = DISCOUNTS.get(user['user_type'].lower(), 0.0)
-        if user['verified']:
+        discount_percent = DISCOUNTS.get(pricing['user_type'].lower(), 0.0)
+        if pricing['verified']:
             discount_percent += VERIFIED_BONUS
 
         discount_total = base_total * discount_percent
@@ -146,6 +150,14 @@ def generate_quote(input: QuoteRequestInput) -> Optional[QuoteOutput]:
         tax = taxable_amount * TAX_RATE
         total = taxable_amount + tax
 
+        # Same request, same prices: hand back the quote (and PDF) already generated
+        reuse_key = quote_cache.quote_key(
+            input.customer_id, product_id, quantity,
+            quote_cache.pricing_version(unit_price, discount_percent, TAX_RATE, BASE_SHIPPING, PER_UNIT_FEE))
+        reused = quote_cache.lookup(reuse_key)
+        if reused:
+            return QuoteOutput(**reused["quote"])
+
         quote_id = f"Q-{str(uuid4())[:8]}"
         result = QuoteOutput(
             quote_id=quote_id,
@@ -167,11 +179,10 @@ def generate_quote(input: QuoteRequestInput) -> Optional[QuoteOutput]:
 
         # Save quote
         items_data = [item.dict() for item in result.items]
-        cursor.execute(
-            "INSERT INTO quotes (quote_id, customer_id, items, subtotal, shipping_cost, tax, total, currency, status) "
-            "VALUES (%s,%s,CAST(%s AS JSON),%s,%s,%s,%s,%s,%s)",
-            (quote_id, input.customer_id, json.dumps(items_data), subtotal, shipping_cost, tax, total, "USD", "generated")
-        )
+        db.run(conn, "quote_insert",
+               (quote_id, input.customer_id, json.dumps(items_data), subtotal, shipping_cost, tax, total, "USD",
+                "generated"), pin=True)
+        outbox.record(conn, "quote.generated", quote_id, result.dict())
         conn.commit()
 
         # Generate PDF
@@ -179,10 +190,13 @@ def generate_quote(input: QuoteRequestInput) -> Optional[QuoteOutput]:
         os.makedirs(pdf_dir, exist_ok=True)
         pdf_path = os.path.join(pdf_dir, f"quote_{quote_id}.pdf")
         create_quote_pdf(result, pdf_path)
+        quote_cache.remember(reuse_key, result.dict(), pdf_path)
 
-        cursor.close()
-        conn.close()
         return result
 
     except Exception as e:
         return f"Error generating quote: {str(e)}"
+
+    finally:
+        if conn:
+            conn.close()
@@ -1,5 +1,19 @@
 from agents import function_tool
-import string
+
+from src.core.langdetect import turn_language
+
+# Detected language → natural Roman script reply
+REPLIES = {
+    "gujarati": "Majama! Tame kem cho?",
+    "hindi": "Namaste! Aap kaise ho?",
+    "punjabi": "Tussi thik to assi vi thik?",
+    "marathi": "Namaskar! Tumhi kase ahat?",
+    "spanish": "Hola! Como estas?",
+    "french": "Salut! Comment ca va?",
+    "english": "Hey! How are you?",
+}
+DEFAULT_REPLY = "Hello! How are you?"
+
 
 @function_tool
 async def multi_language(user_input: str) -> str:
@@ -8,53 +22,8 @@ async def multi_language(user_input: str) -> str:
     in the same language but in Roman script (English letters).
     Offline, no external libraries.
     """
-
-    # Clean and lowercase the input for matching
-    cleaned_input = user_input.lower().translate(str.maketrans('', '', string.punctuation))
-
-    # Language greeting → natural Roman script reply mappings
-    greetings_map = {
-        # Gujarati
-        "gujarati": {
-            "keywords": {"kem cho", "majama", "namaskar", "ram ram"},
-            "reply": "Majama! Tame kem cho?"
-        },
-        # Hindi
-        "hindi": {
-            "keywords": {"namaste", "kaise ho", "kya haal", "namaskar"},
-            "reply": "Namaste! Aap kaise ho?"
-        },
-        # Punjabi
-        "punjabi": {
-            "keywords": {"sat sri akal", "tussi thik ho", "ki haal"},
-            "reply": "Tussi thik to assi vi thik?"
-        },
-        # Marathi
-        "marathi": {
-            "keywords": {"namaskar", "kasa kai", "tumhi kase", "kai chalay"},
-            "reply": "Namaskar! Tumhi kase ahat?"
-        },
-        # Spanish
-        "spanish": {
-            "keywords": {"hola", "buenos dias", "como estas"},
-            "reply": "Hola! Como estas?"
-        },
-        # French
-        "french": {
-            "keywords": {"bonjour", "salut", "ca va"},
-            "reply": "Salut! Comment ca va?"
-        },
-        # English
-        "english": {
-            "keywords": {"hi", "hello", "hey", "good morning", "good evening"},
-            "reply": "Hey! How are you?"
-        }
-    }
-
-    # Detect language by keyword match
-    for lang, data in greetings_map.items():
-        if any(word in cleaned_input for word in data["keywords"]):
-            return data["reply"]
-
-    # Default fallback if no match found
-    return "Hello! How are you?"
+    # Reuses the turn's detection when the input is the user's message (see src/core/langdetect.py)
+    detection = turn_language(user_input)
+    if detection.method == "default":
+        return DEFAULT_REPLY
+    return REPLIES.get(detection.language, DEFAULT_REPLY)
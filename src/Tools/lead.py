@@ -1,11 +1,9 @@
-import os
-import mysql.connector
 from pydantic import BaseModel
-from typing import Literal
-from dotenv import load_dotenv
+from functools import lru_cache
+from typing import List, Literal, Tuple
 from agents import function_tool
+from src.core import db
 
-load_dotenv()
 
 # ---------------------------
 # Pydantic model for inputs
@@ -17,6 +15,37 @@ class LeadInput(BaseModel):
     urgency: Literal["low", "medium", "high"]
 
 
+# ---------------------------
+# Scoring (shared with the bulk pipeline, src/core/lead_pipeline.py)
+# ---------------------------
+@lru_cache(maxsize=4096)
+def budget_floor(budget_range: str) -> int:
+    """Lower bound of a budget range: the digits of the part before the first '-'."""
+    try:
+        # Extract first number from budget range for scoring
+        return int("".join(filter(str.isdigit, budget_range.split('-')[0])))
+    except Exception:
+        return 0
+
+
+def score_lead(budget_range: str, urgency: str) -> Tuple[str, str]:
+    """Returns (lead_score, qualified)."""
+    budget_low = budget_floor(budget_range)
+
+    # Define lead quality rules
+    if urgency == "high" and budget_low >= 50000:
+        return "hot", "yes"
+    elif urgency in ["medium", "high"] and budget_low >= 10000:
+        return "warm", "yes"
+    else:
+        return "cold", "no"
+
+
+def score_leads(budget_ranges: List[str], urgencies: List[str]) -> List[Tuple[str, str]]:
+    """score_lead over a batch; budget parsing is memoized since lead lists reuse a handful of ranges."""
+    return [score_lead(budget, urgency) for budget, urgency in zip(budget_ranges, urgencies)]
+
+
 # ---------------------------
 # Tool function
 # ---------------------------
@@ -30,49 +59,30 @@ async def lead_qualification(data: LeadInput) -> dict:
     # ---------------------------
     # Step 1: Scoring logic
     # ---------------------------
-    budget_low = None
-    try:
-        # Extract first number from budget range for scoring
-        budget_low = int("".join(filter(str.isdigit, data.budget_range.split('-')[0])))
-    except Exception:
-        budget_low = 0
-
-    # Define lead quality rules
-    if data.urgency == "high" and budget_low >= 50000:
-        lead_score = "hot"
-        qualified = "yes"
-    elif data.urgency in ["medium", "high"] and budget_low >= 10000:
-        lead_score = "warm"
-        qualified = "yes"
-    else:
-        lead_score = "cold"
-        qualified = "no"
+    lead_score, qualified = score_lead(data.budget_range, data.urgency)
 
     # ---------------------------
     # Step 2: Save to database
     # ---------------------------
-    conn = mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME")
-    )
+    conn = await db.get_connection_async()
     cursor = conn.cursor()
 
     insert_query = """
         INSERT INTO Leads (customer_id, budget_range, project_type, urgency, qualified)
         VALUES (%s, %s, %s, %s, %s)
     """
-    cursor.execute(insert_query, (
-        data.customer_id,
-        data.budget_range,
-        data.project_type,
-        data.urgency,
-        qualified
-    ))
-    conn.commit()
-    cursor.close()
-    conn.close()
+    try:
+        cursor.execute(insert_query, (
+            data.customer_id,
+            data.budget_range,
+            data.project_type,
+            data.urgency,
+            qualified
+        ))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
 
     # ---------------------------
     # Step 3: Return result
@@ -1,13 +1,11 @@
-import os
-import mysql.connector
+import asyncio
 from pydantic import BaseModel
 from typing import Optional
 from uuid import uuid4
 from agents import function_tool
-from dotenv import load_dotenv
+from src.core import db, outbox, quote_cache
 import json
 
-load_dotenv()
 
 # -----------------------------
 # Pydantic Model for Input
@@ -24,31 +22,28 @@ class OrderPlacementInput(BaseModel):
 # Database Connection 
 # -----------------------------
 def get_db_connection():
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME"),
-        use_pure=True
-    )
+    return db.get_connection()
 
 # -----------------------------
 # Order Placement Tool
 # -----------------------------
 @function_tool
-def order_placement(data: OrderPlacementInput) -> dict:
+async def order_placement(data: OrderPlacementInput) -> dict:
     """
     Creates an order from an approved quote and updates inventory.
     Stores items as proper JSON (no escaped slashes).
     Includes shipping_cost from quote.
     """
+    # Sync tools run on the event loop; the pool wait and the order transaction go to a worker thread.
+    return await asyncio.to_thread(_place_order, data)
+
+
+def _place_order(data: OrderPlacementInput) -> dict:
     conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
 
     try:
         # 1. Fetch the quote
-        cursor.execute("SELECT * FROM quotes WHERE quote_id = %s", (data.quote_id,))
-        quote = cursor.fetchone()
+        quote = db.query_one(conn, "quote_by_id", (data.quote_id,))
 
         if not quote:
             return {"error": f"Quote ID {data.quote_id} not found."}
@@ -62,17 +57,8 @@ def order_placement(data: OrderPlacementInput) -> dict:
         # 2. Generate unique order ID
         order_id = f"O-{uuid4().hex[:8]}"
 
-        # 3. Insert into orders table with CAST to JSON
-        insert_query = """
-        INSERT INTO orders (
-            order_id, quote_id, customer_id, items, subtotal, tax, shipping_cost, total, currency,
-            ship_to_address, billing_address, payment_method, payment_status,
-            order_status, shipping_method, notes
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-
-        cursor.execute(insert_query, (
+        # 3. Insert into orders table
+        db.run(conn, "order_insert", (
             order_id,
             quote["quote_id"],
             quote["customer_id"],
@@ -89,20 +75,30 @@ def order_placement(data: OrderPlacementInput) -> dict:
             "pending",  # order_status
             data.shipping_method,
             data.notes
-        ))
+        ), pin=True)
 
         # 4. Reduce inventory
         for item in norm_items:
             product_id = item.get("product_id")
             qty_ordered = item.get("quantity", 0)
             if product_id and qty_ordered > 0:
-                cursor.execute("""
-                    UPDATE inventory
-                    SET quantity_left = quantity_left - %s
-                    WHERE product_id = %s
-                """, (qty_ordered, product_id))
+                db.run(conn, "inventory_decrement", (qty_ordered, product_id), pin=True)
 
+        outbox.record(conn, "order.placed", order_id, {
+            "order_id": order_id,
+            "quote_id": quote["quote_id"],
+            "customer_id": quote["customer_id"],
+            "items": norm_items,
+            "subtotal": quote["subtotal"],
+            "tax": quote["tax"],
+            "shipping_cost": quote.get("shipping_cost", 0.0),
+            "total": quote["total"],
+            "currency": quote["currency"],
+            "ship_to_address": data.ship_to_address,
+            "shipping_method": data.shipping_method,
+        })
         conn.commit()
+        quote_cache.forget(data.quote_id)
 
         return {
             "message": "Order placed successfully and inventory updated.",
@@ -120,5 +116,4 @@ def order_placement(data: OrderPlacementInput) -> dict:
         return {"error": str(e)}
 
     finally:
-        cursor.close()
         conn.close()
@@ -1,20 +1,13 @@
-import os 
-import json
-import mysql.connector
 from typing import List, Optional
 from pydantic import BaseModel
 from agents import function_tool  # Your decorator
-from dotenv import load_dotenv
+from src.core.settings import get_settings
+from src.core import db
+from src.core.cache import get_cache
+from src.core.catalog_store import STATUS_MAPPING, CatalogStore, CatalogView
+from src.core.shaping import shape_output
+from src.core.singleflight import single_flight, single_flight_sync
 
-load_dotenv()
-
-# Define mapping for stock status
-STATUS_MAPPING = {
-    0: "Out of Stock",
-    1: "In Stock",
-    2: "Preorder",
-    3: "Discontinued"
-}
 
 # Define schema
 class ProductQueryOutput(BaseModel):
@@ -27,53 +20,56 @@ class ProductQueryOutput(BaseModel):
     base_price: float
     stock_status: str
 
-@function_tool
-def get_all_products() -> List[ProductQueryOutput]:
-    try:
-        # Connect to MySQL
-        conn = mysql.connector.connect(
-            host=os.getenv("DB_HOST"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            database=os.getenv("DB_NAME")
-        )
-        # print("Connected to MySQL")
+# --- Catalog loader ---
+@single_flight_sync("catalog.load_products")
+def load_products() -> CatalogStore:
+    """Reads the full catalog into a columnar store; concurrent callers share one query."""
+    # Read-only: served by a replica when DB_REPLICA_HOSTS is set
+    conn = db.get_connection(read_only=True)
+    # print("Connected to MySQL")
 
-        cursor = conn.cursor()
-        query = """
-            SELECT 
-                id, 
-                product_name, 
-                category, 
-                short_description, 
-                long_description, 
-                tech_specs, 
-                base_price, 
-                stock_status
-            FROM products
-        """
+    cursor = conn.cursor()
+    query = """
+        SELECT 
+            id, 
+            product_name, 
+            category, 
+            short_description, 
+            long_description, 
+            tech_specs, 
+            base_price, 
+            stock_status
+        FROM products
+    """
 
+    try:
         cursor.execute(query)
-        rows = cursor.fetchall()
-
-        products = []
-        for row in rows:
-            product = ProductQueryOutput(
-                id=row[0],
-                product_name=row[1],
-                category=row[2],
-                short_description=row[3],
-                long_description=row[4],
-                tech_specs=json.loads(row[5]) if row[5] else None,
-                base_price=float(row[6]),
-                stock_status=STATUS_MAPPING.get(row[7], "Unknown")  #  Mapping integer to string
-            )
-            products.append(product)
-
+        # Into columns: tech_specs stay raw JSON until a product is actually looked at
+        return CatalogStore.from_rows(cursor.fetchall())
+    finally:
         cursor.close()
         conn.close()
 
-        return products
+
+@function_tool
+@shape_output("get_all_products")
+@single_flight("get_all_products")
+def get_all_products(category: Optional[str] = None, name: Optional[str] = None,
+                     offset: int = 0) -> List[ProductQueryOutput]:
+    """
+    Lists products from the catalog, optionally narrowed down.
+
+    Args:
+        category: Only products whose category contains this text (case-insensitive).
+        name: Only products whose name contains this text (case-insensitive).
+        offset: Skip this many matching products; use it to page through a long listing.
+    """
+    try:
+        # Shared across workers; bumping the "catalog" namespace invalidates it everywhere
+        store = get_cache().get_or_load("catalog", "products", load_products, ttl=get_settings().catalog_cache_ttl)
+        # Filtering and paging pick row numbers only; models are built only for the rows that are read
+        offset = max(offset, 0)
+        return CatalogView(store, ProductQueryOutput, store.matching(category, name)[offset:], offset=offset)
 
     except Exception as e:
         print("Error:", str(e))
@@ -1,8 +1,8 @@
 from pydantic import BaseModel
 from agents import function_tool
+from src.core import customer_context, db
+from src.core.singleflight import single_flight
 from datetime import datetime, timedelta
-import mysql.connector
-import os
 import json
 
 
@@ -24,16 +24,13 @@ class ShippingOutput(BaseModel):
 
 # --- MySQL Connection ---
 def get_db_connection():
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME")
-    )
+    # Read-only lookups: served by a replica when DB_REPLICA_HOSTS is set
+    return db.get_connection(read_only=True)
 
 
 # --- Shipping Calculator Tool ---
 @function_tool
+@single_flight("shipping_calculator")
 def shipping_calculator(input_data: ShippingInput) -> ShippingOutput:
     """
     Calculates freight cost & ETA based on user address, product weight,
@@ -41,24 +38,17 @@ def shipping_calculator(input_data: ShippingInput) -> ShippingOutput:
     """
 
     conn = None
-    cursor = None
     try:
         conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
 
         # --- Step 1: Get user address ---
-        cursor.execute(
-            "SELECT country, state_province, city, postal_code FROM users WHERE id = %s",
-            (input_data.customer_id,)
-        )
-        user = cursor.fetchone()
+        user = customer_context.get(input_data.customer_id,
+                                    lambda: db.query_one(conn, "user_by_id", (input_data.customer_id,)))
         if not user:
             raise ValueError("USER_NOT_FOUND")
 
         # --- Step 2: Get product weight ---
-        cursor.execute("SELECT tech_specs FROM products WHERE id = %s", 
-                       (input_data.product_id,))
-        product = cursor.fetchone()
+        product = db.query_one(conn, "product_specs", (input_data.product_id,))
         if not product:
             raise ValueError("PRODUCT_NOT_FOUND")
 
@@ -67,22 +57,14 @@ def shipping_calculator(input_data: ShippingInput) -> ShippingOutput:
         total_weight = product_weight * input_data.quantity
 
         # --- Step 3: Get warehouse info ---
-        cursor.execute(
-            "SELECT warehouse_location FROM inventory WHERE product_id = %s AND quantity_left > 0 LIMIT 1",
-            (input_data.product_id,)
-        )
-        inventory = cursor.fetchone()
+        inventory = db.query_one(conn, "inventory_warehouse", (input_data.product_id,))
         if not inventory:
             raise ValueError("OUT_OF_STOCK")
 
         warehouse = inventory["warehouse_location"]
 
         # --- Step 4: Get shipping rules ---
-        cursor.execute(
-            "SELECT base_rate, per_kg_rate, hazmat_fee, avg_eta_days FROM shipping_rules WHERE country = %s",
-            (user["country"],)
-        )
-        rule = cursor.fetchone()
+        rule = db.query_one(conn, "shipping_rule", (user["country"],))
         if not rule:
             raise ValueError("NO_SHIPPING_RULE")
 
@@ -110,7 +92,5 @@ def shipping_calculator(input_data: ShippingInput) -> ShippingOutput:
         raise RuntimeError("SYSTEM_ERROR")
 
     finally:
-        if cursor:
-            cursor.close()
         if conn:
             conn.close()
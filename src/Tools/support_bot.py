@@ -1,19 +1,12 @@
 import json
-import os
 import mysql.connector
 from agents import function_tool
+from src.core import db, outbox
 from pydantic import BaseModel, Field
-from dotenv import load_dotenv
 
-load_dotenv()
 
-def get_db_connection():
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME"),
-    )
+async def get_db_connection():
+    return await db.get_connection_async()
 
 class SupportTicketRequest(BaseModel):
     customer_id: int
@@ -23,16 +16,14 @@ class SupportTicketRequest(BaseModel):
 
 @function_tool
 async def create_support_ticket(data: SupportTicketRequest) -> dict:
+    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+        conn = await get_db_connection()
 
         # Fetch all orders for the customer
-        cursor.execute("SELECT items FROM orders WHERE customer_id = %s", (data.customer_id,))
-        orders = cursor.fetchall()
+        orders = db.query(conn, "order_items_by_customer", (data.customer_id,))
 
         if not orders:
-            cursor.close()
             conn.close()
             return {
                 "answer": f"No orders found for customer ID {data.customer_id}.",
@@ -50,16 +41,17 @@ async def create_support_ticket(data: SupportTicketRequest) -> dict:
                     break
             if product_found:
                 # Insert the support ticket
-                insert_sql = """
-                    INSERT INTO support_tickets (customer_id, product_id, issue_text, status)
-                    VALUES (%s, %s, %s, %s)
-                """
-                cursor.execute(insert_sql, (data.customer_id, data.product_id, data.issue_text, data.status))
+                ticket_id = db.run(conn, "ticket_insert",
+                                   (data.customer_id, data.product_id, data.issue_text, data.status))
+                outbox.record(conn, "ticket.created", ticket_id, {
+                    "ticket_id": ticket_id,
+                    "customer_id": data.customer_id,
+                    "product_id": data.product_id,
+                    "issue_text": data.issue_text,
+                    "status": data.status,
+                })
                 conn.commit()
 
-                ticket_id = cursor.lastrowid
-
-                cursor.close()
                 conn.close()
 
                 return {
@@ -69,7 +61,6 @@ async def create_support_ticket(data: SupportTicketRequest) -> dict:
 
 
         if not product_found:
-            cursor.close()
             conn.close()
             return {
                 "answer": "Cannot create ticket.",
@@ -83,3 +74,8 @@ async def create_support_ticket(data: SupportTicketRequest) -> dict:
             "answer": "Failed to create support ticket.",
             "explanation": f"Database error: {e}"
         }
+
+    finally:
+        # close() is idempotent, so the early returns above may already have returned it to the pool
+        if conn:
+            conn.close()
@@ -1,6 +1,7 @@
+import asyncio
+
 from agents import function_tool
-import mysql.connector
-import os
+from src.core import db
 
 # Example descriptions
 PRODUCT_DB = {
@@ -18,12 +19,7 @@ PRODUCT_DB = {
 
 # DB connection function
 def get_product_specs(product_name):
-    conn = mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME")
-    )
+    conn = db.get_connection()
     cursor = conn.cursor(dictionary=True)
 
     query = """
@@ -32,11 +28,12 @@ def get_product_specs(product_name):
         FROM products
         WHERE name = %s
     """
-    cursor.execute(query, (product_name,))
-    result = cursor.fetchone()
-
-    cursor.close()
-    conn.close()
+    try:
+        cursor.execute(query, (product_name,))
+        result = cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
     return result
 
 @function_tool
@@ -49,7 +46,7 @@ async def QA_assistant(message: str) -> dict:
 
     if product_name:
         description = PRODUCT_DB[product_name]
-        specs = get_product_specs(product_name)
+        specs = await asyncio.to_thread(get_product_specs, product_name)
 
         if specs:
             # Format into a single natural paragraph
@@ -1,14 +1,13 @@
+import asyncio
 from datetime import datetime, date
-import mysql.connector
 from typing import Optional
 from pydantic import BaseModel, EmailStr
 from agents import function_tool
-from dotenv import load_dotenv
-import os
+from src.core import customer_context, db
+from src.core.shaping import shape_output
+from src.core.singleflight import single_flight
 
 
-load_dotenv()
-
 # --- Pydantic Model ---
 class User(BaseModel):
     id: int
@@ -22,30 +21,31 @@ class User(BaseModel):
 
 # --- MySQL Connection ---
 def get_db_connection():
-    return mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME")
-    )
+    # Profile lookup only: served by a replica when DB_REPLICA_HOSTS is set
+    return db.get_connection(read_only=True)
+
+
+@single_flight("manage_user")
+def find_user(email: str) -> Optional[dict]:
+    """The users row for `email`; concurrent lookups of the same email share one query."""
+    conn = get_db_connection()
+    try:
+        return db.query_one(conn, "user_by_email", (email,))
+    finally:
+        conn.close()
 
 
 @function_tool
-def manage_user(email: str, requested_category: Optional[str] = None) -> dict:
+@shape_output("manage_user")
+async def manage_user(email: str, requested_category: Optional[str] = None) -> dict:
     """
     Retrieves a user profile from MySQL.
     - If verified → full access (run compliance + proceed).
     - If not verified → block with message only.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-
         # --- Check if user exists by EMAIL ---
-        cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
-        existing_user = cursor.fetchone()
-        name = existing_user["full_name"]
-        # print("Name : ",name)
+        existing_user = await find_user(email)
 
         if not existing_user:
             return {
@@ -53,6 +53,9 @@ def manage_user(email: str, requested_category: Optional[str] = None) -> dict:
                 "message": "User not found. Please create a profile first.",
                 "next_step": "create_profile"
             }
+        # Identity verified once per conversation; later tools read this row instead of querying users again.
+        # Outside the single-flight lookup, so every session sharing the query gets the row attached.
+        await asyncio.to_thread(customer_context.attach, existing_user)
 
         # --- Check verification status ---
         if existing_user.get("verified").lower() == "no":
@@ -0,0 +1,182 @@
+"""
+Admission control for /chat, in front of the agent.
+
+- Per-client token bucket (CLIENT_RATE turns/second, CLIENT_BURST at once):
+  checked at the door, so one noisy client is turned away before it takes
+  a queue slot from everyone else.
+- Global cap on turns running at once (ADMISSION_MAX_IN_FLIGHT), with a
+  bounded FIFO wait queue (ADMISSION_MAX_QUEUE) and a bounded wait
+  (ADMISSION_QUEUE_TIMEOUT). A full queue is refused immediately instead
+  of growing, which is what keeps latency of admitted turns predictable.
+
+Refusals raise AdmissionRejected with a Retry-After estimate; main.py turns
+it into a 429. Limits are per worker process.
+"""
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from src.core.settings import get_settings
+
+MAX_TRACKED_CLIENTS = 10000
+
+
+class AdmissionRejected(Exception):
+    """A turn was refused: reason is "rate_limited", "queue_full" or "queue_timeout"."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"{reason}, retry after {retry_after:.0f}s")
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Takes a token and returns 0, or returns the seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+
+class AdmissionController:
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float,
+                 client_rate: float, client_burst: int):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.in_flight = 0
+        self._waiters = deque()
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._turn_seconds = 5.0  # EWMA of admitted turn duration, for Retry-After estimates
+        self.stats = {"admitted": 0, "queued": 0, "rate_limited": 0, "queue_full": 0, "queue_timeout": 0,
+                      "peak_in_flight": 0, "peak_queue": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+
+    # --- per client ---
+    def check_client(self, client: str):
+        """Raises AdmissionRejected("rate_limited") when the client's bucket is empty."""
+        if self.client_rate <= 0:
+            return
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.client_rate, self.client_burst)
+            if len(self._buckets) > MAX_TRACKED_CLIENTS:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        wait = bucket.take()
+        if wait > 0:
+            self.stats["rate_limited"] += 1
+            raise AdmissionRejected("rate_limited", wait)
+
+    # --- global ---
+    def _estimate_wait(self, position: int) -> float:
+        return self._turn_seconds * (position + 1) / max(self.max_in_flight, 1)
+
+    async def acquire(self):
+        if self.max_in_flight <= 0:
+            return
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self._admit()
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.stats["queue_full"] += 1
+            raise AdmissionRejected("queue_full", self._estimate_wait(len(self._waiters)))
+
+        self.stats["queued"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.stats["peak_queue"] = max(self.stats["peak_queue"], len(self._waiters))
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up; pass it on.
+                self.release()
+            else:
+                future.cancel()
+                self._waiters.remove(future)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.stats["queue_timeout"] += 1
+            raise AdmissionRejected("queue_timeout", self._estimate_wait(len(self._waiters)))
+        self._record_wait(time.monotonic() - started)
+
+    def _admit(self):
+        self.in_flight += 1
+        self.stats["admitted"] += 1
+        self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.in_flight)
+
+    def _record_wait(self, waited: float):
+        self.stats["wait_seconds_total"] += waited
+        self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], waited)
+
+    def release(self, duration: Optional[float] = None):
+        if self.max_in_flight <= 0:
+            return
+        if duration is not None:
+            self._turn_seconds = 0.8 * self._turn_seconds + 0.2 * duration
+        self.in_flight -= 1
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.cancelled():
+                self._admit()
+                future.set_result(None)
+                break
+
+    async def run(self, turn):
+        """Awaits turn() holding a global slot."""
+        await self.acquire()
+        started = time.monotonic()
+        try:
+            return await turn()
+        finally:
+            self.release(time.monotonic() - started)
+
+    def snapshot(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "tracked_clients": len(self._buckets),
+            "turn_seconds_ewma": round(self._turn_seconds, 3),
+            **{k: round(v, 3) if isinstance(v, float) else v for k, v in self.stats.items()},
+        }
+
+
+def client_key(request) -> str:
+    """The client address; the first X-Forwarded-For hop when ADMISSION_TRUST_PROXY is set."""
+    if get_settings().admission_trust_proxy:
+        forwarded = request.headers.get("x-forwarded-for", "")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        settings = get_settings()
+        _controller = AdmissionController(settings.admission_max_in_flight, settings.admission_max_queue,
+                                          settings.admission_queue_timeout, settings.client_rate,
+                                          settings.client_burst)
+    return _controller
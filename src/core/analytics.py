@@ -0,0 +1,334 @@
+"""
+Conversation analytics: daily rollups maintained incrementally, so
+dashboards read a few small tables instead of scanning chatlogs, quotes
+and orders.
+
+refresh() reads each source table past its watermark (chatlogs by
+message_id, quotes/orders by (created_at, id)), folds the new rows into the
+daily rollups with INSERT ... ON DUPLICATE KEY UPDATE, and advances the
+watermark in the same transaction. A lock keeps concurrent runs (several
+workers, cron) from double counting: a MySQL named lock, or on SQLite a
+lease row in analytics_watermarks.
+
+    python -m src.core.analytics refresh
+    python -m src.core.analytics report --days 7
+
+Rollups:
+    analytics_intent_daily   messages per intent_detected
+    analytics_funnel_daily   conversations reaching chat → identity → quote → order
+    analytics_quotes_daily   quote count / value
+    analytics_orders_daily   order count / value placed per day
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import List, Optional
+from uuid import uuid4
+
+from src.core import db
+from src.core.settings import get_settings
+
+LOCK_NAME = "analytics_rollup"
+LOCK_SOURCE = "_lock"  # SQLite has no named locks; the lease lives in this analytics_watermarks row
+LOCK_LEASE_SECONDS = 300  # renewed after every batch, so only a crashed run's lease ever expires
+# Rows younger than this may still have lower-id/earlier rows committing behind them.
+SETTLE_SECONDS = 5
+
+# intent_detected (set per turn from the tools called, see src/core/config.py turn_intent) → funnel stage;
+# every conversation with a turn that day counts as "chat"
+FUNNEL_STAGES = ("chat", "identity", "quote", "order")
+INTENT_STAGE = {
+    "verify_identity": "identity",
+    "generate_quote": "quote",
+    "order_placement": "order",
+}
+EPOCH = datetime(1970, 1, 1)
+
+
+def _connect():
+    return db.connect()
+
+
+def _sqlite() -> bool:
+    return get_settings().db_backend == "sqlite"
+
+
+def _lease(cursor, owner: str) -> bool:
+    """Takes or renews the SQLite lease; False while another run holds an unexpired one. Caller commits."""
+    now = datetime.now()
+    cursor.execute("INSERT IGNORE INTO analytics_watermarks (source) VALUES (%s)", (LOCK_SOURCE,))
+    cursor.execute(
+        "UPDATE analytics_watermarks SET last_ts = %s, last_id = %s "
+        "WHERE source = %s AND (last_ts IS NULL OR last_ts < %s OR last_id = %s)",
+        (now + timedelta(seconds=LOCK_LEASE_SECONDS), owner, LOCK_SOURCE, now, owner))
+    return cursor.rowcount == 1
+
+
+def _lock(conn, cursor, owner: str) -> bool:
+    if _sqlite():
+        acquired = _lease(cursor, owner)
+        conn.commit()
+        return acquired
+    cursor.execute("SELECT GET_LOCK(%s, 0)", (LOCK_NAME,))
+    return cursor.fetchone()[0] == 1
+
+
+def _unlock(conn, cursor, owner: str):
+    if _sqlite():
+        cursor.execute("UPDATE analytics_watermarks SET last_ts = NULL, last_id = NULL "
+                       "WHERE source = %s AND last_id = %s", (LOCK_SOURCE, owner))
+        conn.commit()
+        return
+    cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+    cursor.fetchone()
+
+
+def _watermark(cursor, source: str):
+    cursor.execute("SELECT last_ts, last_id FROM analytics_watermarks WHERE source = %s", (source,))
+    row = cursor.fetchone()
+    return (row[0] or EPOCH, row[1] or "") if row else (EPOCH, "")
+
+
+def _set_watermark(cursor, source: str, last_ts, last_id):
+    cursor.execute(
+        "INSERT INTO analytics_watermarks (source, last_ts, last_id) VALUES (%s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE last_ts = VALUES(last_ts), last_id = VALUES(last_id)",
+        (source, last_ts, str(last_id)))
+
+
+# -------------------------------------------------
+# Incremental folds (one batch each; caller commits)
+# -------------------------------------------------
+def _fold_chatlogs(cursor, settled: datetime, batch_size: int) -> int:
+    _, last_id = _watermark(cursor, "chatlogs")
+    cursor.execute(
+        "SELECT message_id, customer_id, intent_detected, DATE(timestamp) FROM chatlogs "
+        "WHERE message_id > %s AND timestamp < %s ORDER BY message_id LIMIT %s",
+        (int(last_id or 0), settled, batch_size))
+    rows = cursor.fetchall()
+    if not rows:
+        return 0
+
+    intents = Counter()
+    reached = defaultdict(set)  # (day, stage) -> conversations
+    for _, customer_id, intent, day in rows:
+        intent = intent or "unknown"
+        intents[(day, intent)] += 1
+        reached[(day, "chat")].add(customer_id)
+        stage = INTENT_STAGE.get(intent)
+        if stage:
+            reached[(day, stage)].add(customer_id)
+
+    cursor.executemany(
+        "INSERT INTO analytics_intent_daily (day, intent, messages) VALUES (%s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE messages = messages + VALUES(messages)",
+        [(day, intent, n) for (day, intent), n in intents.items()])
+
+    # A conversation counts once per day and stage; analytics_funnel_seen remembers who was counted.
+    new_counts = []
+    for (day, stage), customers in reached.items():
+        customers = list(customers)
+        placeholders = ", ".join(["%s"] * len(customers))
+        cursor.execute(f"SELECT customer_id FROM analytics_funnel_seen WHERE day = %s AND stage = %s "
+                       f"AND customer_id IN ({placeholders})", (day, stage, *customers))
+        seen = {r[0] for r in cursor.fetchall()}
+        new = [c for c in customers if c not in seen]
+        if new:
+            cursor.executemany("INSERT INTO analytics_funnel_seen (day, stage, customer_id) VALUES (%s, %s, %s)",
+                               [(day, stage, c) for c in new])
+            new_counts.append((day, stage, len(new)))
+    if new_counts:
+        cursor.executemany(
+            "INSERT INTO analytics_funnel_daily (day, stage, conversations) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE conversations = conversations + VALUES(conversations)",
+            new_counts)
+
+    _set_watermark(cursor, "chatlogs", None, rows[-1][0])
+    return len(rows)
+
+
+def _fold_by_created(cursor, source: str, id_column: str, columns: str, settled: datetime,
+                     batch_size: int) -> list:
+    last_ts, last_id = _watermark(cursor, source)
+    cursor.execute(
+        f"SELECT {id_column}, created_at, {columns} FROM {source} "
+        f"WHERE (created_at > %s OR (created_at = %s AND {id_column} > %s)) AND created_at < %s "
+        f"ORDER BY created_at, {id_column} LIMIT %s",
+        (last_ts, last_ts, last_id, settled, batch_size))
+    rows = cursor.fetchall()
+    if rows:
+        _set_watermark(cursor, source, rows[-1][1], rows[-1][0])
+    return rows
+
+
+def _fold_quotes(cursor, settled: datetime, batch_size: int) -> int:
+    rows = _fold_by_created(cursor, "quotes", "quote_id", "currency, total", settled, batch_size)
+    totals = defaultdict(lambda: [0, Decimal(0)])
+    for _, created_at, currency, total in rows:
+        bucket = totals[(created_at.date(), currency)]
+        bucket[0] += 1
+        bucket[1] += Decimal(str(total or 0))  # SQLite hands DECIMAL columns back as floats
+    if totals:
+        cursor.executemany(
+            "INSERT INTO analytics_quotes_daily (day, currency, quotes, total) VALUES (%s, %s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE quotes = quotes + VALUES(quotes), total = total + VALUES(total)",
+            [(day, currency, n, value) for (day, currency), (n, value) in totals.items()])
+    return len(rows)
+
+
+def _fold_orders(cursor, settled: datetime, batch_size: int) -> int:
+    # Orders are folded once, when placed; a status column here would only ever read "pending".
+    rows = _fold_by_created(cursor, "orders", "order_id", "currency, total", settled, batch_size)
+    totals = defaultdict(lambda: [0, Decimal(0)])
+    for _, created_at, currency, total in rows:
+        bucket = totals[(created_at.date(), currency)]
+        bucket[0] += 1
+        bucket[1] += Decimal(str(total or 0))
+    if totals:
+        cursor.executemany(
+            "INSERT INTO analytics_orders_daily (day, currency, orders, total) VALUES (%s, %s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE orders = orders + VALUES(orders), total = total + VALUES(total)",
+            [(day, currency, n, value) for (day, currency), (n, value) in totals.items()])
+    return len(rows)
+
+
+FOLDS = (("chatlogs", _fold_chatlogs), ("quotes", _fold_quotes), ("orders", _fold_orders))
+
+
+def refresh(batch_size: int = 5000, max_batches: Optional[int] = None) -> Optional[dict]:
+    """
+    Brings every rollup up to date. Each batch (rollup rows + watermark) is
+    one transaction. Returns rows folded per source, or None if another
+    process holds the rollup lock.
+    """
+    conn = _connect()
+    cursor = conn.cursor()
+    owner = uuid4().hex[:12]
+    try:
+        if not _lock(conn, cursor, owner):
+            return None
+        try:
+            settled = datetime.now() - timedelta(seconds=SETTLE_SECONDS)
+            folded = {}
+            for source, fold in FOLDS:
+                folded[source] = 0
+                batches = 0
+                while max_batches is None or batches < max_batches:
+                    n = fold(cursor, settled, batch_size)
+                    if _sqlite():
+                        _lease(cursor, owner)
+                    conn.commit()
+                    folded[source] += n
+                    batches += 1
+                    if n < batch_size:
+                        break
+            # Dedup entries are only needed while a day can still receive turns.
+            cursor.execute("DELETE FROM analytics_funnel_seen WHERE day < %s", (date.today() - timedelta(days=2),))
+            conn.commit()
+            return folded
+        finally:
+            _unlock(conn, cursor, owner)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+async def refresh_periodically(interval: float):
+    """Background loop for the app (ANALYTICS_REFRESH_INTERVAL > 0); the named lock makes one worker do the work."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(refresh)
+        except Exception as e:
+            print("Analytics refresh error:", e)
+
+
+# -------------------------------------------------
+# Read API (pre-aggregated tables only)
+# -------------------------------------------------
+def _range(start: Optional[date], end: Optional[date]):
+    end = end or date.today()
+    return start or end - timedelta(days=6), end
+
+
+def _query(sql: str, params) -> List[dict]:
+    conn = db.get_connection(read_only=True)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+    for row in rows:
+        for key, value in row.items():
+            if isinstance(value, Decimal):
+                row[key] = float(value)
+            elif isinstance(value, date):
+                row[key] = value.isoformat()
+    return rows
+
+
+def intent_mix(start: date = None, end: date = None) -> List[dict]:
+    start, end = _range(start, end)
+    return _query("SELECT day, intent, messages FROM analytics_intent_daily WHERE day BETWEEN %s AND %s "
+                  "ORDER BY day, messages DESC", (start, end))
+
+
+def funnel(start: date = None, end: date = None) -> List[dict]:
+    """Per day: conversations reaching each stage and the conversion from the previous stage."""
+    start, end = _range(start, end)
+    rows = _query("SELECT day, stage, conversations FROM analytics_funnel_daily WHERE day BETWEEN %s AND %s",
+                  (start, end))
+    by_day = defaultdict(dict)
+    for row in rows:
+        by_day[row["day"]][row["stage"]] = row["conversations"]
+    result = []
+    for day in sorted(by_day):
+        counts = {stage: by_day[day].get(stage, 0) for stage in FUNNEL_STAGES}
+        conversion = {}
+        for previous, stage in zip(FUNNEL_STAGES, FUNNEL_STAGES[1:]):
+            conversion[f"{previous}_to_{stage}"] = round(counts[stage] / counts[previous], 4) if counts[previous] else None
+        result.append({"day": day, **counts, "conversion": conversion})
+    return result
+
+
+def sales(start: date = None, end: date = None) -> dict:
+    start, end = _range(start, end)
+    return {
+        "quotes": _query("SELECT day, currency, quotes, total FROM analytics_quotes_daily "
+                         "WHERE day BETWEEN %s AND %s ORDER BY day", (start, end)),
+        "orders": _query("SELECT day, currency, orders, total FROM analytics_orders_daily "
+                         "WHERE day BETWEEN %s AND %s ORDER BY day", (start, end)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversation analytics rollups.")
+    sub = parser.add_subparsers(dest="command")
+    p = sub.add_parser("refresh", help="fold new rows into the rollups")
+    p.add_argument("--batch-size", type=int, default=5000)
+    p = sub.add_parser("report", help="print the rollups for recent days")
+    p.add_argument("--days", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.command == "refresh":
+        started = time.perf_counter()
+        folded = refresh(args.batch_size)
+        if folded is None:
+            print("Another refresh is running")
+        else:
+            print(f"Folded {folded} in {time.perf_counter() - started:.1f}s")
+    elif args.command == "report":
+        start = date.today() - timedelta(days=args.days - 1)
+        print(json.dumps({"intents": intent_mix(start), "funnel": funnel(start), **sales(start)}, indent=2))
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
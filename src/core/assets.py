@@ -0,0 +1,242 @@
+"""
+Static assets for the chat UI.
+
+Build step (run at deploy time, output in static/dist/):
+
+    python -m src.core.assets build [--clean]
+
+- every file under static/ is copied to a fingerprinted name
+  (images/bg3.jfif -> images/bg3.3f9c2a1d0b.jfif) listed in manifest.json
+- text assets get .gz (and .br when `brotli` is installed) siblings
+- images get WebP variants, plus downscaled widths for large images,
+  when Pillow is installed
+
+Templates call asset_url("images/bg3.jfif") / image_set(...) and fall back
+to the plain /static/ path when no build has been run. AssetFiles serves
+the precompressed sibling the client accepts and marks fingerprinted files
+immutable, so browsers stop re-downloading them. GZipMiddleware compresses
+the dynamic responses (HTML page, /chat JSON) and leaves /static alone.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from functools import lru_cache
+from io import BytesIO
+from typing import Dict
+
+from markupsafe import Markup
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.middleware.gzip import GZipMiddleware as _GZipMiddleware
+from starlette.staticfiles import StaticFiles
+
+STATIC_DIR = "static"
+DIST = "dist"
+MANIFEST = "manifest.json"
+URL_PREFIX = "/static"
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+COMPRESSIBLE = {".css", ".js", ".mjs", ".html", ".svg", ".json", ".txt", ".map", ".xml", ".ico"}
+IMAGES = {".jpg", ".jpeg", ".jfif", ".png"}
+IMAGE_WIDTHS = (480, 960)  # downscaled copies for images wider than these
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+mimetypes.add_type("image/jpeg", ".jfif")
+mimetypes.add_type("image/webp", ".webp")
+
+
+def _fingerprint(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def _fingerprinted(rel: str, digest: str) -> str:
+    stem, ext = os.path.splitext(rel)
+    return f"{stem}.{digest}{ext}"
+
+
+def _write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+# -------------------------------------------------
+# Build
+# -------------------------------------------------
+def _precompress(path: str, data: bytes) -> list:
+    written = []
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data) * 0.9:
+        _write(path + ".gz", gz)
+        written.append("gzip")
+    try:
+        import brotli  # optional dependency
+    except ImportError:
+        return written
+    br = brotli.compress(data, quality=11)
+    if len(br) < len(data) * 0.9:
+        _write(path + ".br", br)
+        written.append("br")
+    return written
+
+
+def _image_variants(src: str, rel: str, out_dir: str) -> Dict[str, str]:
+    """
+    {"webp": path, "webp@480": path, ...}; empty without Pillow or for images it
+    can't read. A full-size WebP that isn't smaller than the original is skipped.
+    """
+    try:
+        from PIL import Image  # optional dependency
+    except ImportError:
+        return {}
+    variants = {}
+    try:
+        with Image.open(src) as image:
+            image.load()
+            sizes = [("", image)]
+            for width in IMAGE_WIDTHS:
+                if image.width > width:
+                    height = round(image.height * width / image.width)
+                    sizes.append((f"@{width}", image.resize((width, height), Image.LANCZOS)))
+            for suffix, img in sizes:
+                buffer = BytesIO()
+                img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB").save(
+                    buffer, "WEBP", quality=80, method=6)
+                data = buffer.getvalue()
+                if not suffix and len(data) >= os.path.getsize(src):
+                    continue
+                stem = os.path.splitext(rel)[0] + suffix.replace("@", "-")
+                name = _fingerprinted(stem + ".webp", _fingerprint(data))
+                _write(os.path.join(out_dir, name), data)
+                variants["webp" + suffix] = name
+    except OSError as e:
+        print(f"Skipping image variants for {rel}: {e}")
+    return variants
+
+
+def build(static_dir: str = STATIC_DIR, clean: bool = False) -> dict:
+    """Writes fingerprinted, precompressed and image-variant copies to <static_dir>/dist and returns the manifest."""
+    out_dir = os.path.join(static_dir, DIST)
+    if clean and os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != out_dir]
+        for filename in sorted(files):
+            src = os.path.join(root, filename)
+            rel = os.path.relpath(src, static_dir).replace(os.sep, "/")
+            with open(src, "rb") as f:
+                data = f.read()
+            name = _fingerprinted(rel, _fingerprint(data))
+            target = os.path.join(out_dir, name)
+            _write(target, data)
+            entry = {"path": name, "bytes": len(data)}
+            ext = os.path.splitext(rel)[1].lower()
+            if ext in COMPRESSIBLE:
+                entry["encodings"] = _precompress(target, data)
+            if ext in IMAGES:
+                entry["variants"] = _image_variants(src, rel, out_dir)
+            manifest[rel] = entry
+    # Old fingerprints stay in place (without --clean) so pages rendered before a deploy keep working.
+    _write(os.path.join(out_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    load_manifest.cache_clear()
+    return manifest
+
+
+# -------------------------------------------------
+# Template helpers
+# -------------------------------------------------
+@lru_cache(maxsize=None)
+def load_manifest(static_dir: str = STATIC_DIR) -> dict:
+    try:
+        with open(os.path.join(static_dir, DIST, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def asset_url(path: str) -> str:
+    entry = load_manifest().get(path)
+    if entry is None:
+        return f"{URL_PREFIX}/{path}"
+    return f"{URL_PREFIX}/{DIST}/{entry['path']}"
+
+
+def image_set(path: str) -> Markup:
+    """CSS image-set() offering the WebP variant first; a plain url() when there is none."""
+    entry = load_manifest().get(path) or {}
+    webp = (entry.get("variants") or {}).get("webp")
+    if not webp:
+        return Markup(f'url("{asset_url(path)}")')
+    original_type = mimetypes.guess_type(path)[0] or "image/jpeg"
+    return Markup(f'image-set(url("{URL_PREFIX}/{DIST}/{webp}") type("image/webp"), '
+                  f'url("{asset_url(path)}") type("{original_type}"))')
+
+
+# -------------------------------------------------
+# Serving
+# -------------------------------------------------
+class AssetFiles(StaticFiles):
+    """StaticFiles with precompressed siblings and cache headers (immutable for fingerprinted files)."""
+
+    async def get_response(self, path: str, scope):
+        fingerprinted = path.startswith(DIST + "/") or path.startswith(DIST + os.sep)
+        response = None
+        if fingerprinted and os.path.splitext(path)[1].lower() in COMPRESSIBLE:
+            accepted = Headers(scope=scope).get("accept-encoding", "")
+            for encoding, suffix in ENCODINGS:
+                if encoding not in accepted:
+                    continue
+                try:
+                    response = await super().get_response(path + suffix, scope)
+                except HTTPException:
+                    continue
+                response.headers["content-encoding"] = encoding
+                media_type = mimetypes.guess_type(path)[0]
+                if media_type:
+                    response.headers["content-type"] = media_type
+                break
+        if response is None:
+            response = await super().get_response(path, scope)
+        response.headers["cache-control"] = IMMUTABLE if fingerprinted else REVALIDATE
+        response.headers["vary"] = "Accept-Encoding"
+        return response
+
+
+class GZipMiddleware(_GZipMiddleware):
+    """Starlette's GZipMiddleware, skipping paths (static files) that are already compressed or not worth it."""
+
+    def __init__(self, app, minimum_size: int = 500, compresslevel: int = 6, skip_prefixes=(URL_PREFIX,)):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.skip_prefixes = tuple(skip_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(self.skip_prefixes):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Static asset pipeline.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="fingerprint, precompress and build image variants into static/dist")
+    b.add_argument("--static-dir", default=STATIC_DIR)
+    b.add_argument("--clean", action="store_true", help="remove previous builds first")
+    args = parser.parse_args()
+
+    manifest = build(args.static_dir, clean=args.clean)
+    for rel, entry in sorted(manifest.items()):
+        extras = entry.get("encodings", []) + sorted(entry.get("variants", {}))
+        print(f"{rel} -> {entry['path']} ({entry['bytes']} bytes){' + ' + ', '.join(extras) if extras else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Batch chat: runs many (session, message) pairs through the agent for
+offline evaluation and bulk processing.
+
+- Items of the same session run in order (that's how history builds up);
+  different sessions run in parallel, at most `concurrency` at a time.
+- Each item has its own timeout; a timed-out or failed item is reported
+  and the session moves on to its next message. An item the server keeps
+  refusing (admission control, ADMISSION_ATTEMPTS tries) is reported as
+  "rejected", so a saturated server doesn't read as a wall of timeouts.
+- Sessions are isolated: they run under "batch-<run_id>-<session_id>", so
+  a replay never reads or appends to the live conversation, and their
+  chatlogs are deleted afterwards unless keep_history is set.
+- Results are yielded as they complete, ending with a summary; /chat/batch
+  streams them as NDJSON.
+
+CLI (drives a running server):
+
+    python -m src.core.batch --from-file items.jsonl --output results.ndjson
+    python -m src.core.batch --from-chatlogs --since 2025-06-01 --until 2025-06-02 --concurrency 16
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import re
+import sys
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+from uuid import uuid4
+
+from pydantic import BaseModel, Field
+
+from src.core.admission import AdmissionRejected
+from src.core.bulk_io import read_rows
+from src.core.settings import get_settings
+
+
+# Isolated session ids go into chatlogs.session_id / customer_id, both VARCHAR(64).
+MAX_SESSION_ID = 64
+RUN_ID_PATTERN = r"^[A-Za-z0-9_-]{1,16}$"
+ADMISSION_ATTEMPTS = 5  # tries per item before it is reported "rejected"
+
+
+class BatchItem(BaseModel):
+    session_id: str
+    message: str
+    id: Optional[str] = None  # echoed back, e.g. the replayed chatlogs message_id
+
+
+class BatchRequest(BaseModel):
+    items: List[BatchItem]
+    concurrency: Optional[int] = Field(default=None, ge=1)
+    timeout: Optional[float] = Field(default=None, gt=0)  # seconds per item
+    run_id: Optional[str] = Field(default=None, pattern=RUN_ID_PATTERN)
+    keep_history: bool = False
+
+
+def isolated_session(run_id: str, session_id: str) -> str:
+    """batch-<run_id>-<session_id>, with the session id hashed when that would exceed MAX_SESSION_ID."""
+    session = f"batch-{run_id}-{session_id}"
+    if len(session) > MAX_SESSION_ID:
+        session = f"batch-{run_id}-{hashlib.sha1(session_id.encode()).hexdigest()}"
+    return session
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+async def run_batch(items: List[BatchItem],
+                    turn: Callable[[str, str], Awaitable[str]],
+                    concurrency: int,
+                    timeout: float,
+                    run_id: Optional[str] = None,
+                    finish: Optional[Callable[[str], Awaitable[None]]] = None) -> AsyncIterator[dict]:
+    """
+    Yields one result dict per item as it completes, then {"summary": ...}.
+    turn(session_id, message) returns the reply; finish(session_id) runs
+    after a session's last item (history cleanup).
+    """
+    run_id = run_id or uuid4().hex[:8]
+    if not re.fullmatch(RUN_ID_PATTERN, run_id):
+        raise ValueError(f"run_id must match {RUN_ID_PATTERN}")
+    sessions = OrderedDict()
+    for item in items:
+        sessions.setdefault(item.session_id, []).append(item)
+    pending = list(sessions.items())
+    results: asyncio.Queue = asyncio.Queue()
+    counts = {"ok": 0, "timeout": 0, "rejected": 0, "error": 0}
+    latencies = []
+
+    async def worker():
+        while pending:
+            session_id, session_items = pending.pop(0)
+            isolated = isolated_session(run_id, session_id)
+            try:
+                for item in session_items:
+                    started = time.perf_counter()
+                    result = {"id": item.id, "session_id": session_id}
+                    try:
+                        result["reply"] = await asyncio.wait_for(turn(isolated, item.message), timeout)
+                        result["status"] = "ok"
+                    except asyncio.TimeoutError:
+                        result["status"] = "timeout"
+                    except AdmissionRejected as e:
+                        result.update(status="rejected", error=str(e), retry_after=e.retry_after)
+                    except Exception as e:
+                        result.update(status="error", error=f"{type(e).__name__}: {e}")
+                    result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+                    await results.put(result)
+            finally:
+                if finish is not None:
+                    try:
+                        await finish(isolated)
+                    except Exception as e:
+                        print(f"Batch cleanup failed for {isolated}:", e)
+
+    started = time.perf_counter()
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(sessions)))]
+    try:
+        for _ in range(len(items)):
+            result = await results.get()
+            counts[result["status"]] += 1
+            latencies.append(result["latency_ms"])
+            yield result
+    finally:
+        # Client went away (or we're done): stop the remaining turns.
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    elapsed = time.perf_counter() - started
+    yield {"summary": {"run_id": run_id, "items": len(items), "sessions": len(sessions), **counts,
+                       "elapsed_s": round(elapsed, 2), "items_per_s": round(len(items) / max(elapsed, 1e-9), 2),
+                       "p50_ms": _percentile(latencies, 50), "p95_ms": _percentile(latencies, 95)}}
+
+
+def to_ndjson(result: dict) -> bytes:
+    return (json.dumps(result, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+# -------------------------------------------------
+# CLI
+# -------------------------------------------------
+def items_from_chatlogs(since: str, until: str, limit: int) -> List[dict]:
+    """User messages from chatlogs in [since, until), oldest first, with their session and message id."""
+    from src.core import db
+
+    conn = db.connect()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT message_id, customer_id, user_message FROM chatlogs "
+            "WHERE timestamp >= %s AND timestamp < %s AND user_message IS NOT NULL AND user_message <> '' "
+            "ORDER BY message_id LIMIT %s",
+            (since, until, limit),
+        )
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+    return [{"id": str(message_id), "session_id": session_id, "message": message}
+            for message_id, session_id, message in rows]
+
+
+async def _post(args, items: List[dict], out) -> dict:
+    import httpx
+
+    body = {"items": items, "concurrency": args.concurrency, "timeout": args.timeout,
+            "keep_history": args.keep_history}
+    summary = {}
+    async with httpx.AsyncClient(base_url=args.url, timeout=httpx.Timeout(None, connect=10)) as client:
+        async with client.stream("POST", "/chat/batch", json=body) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise SystemExit(f"/chat/batch returned {response.status_code}: {response.text}")
+            done = 0
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                if "summary" in result:
+                    summary = result["summary"]
+                    continue
+                out.write(line + "\n")
+                done += 1
+                if done % 100 == 0:
+                    print(f"{done}/{len(items)} done", file=sys.stderr)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay (session, message) pairs through /chat/batch.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--from-file", help=".jsonl/.csv with session_id, message[, id] ('-' for stdin)")
+    source.add_argument("--from-chatlogs", action="store_true", help="replay user messages from chatlogs")
+    parser.add_argument("--since", help="chatlogs: start timestamp (inclusive), e.g. 2025-06-01")
+    parser.add_argument("--until", help="chatlogs: end timestamp (exclusive)")
+    parser.add_argument("--limit", type=int, default=None, help="at most this many items")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--timeout", type=float, default=None, help="seconds per item")
+    parser.add_argument("--keep-history", action="store_true", help="keep the replayed sessions' chatlogs")
+    parser.add_argument("--output", default="-", help="NDJSON results file (default stdout)")
+    args = parser.parse_args()
+
+    limit = args.limit or get_settings().batch_max_items
+    if args.from_chatlogs:
+        if not (args.since and args.until):
+            parser.error("--from-chatlogs needs --since and --until")
+        items = items_from_chatlogs(args.since, args.until, limit)
+    else:
+        items = [{"session_id": str(r["session_id"]), "message": r["message"],
+                  **({"id": str(r["id"])} if r.get("id") not in (None, "") else {})}
+                 for r, _ in zip(read_rows(args.from_file), range(limit))]
+    if not items:
+        raise SystemExit("no items")
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        summary = asyncio.run(_post(args, items, out))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps(summary), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""Streaming readers shared by the bulk CLIs (lead pipeline, catalog import)."""
+import csv
+import json
+import sys
+from itertools import islice
+from typing import Iterable, Iterator, List
+
+
+def read_rows(path: str) -> Iterator[dict]:
+    """Streams dicts from a .csv or .jsonl/.ndjson file ('-' reads JSONL from stdin)."""
+    if path == "-":
+        for line in sys.stdin:
+            if line.strip():
+                yield json.loads(line)
+        return
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def batched(rows: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    it = iter(rows)
+    while batch := list(islice(it, size)):
+        yield batch
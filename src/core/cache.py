@@ -0,0 +1,463 @@
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.core.settings import get_settings
+
+INVALIDATION_CHANNEL = "cache-invalidation"
+
+# Leases are compare-and-set on the holder, so they run as scripts (atomic on the server).
+_REDIS_ACQUIRE = """
+local holder = redis.call('get', KEYS[1])
+if holder == false or holder == ARGV[1] then
+    redis.call('set', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+_REDIS_RELEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+# -------------------------------------------------
+# Backends
+# -------------------------------------------------
+class CacheBackend:
+    """
+    Minimal store shared by every worker: values with TTL, integer counters
+    (used as namespace versions), leases (cross-worker locks) and a
+    broadcast channel for invalidations.
+    """
+
+    name = "base"
+    # True when values never leave this process: Cache then stores objects as they are, unencoded.
+    in_process = False
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    def get_int(self, key: str) -> int:
+        raise NotImplementedError
+
+    def acquire_lock(self, key: str, owner: str, ttl: float) -> bool:
+        """Takes the lease on `key` for `ttl` seconds, or extends it if `owner` already holds it."""
+        raise NotImplementedError
+
+    def release_lock(self, key: str, owner: str):
+        """Drops the lease if `owner` still holds it."""
+        raise NotImplementedError
+
+    def publish(self, message: dict):
+        raise NotImplementedError
+
+    def subscribe(self, callback: Callable[[dict], None]):
+        """Calls `callback` for every message published by any worker (including this one)."""
+        raise NotImplementedError
+
+
+class LocalBackend(CacheBackend):
+    """Single process only. Invalidations reach this worker's subscribers and nobody else."""
+
+    name = "local"
+    in_process = True
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._subscribers = []
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._data.get(key, (0, None))[0]) + 1
+            self._data[key] = (value, None)
+            return value
+
+    def get_int(self, key):
+        with self._lock:
+            return int(self._data.get(key, (0, None))[0])
+
+    def acquire_lock(self, key, owner, ttl):
+        with self._lock:
+            holder, expires_at = self._data.get(key, (None, None))
+            if holder is not None and holder != owner and expires_at > time.time():
+                return False
+            self._data[key] = (owner, time.time() + ttl)
+            return True
+
+    def release_lock(self, key, owner):
+        with self._lock:
+            if self._data.get(key, (None, None))[0] == owner:
+                del self._data[key]
+
+    def publish(self, message):
+        for callback in list(self._subscribers):
+            callback(message)
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+
+class SharedMemoryBackend(CacheBackend):
+    """
+    One-host deployments: an SQLite file on tmpfs (/dev/shm) shared by all
+    workers on the machine. Invalidation messages are rows in an events
+    table that each worker polls.
+    """
+
+    name = "shm"
+
+    def __init__(self, path: str, poll_interval: float = 0.2):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        self._subscribers = []
+        self._poller = None
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                     "message TEXT, created_at REAL)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute("SELECT value, expires_at FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return row[0]
+
+    def set(self, key, value, ttl=None):
+        self._conn().execute("INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                             (key, value, time.time() + ttl if ttl else None))
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def incr(self, key):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("INSERT OR IGNORE INTO kv (key, value, expires_at) VALUES (?, 0, NULL)", (key,))
+            conn.execute("UPDATE kv SET value = CAST(value AS INTEGER) + 1 WHERE key = ?", (key,))
+            value = conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()[0]
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return int(value)
+
+    def get_int(self, key):
+        value = self.get(key)
+        return int(value) if value is not None else 0
+
+    def acquire_lock(self, key, owner, ttl):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute("SELECT value, expires_at FROM kv WHERE key = ?", (key,)).fetchone()
+            acquired = row is None or row[0] == owner or (row[1] is not None and row[1] < now)
+            if acquired:
+                conn.execute("INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                             (key, owner, now + ttl))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return acquired
+
+    def release_lock(self, key, owner):
+        self._conn().execute("DELETE FROM kv WHERE key = ? AND value = ?", (key, owner))
+
+    def publish(self, message):
+        conn = self._conn()
+        conn.execute("INSERT INTO events (message, created_at) VALUES (?, ?)", (json.dumps(message), time.time()))
+        # Keep the log short; subscribers only need the last few seconds.
+        conn.execute("DELETE FROM events WHERE created_at < ?", (time.time() - 60,))
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+        if self._poller is None:
+            self._poller = threading.Thread(target=self._poll, name="cache-invalidation", daemon=True)
+            self._poller.start()
+
+    def _poll(self):
+        conn = self._conn()
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                rows = conn.execute("SELECT id, message FROM events WHERE id > ? ORDER BY id", (last_id,)).fetchall()
+            except sqlite3.Error as e:
+                print("Cache poll error:", e)
+                continue
+            for event_id, message in rows:
+                last_id = event_id
+                for callback in list(self._subscribers):
+                    callback(json.loads(message))
+
+
+class RedisBackend(CacheBackend):
+    """Multi-node deployments: any Redis-compatible server. Requires the optional `redis` package."""
+
+    name = "redis"
+
+    def __init__(self, url: str):
+        import redis  # optional dependency, only needed for CACHE_BACKEND=redis
+
+        self.client = redis.Redis.from_url(url)
+        self._acquire_script = self.client.register_script(_REDIS_ACQUIRE)
+        self._release_script = self.client.register_script(_REDIS_RELEASE)
+        self._subscribers = []
+        self._pubsub_thread = None
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def incr(self, key):
+        return int(self.client.incr(key))
+
+    def get_int(self, key):
+        value = self.client.get(key)
+        return int(value) if value is not None else 0
+
+    def acquire_lock(self, key, owner, ttl):
+        return bool(self._acquire_script(keys=[key], args=[owner, int(ttl * 1000)]))
+
+    def release_lock(self, key, owner):
+        self._release_script(keys=[key], args=[owner])
+
+    def publish(self, message):
+        self.client.publish(INVALIDATION_CHANNEL, json.dumps(message))
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+        if self._pubsub_thread is None:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{INVALIDATION_CHANNEL: self._dispatch})
+            self._pubsub_thread = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def _dispatch(self, raw):
+        message = json.loads(raw["data"])
+        for callback in list(self._subscribers):
+            callback(message)
+
+
+# -------------------------------------------------
+# Serialization
+# -------------------------------------------------
+# Shared entries are JSON, never pickles: whoever can write to Redis or the shm file
+# must not be able to run code in every worker. JSON types pass through; dates,
+# Decimals and bytes are tagged; other classes need register_type().
+_TAG = "__cache_type__"
+_TYPES: Dict[str, Tuple[type, Callable[[Any], Any], Callable[[Any], Any]]] = {
+    "datetime": (datetime, datetime.isoformat, datetime.fromisoformat),
+    "date": (date, date.isoformat, date.fromisoformat),
+    "decimal": (Decimal, str, Decimal),
+    "bytes": (bytes, lambda v: base64.b64encode(v).decode("ascii"), base64.b64decode),
+}
+
+
+def register_type(tag: str, cls: type, encode: Callable[[Any], Any], decode: Callable[[Any], Any]):
+    """Lets instances of `cls` be cached: encode() -> JSON-able value, decode() -> instance."""
+    _TYPES[tag] = (cls, encode, decode)
+
+
+def _default(value: Any) -> Any:
+    # datetime before date: a datetime is also a date
+    for tag, (cls, encode, _) in _TYPES.items():
+        if isinstance(value, cls):
+            return {_TAG: tag, "value": encode(value)}
+    raise TypeError(f"can't cache a {type(value).__name__}; register it with cache.register_type()")
+
+
+def _object_hook(obj: dict) -> Any:
+    tag = obj.get(_TAG)
+    if tag is None or len(obj) != 2:
+        return obj
+    return _TYPES[tag][2](obj["value"])
+
+
+def dumps(value: Any) -> bytes:
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(raw: bytes) -> Any:
+    return json.loads(raw, object_hook=_object_hook)
+
+
+# -------------------------------------------------
+# Versioned cache with a per-worker L1
+# -------------------------------------------------
+class Cache:
+    """
+    Values live in the shared backend; each worker keeps an L1 copy keyed by
+    namespace version. bump(namespace) increments the shared version and
+    broadcasts it, so every worker drops that namespace from L1 and the
+    stale shared entries are never read again.
+    """
+
+    def __init__(self, backend: CacheBackend, l1_size: int = 256, l1_ttl: float = 10.0):
+        self.backend = backend
+        self.l1_size = l1_size
+        self.l1_ttl = l1_ttl
+        self._l1 = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.stats = {"l1_hits": 0, "shared_hits": 0, "misses": 0, "invalidations": 0}
+        backend.subscribe(self._on_message)
+
+    def _on_message(self, message: dict):
+        namespace = message.get("namespace")
+        if namespace is None:
+            return
+        version = int(message.get("version", 0))
+        with self._lock:
+            current = self._versions.get(namespace, (0, 0.0))[0]
+            if version <= current:
+                return
+            self.stats["invalidations"] += 1
+            self._versions[namespace] = (version, time.time())
+            for key in [k for k in self._l1 if k[0] == namespace]:
+                del self._l1[key]
+
+    def version(self, namespace: str) -> int:
+        # Messages keep this fresh; re-reading every l1_ttl covers any missed message.
+        with self._lock:
+            cached = self._versions.get(namespace)
+        if cached is not None and cached[1] + self.l1_ttl > time.time():
+            return cached[0]
+        version = self.backend.get_int(f"version:{namespace}")
+        with self._lock:
+            self._versions[namespace] = (version, time.time())
+        return version
+
+    def bump(self, namespace: str) -> int:
+        version = self.backend.incr(f"version:{namespace}")
+        self.backend.publish({"namespace": namespace, "version": version, "pid": os.getpid()})
+        self._on_message({"namespace": namespace, "version": version})
+        return version
+
+    def get(self, namespace: str, key: str, version: Optional[int] = None) -> Any:
+        version = self.version(namespace) if version is None else version
+        l1_key = (namespace, version, key)
+        with self._lock:
+            entry = self._l1.get(l1_key)
+        if entry is not None and entry[1] > time.time():
+            self.stats["l1_hits"] += 1
+            return entry[0]
+
+        raw = self.backend.get(f"{namespace}:{version}:{key}")
+        try:
+            value = raw if raw is None or self.backend.in_process else loads(raw)
+        except (ValueError, KeyError, TypeError):
+            raw = None  # not ours (e.g. written by an older release, or an unregistered type tag); reload it
+        if raw is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["shared_hits"] += 1
+        self._remember(l1_key, value, self.l1_ttl)
+        return value
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None, version: Optional[int] = None):
+        version = self.version(namespace) if version is None else version
+        self.backend.set(f"{namespace}:{version}:{key}", value if self.backend.in_process else dumps(value), ttl)
+        self._remember((namespace, version, key), value, min(ttl, self.l1_ttl) if ttl else self.l1_ttl)
+
+    def delete(self, namespace: str, key: str):
+        version = self.version(namespace)
+        self.backend.delete(f"{namespace}:{version}:{key}")
+        with self._lock:
+            self._l1.pop((namespace, version, key), None)
+
+    def get_or_load(self, namespace: str, key: str, loader: Callable[[], Any], ttl: Optional[float] = None):
+        # Read and write under the version seen before loading: if the namespace is bumped while
+        # the loader runs, its possibly stale result is filed under the old version, never the new one.
+        version = self.version(namespace)
+        value = self.get(namespace, key, version)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.set(namespace, key, value, ttl, version)
+        return value
+
+    def _remember(self, l1_key, value, ttl: float):
+        with self._lock:
+            if len(self._l1) >= self.l1_size:
+                self._l1.pop(next(iter(self._l1)))
+            self._l1[l1_key] = (value, time.time() + ttl)
+
+    def snapshot(self) -> dict:
+        return {"backend": self.backend.name, "l1_entries": len(self._l1), **self.stats}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Cache:
+    """Process-wide cache on the backend selected by CACHE_BACKEND (local, shm or redis)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                settings = get_settings()
+                if settings.cache_backend == "redis":
+                    backend = RedisBackend(settings.cache_url)
+                elif settings.cache_backend == "shm":
+                    backend = SharedMemoryBackend(settings.cache_shm_path)
+                else:
+                    backend = LocalBackend()
+                _cache = Cache(backend)
+    return _cache
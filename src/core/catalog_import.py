@@ -0,0 +1,184 @@
+"""
+Bulk catalog import: streams products, inventory or shipping_rules from
+CSV/JSONL, validates each chunk, and upserts it with one multi-row
+INSERT ... ON DUPLICATE KEY UPDATE per chunk, committing per chunk so row
+locks stay short while chat traffic keeps running. When anything changed,
+the catalog version is bumped (src/core/catalog_version.py) so cached
+catalog reads are dropped on every worker.
+
+    python -m src.core.catalog_import products products.csv
+    python -m src.core.catalog_import inventory inventory.jsonl --chunk-size 2000
+    python -m src.core.catalog_import shipping_rules rules.csv --rejects rejects.jsonl
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel, TypeAdapter, ValidationError, field_validator
+
+from src.core import catalog_version, db
+from src.core.bulk_io import batched, read_rows
+
+# Same codes as product_discover.STATUS_MAPPING, reversed
+STOCK_STATUS_CODES = {"out of stock": 0, "in stock": 1, "preorder": 2, "discontinued": 3}
+
+
+# -------------------------------------------------
+# Row schemas (ProductQueryOutput-compatible for products)
+# -------------------------------------------------
+class ProductRow(BaseModel):
+    id: int
+    product_name: str
+    category: str
+    short_description: Optional[str] = None
+    long_description: Optional[str] = None
+    tech_specs: Optional[Dict[str, Any]] = None
+    base_price: float
+    stock_status: Union[int, str] = 1
+
+    @field_validator("tech_specs", mode="before")
+    @classmethod
+    def _parse_specs(cls, value):
+        # CSV cells carry the specs as a JSON string
+        if isinstance(value, str):
+            return json.loads(value) if value.strip() else None
+        return value
+
+    @field_validator("stock_status", mode="before")
+    @classmethod
+    def _status_code(cls, value):
+        if isinstance(value, str) and not value.strip().isdigit():
+            try:
+                return STOCK_STATUS_CODES[value.strip().lower()]
+            except KeyError:
+                raise ValueError(f"unknown stock_status {value!r}")
+        return int(value)
+
+
+class InventoryRow(BaseModel):
+    product_id: int
+    warehouse_location: str
+    quantity_left: int
+    last_counted: Optional[datetime] = None
+
+    @field_validator("last_counted", mode="before")
+    @classmethod
+    def _blank_is_none(cls, value):
+        return None if value == "" else value
+
+
+class ShippingRuleRow(BaseModel):
+    country: str
+    base_rate: float
+    per_kg_rate: float
+    hazmat_fee: float = 0.0
+    avg_eta_days: int
+
+
+# table -> (schema, columns, key columns)
+TARGETS = {
+    "products": (ProductRow, ("id", "product_name", "category", "short_description", "long_description",
+                              "tech_specs", "base_price", "stock_status"), ("id",)),
+    "inventory": (InventoryRow, ("product_id", "warehouse_location", "quantity_left", "last_counted"),
+                  ("product_id", "warehouse_location")),
+    "shipping_rules": (ShippingRuleRow, ("country", "base_rate", "per_kg_rate", "hazmat_fee", "avg_eta_days"),
+                       ("country",)),
+}
+
+
+def upsert_sql(table: str, columns, keys, rows: int) -> str:
+    placeholders = "(" + ", ".join("CAST(%s AS JSON)" if c == "tech_specs" else "%s" for c in columns) + ")"
+    updates = ", ".join(f"{c} = VALUES({c})" for c in columns if c not in keys)
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+            + ", ".join([placeholders] * rows)
+            + f" ON DUPLICATE KEY UPDATE {updates}")
+
+
+_adapters = {schema: TypeAdapter(List[schema]) for schema, _, _ in TARGETS.values()}
+
+
+def validate(schema, chunk: List[dict]):
+    """Returns (models, rejects). One validation call per chunk; per row only when the chunk has bad rows."""
+    try:
+        return _adapters[schema].validate_python(chunk), []
+    except ValidationError:
+        models, rejects = [], []
+        for row in chunk:
+            try:
+                models.append(schema.model_validate(row))
+            except ValidationError as e:
+                rejects.append({"row": row, "errors": e.errors(include_url=False, include_context=False)})
+        return models, rejects
+
+
+def _values(model: BaseModel, columns) -> list:
+    values = []
+    for column in columns:
+        value = getattr(model, column)
+        values.append(json.dumps(value) if column == "tech_specs" and value is not None else value)
+    return values
+
+
+def run(table: str, path: str, chunk_size: int = 1000, rejects_path: Optional[str] = None,
+        pause: float = 0.0, dry_run: bool = False) -> dict:
+    schema, columns, keys = TARGETS[table]
+    stats = {"read": 0, "upserted": 0, "rejected": 0, "chunks": 0}
+    conn = None if dry_run else db.connect()
+    cursor = conn.cursor() if conn else None
+    rejects_file = open(rejects_path, "w", encoding="utf-8") if rejects_path else None
+    started = time.perf_counter()
+    try:
+        for chunk in batched(read_rows(path), chunk_size):
+            stats["read"] += len(chunk)
+            models, rejects = validate(schema, chunk)
+            stats["rejected"] += len(rejects)
+            if rejects_file is not None:
+                for reject in rejects:
+                    rejects_file.write(json.dumps(reject, default=str) + "\n")
+            if not models:
+                continue
+
+            if cursor is not None:
+                params = [v for model in models for v in _values(model, columns)]
+                cursor.execute(upsert_sql(table, columns, keys, len(models)), params)
+                conn.commit()  # one bounded transaction per chunk
+            stats["upserted"] += len(models)
+            stats["chunks"] += 1
+            if pause:
+                time.sleep(pause)
+
+        if conn is not None and stats["upserted"]:
+            stats["catalog_version"] = catalog_version.bump(conn)
+    finally:
+        if rejects_file is not None:
+            rejects_file.close()
+        if conn is not None:
+            cursor.close()
+            conn.close()
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 3)
+    stats["rows_per_second"] = round(stats["read"] / elapsed) if elapsed else None
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk catalog / inventory / shipping rules import.")
+    parser.add_argument("table", choices=sorted(TARGETS))
+    parser.add_argument("path", help="CSV or JSONL file ('-' for JSONL on stdin)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="rows per upsert statement / transaction")
+    parser.add_argument("--rejects", help="write rows that fail validation here (JSONL)")
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between chunks")
+    parser.add_argument("--dry-run", action="store_true", help="validate only")
+    args = parser.parse_args()
+
+    stats = run(args.table, args.path, args.chunk_size, args.rejects, args.pause, args.dry_run)
+    print(f"{args.table}: read {stats['read']} rows in {stats['seconds']}s ({stats['rows_per_second']}/s), "
+          f"upserted {stats['upserted']} in {stats['chunks']} chunks, rejected {stats['rejected']}"
+          + (f", catalog version {stats['catalog_version']}" if "catalog_version" in stats else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Compact in-memory catalog. A list of ProductQueryOutput models with parsed
+tech_specs dicts costs kilobytes per product, in every worker; this keeps
+the same data in columns instead:
+
+- id, base_price and stock_status in typed arrays (8 + 8 + 2 bytes a row)
+- category as a code into a table of distinct names, each stored once
+- tech_specs as the raw JSON bytes, parsed on first access per row
+- names and descriptions as plain strings
+
+Models are built only for rows that are actually handed out. get_all_products
+returns a CatalogView, a read-only sequence that materializes a
+ProductQueryOutput per row on access, and the product shaper reads the
+few columns it shows straight from the store (records()) without building
+models or parsing specs.
+
+    store = CatalogStore.from_rows(cursor.fetchall())
+    view = CatalogView(store, ProductQueryOutput)
+    view[0]          -> ProductQueryOutput (specs parsed now)
+    store.specs(0)   -> dict
+    CatalogView(store, ProductQueryOutput, store.matching(category="drone"), offset=0)
+"""
+import json
+import sys
+from array import array
+from collections.abc import Sequence
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from src.core.cache import register_type
+
+STATUS_MAPPING = {
+    0: "Out of Stock",
+    1: "In Stock",
+    2: "Preorder",
+    3: "Discontinued",
+}
+UNKNOWN_STATUS = -1
+ROW_REPR_OVERHEAD = 160  # field names and punctuation in str(ProductQueryOutput), for token estimates
+
+
+class CatalogStore:
+    """Columns of the products table; row i is the i-th product as read."""
+
+    def __init__(self):
+        self.ids = array("q")
+        self.prices = array("d")
+        self.status = array("h")
+        self.category_codes = array("I")
+        self.categories: List[str] = []
+        self.names: List[str] = []
+        self.short_descriptions: List[Optional[str]] = []
+        self.long_descriptions: List[Optional[str]] = []
+        self.tech_specs: List[Optional[bytes]] = []
+        self.text_chars = 0
+        self._category_index: Dict[str, int] = {}
+        self._rows: Optional[Dict[int, int]] = None
+        self._parsed: Dict[int, Optional[dict]] = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> "CatalogStore":
+        """Rows of (id, product_name, category, short_description, long_description, tech_specs, base_price, stock_status)."""
+        store = cls()
+        for row in rows:
+            store.append(*row)
+        return store
+
+    def append(self, product_id, product_name, category, short_description, long_description, tech_specs,
+               base_price, stock_status):
+        code = self._category_index.get(category)
+        if code is None:
+            code = self._category_index[category] = len(self.categories)
+            self.categories.append(sys.intern(category))
+        if isinstance(tech_specs, str):
+            tech_specs = tech_specs.encode("utf-8")
+        self.ids.append(product_id)
+        self.prices.append(float(base_price))
+        self.status.append(stock_status if stock_status in STATUS_MAPPING else UNKNOWN_STATUS)
+        self.category_codes.append(code)
+        self.names.append(product_name)
+        self.short_descriptions.append(short_description)
+        self.long_descriptions.append(long_description)
+        self.tech_specs.append(bytes(tech_specs) if tech_specs else None)
+        self.text_chars += (len(product_name) + len(category) + len(short_description or "")
+                            + len(long_description or "") + len(tech_specs or b"") + ROW_REPR_OVERHEAD)
+        self._rows = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row_of(self, product_id: int) -> Optional[int]:
+        if self._rows is None:
+            self._rows = {product_id: i for i, product_id in enumerate(self.ids)}
+        return self._rows.get(product_id)
+
+    def matching(self, category: Optional[str] = None, name: Optional[str] = None) -> Sequence[int]:
+        """Rows whose category / product name contain the given text (case-insensitive), in catalog order."""
+        if not category and not name:
+            return range(len(self))
+        codes = None
+        if category:
+            needle = category.casefold()
+            codes = {code for code, c in enumerate(self.categories) if needle in c.casefold()}
+        needle = name.casefold() if name else None
+        return [i for i in range(len(self))
+                if (codes is None or self.category_codes[i] in codes)
+                and (needle is None or needle in self.names[i].casefold())]
+
+    def specs(self, i: int) -> Optional[dict]:
+        """tech_specs of row i, parsed on first access."""
+        if i not in self._parsed:
+            raw = self.tech_specs[i]
+            self._parsed[i] = json.loads(raw) if raw else None
+        return self._parsed[i]
+
+    def record(self, i: int, specs: bool = True) -> dict:
+        """Row i as a dict with the ProductQueryOutput fields; specs=False skips parsing tech_specs."""
+        return {
+            "id": self.ids[i],
+            "product_name": self.names[i],
+            "category": self.categories[self.category_codes[i]],
+            "short_description": self.short_descriptions[i],
+            "long_description": self.long_descriptions[i],
+            "tech_specs": self.specs(i) if specs else None,
+            "base_price": self.prices[i],
+            "stock_status": STATUS_MAPPING.get(self.status[i], "Unknown"),
+        }
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the store (arrays, strings and spec bytes, not parsed specs)."""
+        arrays = sum(a.itemsize * len(a) for a in (self.ids, self.prices, self.status, self.category_codes))
+        strings = sum(sys.getsizeof(s) for column in (self.names, self.short_descriptions, self.long_descriptions)
+                      for s in column if s is not None)
+        specs = sum(sys.getsizeof(b) for b in self.tech_specs if b is not None)
+        lists = sum(sys.getsizeof(column) for column in (self.names, self.short_descriptions,
+                                                         self.long_descriptions, self.tech_specs))
+        return arrays + strings + specs + lists + sum(sys.getsizeof(c) for c in self.categories)
+
+    # Shared caches store only the columns; parsed specs and the id index are per-process conveniences.
+    def to_payload(self) -> dict:
+        return {
+            "ids": self.ids.tobytes(), "prices": self.prices.tobytes(), "status": self.status.tobytes(),
+            "category_codes": self.category_codes.tobytes(), "categories": self.categories, "names": self.names,
+            "short_descriptions": self.short_descriptions, "long_descriptions": self.long_descriptions,
+            "tech_specs": [raw.decode("utf-8") if raw else None for raw in self.tech_specs],
+            "text_chars": self.text_chars,
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "CatalogStore":
+        store = cls()
+        for name in ("ids", "prices", "status", "category_codes"):
+            getattr(store, name).frombytes(payload[name])
+        store.categories = [sys.intern(c) for c in payload["categories"]]
+        store._category_index = {c: code for code, c in enumerate(store.categories)}
+        store.names = payload["names"]
+        store.short_descriptions = payload["short_descriptions"]
+        store.long_descriptions = payload["long_descriptions"]
+        store.tech_specs = [raw.encode("utf-8") if raw else None for raw in payload["tech_specs"]]
+        store.text_chars = payload["text_chars"]
+        return store
+
+
+class CatalogView(Sequence):
+    """
+    Read-only sequence over a store (or some of its rows) that builds `model`
+    objects on access. `offset` is where these rows start in the caller's
+    listing, so a shaper can say where the next page begins.
+    """
+
+    def __init__(self, store: CatalogStore, model: Callable[..., object], rows: Optional[Sequence] = None,
+                 offset: int = 0):
+        self.store = store
+        self.model = model
+        self.rows = range(len(store)) if rows is None else rows
+        self.offset = offset
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CatalogView(self.store, self.model, self.rows[index],
+                               self.offset + range(len(self.rows))[index].start)
+        return self.model(**self.store.record(self.rows[index]))
+
+    def __iter__(self) -> Iterator:
+        for i in self.rows:
+            yield self.model(**self.store.record(i))
+
+    def records(self, columns: Sequence[str]) -> Iterator[dict]:
+        """Just `columns` of each row, without building models or parsing specs."""
+        specs = "tech_specs" in columns
+        for i in self.rows:
+            record = self.store.record(i, specs=specs)
+            yield {c: record[c] for c in columns}
+
+    @property
+    def estimated_chars(self) -> int:
+        """Roughly len(str(self)), without building it."""
+        if len(self.rows) == len(self.store):
+            return self.store.text_chars
+        return self.store.text_chars * len(self.rows) // max(len(self.store), 1)
+
+    def __repr__(self) -> str:
+        # What the agents SDK sends when the result isn't shaped: the same text as a list of models.
+        return repr(list(self))
+
+    __str__ = __repr__
+
+
+register_type("catalog_store", CatalogStore, CatalogStore.to_payload, CatalogStore.from_payload)
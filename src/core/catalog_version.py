@@ -0,0 +1,61 @@
+"""
+Catalog version: a single-row counter in MySQL bumped by every catalog
+import. Workers poll it and bump the "catalog" cache namespace when it
+moves, so cached catalog reads are dropped even when the import ran in a
+separate process (or with CACHE_BACKEND=local).
+"""
+import asyncio
+
+from src.core import db
+from src.core.cache import get_cache
+
+NAMESPACE = "catalog"
+
+
+def read_version(cursor) -> int:
+    cursor.execute("SELECT version FROM catalog_version WHERE id = 1")
+    row = cursor.fetchone()
+    return int(row[0]) if row else 0
+
+
+def bump(conn) -> int:
+    """Increments the stored version, broadcasts the cache invalidation and returns the new version."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("INSERT INTO catalog_version (id, version) VALUES (1, 1) "
+                       "ON DUPLICATE KEY UPDATE version = version + 1")
+        conn.commit()
+        version = read_version(cursor)
+    finally:
+        cursor.close()
+    get_cache().bump(NAMESPACE)
+    return version
+
+
+def _poll() -> int:
+    # Primary, not a replica: a lagging replica would hold back the invalidation.
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    try:
+        version = read_version(cursor)
+        conn.commit()  # end the read snapshot before the connection goes back to the pool
+        return version
+    finally:
+        cursor.close()
+        conn.close()
+
+
+async def watch(interval: float):
+    """Background loop for the app (CATALOG_VERSION_POLL > 0)."""
+    seen, failing = None, False
+    while True:
+        try:
+            version = await asyncio.to_thread(_poll)
+            if seen is not None and version != seen:
+                get_cache().bump(NAMESPACE)
+            seen, failing = version, False
+        except Exception as e:
+            if not failing:  # once per outage, not every interval
+                print("Catalog version poll error:", e)
+            failing = True
+        await asyncio.sleep(interval)
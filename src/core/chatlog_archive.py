@@ -0,0 +1,368 @@
+"""
+Chatlog retention: keeps the hot `chatlogs` table small by moving cold
+conversations to gzip-compressed JSONL files on local disk.
+
+A conversation is cold once its newest turn is older than
+CHATLOG_RETENTION_DAYS. Each archive run writes one file per batch under
+CHATLOG_ARCHIVE_DIR/<year>/<month>/, one line per conversation, and
+records where every conversation went in `chatlog_archive`. Rows are only
+deleted from `chatlogs` after the file is on disk.
+
+chatlogs can also be range-partitioned by month, so emptied months are
+dropped as a whole partition instead of row by row.
+
+    python -m src.core.chatlog_archive archive                 # move cold conversations
+    python -m src.core.chatlog_archive show <customer_id>      # print an archived conversation
+    python -m src.core.chatlog_archive rehydrate <customer_id> # move it back into chatlogs
+    python -m src.core.chatlog_archive partition --months-ahead 3
+    python -m src.core.chatlog_archive drop-partitions         # drop empty months past retention
+"""
+import argparse
+import gzip
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.core import db
+from src.core.settings import get_settings
+
+COLUMNS = ("message_id", "customer_id", "session_id", "user_message", "bot_reply", "intent_detected", "timestamp")
+DELETE_CHUNK = 5000
+
+
+def _connect():
+    return db.connect()
+
+
+def _encode(row: dict) -> dict:
+    return {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in row.items()}
+
+
+def _decode(row: dict) -> dict:
+    if isinstance(row.get("timestamp"), str):
+        row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+    return row
+
+
+def delete_conversation(conn, customer_id: str, chunk: int = DELETE_CHUNK, upto: Optional[int] = None) -> int:
+    """
+    Deletes a customer's hot rows in bounded chunks (short row locks, small undo), only those with
+    message_id <= `upto` when given. Returns rows deleted.
+    """
+    cursor = conn.cursor()
+    deleted = 0
+    bound, params = ("", (customer_id, chunk)) if upto is None else (" AND message_id <= %s", (customer_id, upto, chunk))
+    try:
+        while True:
+            cursor.execute(f"DELETE FROM chatlogs WHERE customer_id = %s{bound} ORDER BY message_id LIMIT %s", params)
+            deleted += cursor.rowcount
+            conn.commit()
+            if cursor.rowcount < chunk:
+                return deleted
+    finally:
+        cursor.close()
+
+
+# -------------------------------------------------
+# Archiving
+# -------------------------------------------------
+def _cold_customers(cursor, cutoff: datetime, batch_size: int) -> List[str]:
+    # Candidates come off the timestamp index; the warm check (anyone with a turn after the cutoff) runs
+    # per candidate on (customer_id, message_id) inside the query, so warm customers never fill the LIMIT.
+    cursor.execute("SELECT DISTINCT c.customer_id FROM chatlogs c WHERE c.timestamp < %s "
+                   "AND NOT EXISTS (SELECT 1 FROM chatlogs w WHERE w.customer_id = c.customer_id "
+                   "AND w.timestamp >= %s) LIMIT %s", (cutoff, cutoff, batch_size))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _archive_path(archive_dir: str, now: datetime, seq: int) -> str:
+    folder = os.path.join(archive_dir, f"{now:%Y}", f"{now:%m}")
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"chatlogs-{now:%Y%m%dT%H%M%S}-{os.getpid()}-{seq:04d}.jsonl.gz")
+
+
+def _write_batch(conn, customers: List[str], path: str) -> Tuple[List[tuple], Dict[str, int]]:
+    """
+    Streams the customers' rows into `path`, one line per conversation.
+    Returns index rows and the newest archived message_id of each customer.
+    """
+    cursor = conn.cursor(dictionary=True)
+    placeholders = ", ".join(["%s"] * len(customers))
+    cursor.execute(f"SELECT {', '.join(COLUMNS)} FROM chatlogs WHERE customer_id IN ({placeholders}) "
+                   f"ORDER BY customer_id, message_id", customers)
+
+    index, last_ids, current, rows = [], {}, None, []
+
+    def flush(out):
+        if current is None:
+            return
+        out.write(json.dumps({"customer_id": current, "rows": rows}, ensure_ascii=False) + "\n")
+        index.append((current, path, len(rows), rows[0]["timestamp"], rows[-1]["timestamp"]))
+        last_ids[current] = rows[-1]["message_id"]
+
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as out:
+        for row in cursor:
+            if row["customer_id"] != current:
+                flush(out)
+                current, rows = row["customer_id"], []
+            rows.append(_encode(row))
+        flush(out)
+    cursor.close()
+    os.replace(tmp_path, path)
+    return index, last_ids
+
+
+def _resumed(cursor, customer_id: str, last_id: int) -> bool:
+    """True when the customer wrote again after their rows were archived, i.e. is no longer cold."""
+    cursor.execute("SELECT 1 FROM chatlogs WHERE customer_id = %s AND message_id > %s LIMIT 1",
+                   (customer_id, last_id))
+    return cursor.fetchone() is not None
+
+
+def archive(retention_days: int = None, batch_size: int = 500, limit: int = None,
+            archive_dir: str = None) -> int:
+    """
+    Moves conversations idle for longer than `retention_days` out of chatlogs.
+    Each batch is written, indexed and then deleted before the next starts.
+    Returns the number of conversations archived.
+    """
+    settings = get_settings()
+    retention_days = settings.chatlog_retention_days if retention_days is None else retention_days
+    archive_dir = archive_dir or settings.chatlog_archive_dir
+    cutoff = datetime.now() - timedelta(days=retention_days)
+
+    conn = _connect()
+    cursor = conn.cursor()
+    archived, resumed, moved_rows, seq = 0, 0, 0, 0
+    started = time.perf_counter()
+    try:
+        while limit is None or archived < limit:
+            size = batch_size if limit is None else min(batch_size, limit - archived)
+            customers = _cold_customers(cursor, cutoff, size)
+            if not customers:
+                break
+            seq += 1
+            index, last_ids = _write_batch(conn, customers, _archive_path(archive_dir, datetime.now(), seq))
+            # REPLACE: a conversation archived before, rehydrated and gone cold again points at its newest file.
+            cursor.executemany(
+                "REPLACE INTO chatlog_archive (customer_id, archive_path, row_count, first_ts, last_ts) "
+                "VALUES (%s, %s, %s, %s, %s)", index)
+            conn.commit()
+            for customer_id, last_id in last_ids.items():
+                # A customer who came back since the cold check keeps the whole conversation hot;
+                # otherwise delete only what went into the file, never a turn written meanwhile.
+                if _resumed(cursor, customer_id, last_id):
+                    forget(cursor, customer_id)
+                    conn.commit()
+                    resumed += 1
+                    continue
+                moved_rows += delete_conversation(conn, customer_id, upto=last_id)
+                archived += 1
+    finally:
+        cursor.close()
+        conn.close()
+    print(f"Archived {archived} conversations ({moved_rows} rows, {resumed} resumed and kept) "
+          f"in {time.perf_counter() - started:.1f}s")
+    return archived
+
+
+# -------------------------------------------------
+# Reading / rehydration
+# -------------------------------------------------
+def iter_archive(path: str, customer_id: Optional[str] = None) -> Iterator[dict]:
+    """Streams conversations ({"customer_id", "rows"}) from one archive file, optionally just one customer's."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            # Cheap substring check before parsing; most lines in a batch file belong to someone else.
+            if customer_id is not None and json.dumps(customer_id, ensure_ascii=False) not in line:
+                continue
+            conversation = json.loads(line)
+            if customer_id is not None and conversation["customer_id"] != customer_id:
+                continue
+            conversation["rows"] = [_decode(r) for r in conversation["rows"]]
+            yield conversation
+
+
+def archived_location(cursor, customer_id: str) -> Optional[str]:
+    cursor.execute("SELECT archive_path FROM chatlog_archive WHERE customer_id = %s", (customer_id,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def load_archived(customer_id: str) -> List[dict]:
+    """Rows of an archived conversation, oldest first, without touching the hot table."""
+    conn = _connect()
+    cursor = conn.cursor()
+    try:
+        path = archived_location(cursor, customer_id)
+    finally:
+        cursor.close()
+        conn.close()
+    if path is None or not os.path.exists(path):
+        return []
+    for conversation in iter_archive(path, customer_id):
+        return conversation["rows"]
+    return []
+
+
+def rehydrate(customer_id: str) -> int:
+    """Moves an archived conversation back into chatlogs (keeping message ids). Returns rows restored."""
+    # Called on every empty history read, new sessions included: a pooled connection and one
+    # primary-key lookup when there is nothing archived.
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    try:
+        path = archived_location(cursor, customer_id)
+        if path is None:
+            return 0
+        rows = []
+        if os.path.exists(path):
+            for conversation in iter_archive(path, customer_id):
+                rows = conversation["rows"]
+                break
+        if rows:
+            cursor.executemany(
+                f"INSERT IGNORE INTO chatlogs ({', '.join(COLUMNS)}) VALUES ({', '.join(['%s'] * len(COLUMNS))})",
+                [tuple(r.get(c) for c in COLUMNS) for r in rows])
+        cursor.execute("DELETE FROM chatlog_archive WHERE customer_id = %s", (customer_id,))
+        conn.commit()
+        return len(rows)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def forget(cursor, customer_id: str):
+    """Drops a conversation's archive pointer so it is never rehydrated (the file itself is immutable)."""
+    cursor.execute("DELETE FROM chatlog_archive WHERE customer_id = %s", (customer_id,))
+
+
+# -------------------------------------------------
+# Monthly partitions
+# -------------------------------------------------
+def _to_days(day: date) -> int:
+    """MySQL TO_DAYS()."""
+    return day.toordinal() + 365
+
+
+def _month_start(day: date, offset: int = 0) -> date:
+    month = day.month - 1 + offset
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def _partition_clause(upper: date) -> str:
+    name = f"p{_month_start(upper, -1):%Y%m}"
+    return f"PARTITION {name} VALUES LESS THAN (TO_DAYS('{upper:%Y-%m-%d}'))"
+
+
+def partitions(cursor) -> List[tuple]:
+    """(name, upper bound as TO_DAYS value or 'MAXVALUE', approximate rows) for chatlogs, oldest first."""
+    cursor.execute(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'chatlogs' AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION")
+    return cursor.fetchall()
+
+
+def ensure_partitions(months_back: int = 1, months_ahead: int = 3):
+    """
+    Partitions chatlogs by month on first run (the primary key becomes
+    (message_id, timestamp), as MySQL requires), then keeps
+    `months_ahead` future months split out of the catch-all pmax.
+    """
+    today = date.today()
+    conn = _connect()
+    cursor = conn.cursor()
+    try:
+        existing = partitions(cursor)
+        if not existing:
+            bounds = [_month_start(today, i) for i in range(-months_back + 1, months_ahead + 2)]
+            clauses = [_partition_clause(b) for b in bounds] + ["PARTITION pmax VALUES LESS THAN MAXVALUE"]
+            cursor.execute("ALTER TABLE chatlogs DROP PRIMARY KEY, ADD PRIMARY KEY (message_id, timestamp)")
+            cursor.execute("ALTER TABLE chatlogs PARTITION BY RANGE (TO_DAYS(timestamp)) (" + ", ".join(clauses) + ")")
+            print(f"Partitioned chatlogs into {len(clauses)} partitions")
+            return
+
+        wanted_days = _to_days(_month_start(today, months_ahead + 1))
+        bounded = [int(desc) for _, desc, _ in existing if desc != "MAXVALUE"]
+        last = max(bounded) if bounded else 0
+        new = []
+        upper = _month_start(today, 1)
+        while True:
+            days = _to_days(upper)
+            if days > wanted_days:
+                break
+            if days > last:
+                new.append(_partition_clause(upper))
+            upper = _month_start(upper, 1)
+        if new:
+            cursor.execute("ALTER TABLE chatlogs REORGANIZE PARTITION pmax INTO ("
+                           + ", ".join(new) + ", PARTITION pmax VALUES LESS THAN MAXVALUE)")
+        print(f"Added {len(new)} partitions")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def drop_empty_partitions(retention_days: int = None) -> List[str]:
+    """Drops month partitions that end before the retention cutoff and hold no rows (i.e. fully archived)."""
+    retention_days = get_settings().chatlog_retention_days if retention_days is None else retention_days
+    cutoff = date.today() - timedelta(days=retention_days)
+    conn = _connect()
+    cursor = conn.cursor()
+    dropped = []
+    try:
+        cutoff_days = _to_days(cutoff)
+        for name, desc, _ in partitions(cursor):
+            if desc == "MAXVALUE" or int(desc) > cutoff_days:
+                continue
+            # TABLE_ROWS is an estimate; count for real before dropping.
+            cursor.execute(f"SELECT COUNT(*) FROM chatlogs PARTITION ({name})")
+            if cursor.fetchone()[0] == 0:
+                cursor.execute(f"ALTER TABLE chatlogs DROP PARTITION {name}")
+                dropped.append(name)
+    finally:
+        cursor.close()
+        conn.close()
+    print(f"Dropped partitions: {', '.join(dropped) or 'none'}")
+    return dropped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chatlog retention and archive.")
+    sub = parser.add_subparsers(dest="command")
+    p = sub.add_parser("archive", help="move cold conversations to the archive")
+    p.add_argument("--retention-days", type=int)
+    p.add_argument("--batch-size", type=int, default=500)
+    p.add_argument("--limit", type=int, help="stop after this many conversations")
+    p = sub.add_parser("show", help="print an archived conversation")
+    p.add_argument("customer_id")
+    p = sub.add_parser("rehydrate", help="move an archived conversation back into chatlogs")
+    p.add_argument("customer_id")
+    p = sub.add_parser("partition", help="partition chatlogs by month / add upcoming months")
+    p.add_argument("--months-back", type=int, default=1)
+    p.add_argument("--months-ahead", type=int, default=3)
+    p = sub.add_parser("drop-partitions", help="drop empty month partitions past retention")
+    p.add_argument("--retention-days", type=int)
+    args = parser.parse_args()
+
+    if args.command == "archive":
+        archive(args.retention_days, args.batch_size, args.limit)
+    elif args.command == "show":
+        for row in load_archived(args.customer_id):
+            print(json.dumps(_encode(row), ensure_ascii=False))
+    elif args.command == "rehydrate":
+        print(f"Restored {rehydrate(args.customer_id)} rows")
+    elif args.command == "partition":
+        ensure_partitions(args.months_back, args.months_ahead)
+    elif args.command == "drop-partitions":
+        drop_empty_partitions(args.retention_days)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
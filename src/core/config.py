@@ -1,53 +1,126 @@
+import ast
+import asyncio
+import json
+import re
 from agents.memory import Session
-from typing import List
-import mysql.connector
+from typing import List, Optional
 from datetime import datetime
-import ast,re,json
-from dotenv import load_dotenv
-import os
-
-load_dotenv()  # loads variables from .env into environment
+from src.core.settings import get_settings
+from src.core.normalize import clean_text, raw_text
+from src.core import chatlog_archive, db
+
+db_config = get_settings().db_config()
+
+# intent_detected for a turn, from the tools the agent called; the analytics funnel
+# (src/core/analytics.py INTENT_STAGE) counts the first three. Within each tuple the first match wins.
+FUNNEL_TOOL_INTENTS = (
+    ("order_placement", "order_placement"),
+    ("generate_quote", "generate_quote"),
+    ("manage_user", "verify_identity"),
+)
+TOOL_INTENTS = (
+    ("availability_checker_tool", "availability_check"),
+    ("shipping_calculator", "availability_check"),
+    ("get_all_products", "product_discovery"),
+    ("create_support_ticket", "support"),
+    ("lead_qualification", "lead_qualification"),
+)
+NLU_TOOL = "chatbot_engine_NLU"
+# Session ids are stored in chatlogs.session_id / customer_id (VARCHAR(64)) and key the turn lease,
+# the read-your-writes pin and the customer context.
+SESSION_ID_RE = re.compile(r"[A-Za-z0-9_.:@-]{1,64}")
+
+
+def valid_session_id(session_id) -> bool:
+    return isinstance(session_id, str) and SESSION_ID_RE.fullmatch(session_id) is not None
+
+
+def _item_field(item, name: str):
+    return item.get(name) if isinstance(item, dict) else getattr(item, name, None)
+
+
+def turn_intent(items: List[dict]) -> str:
+    """
+    The turn's intent: the furthest sales step among the tools called, else
+    what the NLU tool reported, else "unknown".
+    """
+    called, nlu_calls, nlu_intent = set(), set(), None
+    for item in items:
+        kind = _item_field(item, "type")
+        if kind == "function_call":
+            called.add(_item_field(item, "name"))
+            if _item_field(item, "name") == NLU_TOOL:
+                nlu_calls.add(_item_field(item, "call_id"))
+        elif kind == "function_call_output" and _item_field(item, "call_id") in nlu_calls:
+            nlu_intent = _nlu_intent(_item_field(item, "output")) or nlu_intent
+    for tool, intent in FUNNEL_TOOL_INTENTS:
+        if tool in called:
+            return intent
+    if nlu_intent:
+        return nlu_intent
+    for tool, intent in TOOL_INTENTS:
+        if tool in called:
+            return intent
+    return "unknown"
+
+
+def _nlu_intent(output) -> Optional[str]:
+    data = output
+    if isinstance(output, str):
+        # Tool outputs reach the session as str(result): a Python dict repr, or JSON.
+        try:
+            data = ast.literal_eval(output)
+        except (ValueError, SyntaxError):
+            try:
+                data = json.loads(output)
+            except ValueError:
+                return None
+    intent = data.get("intent") if isinstance(data, dict) else None
+    return str(intent)[:40] if intent else None
+
+
+def _turns(items: List[dict]):
+    """
+    (user item, [assistant contents]) per user message. Tool calls and their
+    outputs carry no text for the history and are left out, so a turn is one
+    chatlogs row however many tools it called.
+    """
+    turns = []
+    for item in items:
+        role = _item_field(item, "role")
+        if role == "user":
+            turns.append((item, []))
+        elif role == "assistant":
+            if not turns:
+                turns.append((None, []))
+            turns[-1][1].append(_item_field(item, "content"))
+    return turns
 
-db_config = {
-    "host": os.getenv("DB_HOST"),
-    "user": os.getenv("DB_USER"),
-    "password": os.getenv("DB_PASSWORD"),
-    "database": os.getenv("DB_NAME")
-}
 
 class MyCustomSession(Session):
     def __init__(self,session_id : str):
         self.session_id = session_id
+        self.lazy_normalize = get_settings().chatlog_normalize == "lazy"
 
     async def get_items(self, limit: int | None = None) -> List[dict]:
 
-        """Fetch previous chat logs from MySQL."""
+        """Fetch the latest chat logs from MySQL, rehydrating an archived conversation if needed."""
         try:
-            conn = mysql.connector.connect(**db_config)
-            cursor = conn.cursor(dictionary=True)
-            query = """
-                SELECT message_id, customer_id, user_message, bot_reply, intent_detected, timestamp
-                FROM chatlogs
-                WHERE customer_id = %s
-                ORDER BY message_id ASC
-            """
-
-            cursor.execute(query, (self.session_id,))
-            rows = cursor.fetchall()
-            cursor.close()
-            conn.close()
+            # Pool checkout and queries block; run them in a worker thread, not on the event loop.
+            rows = await asyncio.to_thread(self._load_rows, limit)
 
+            read = clean_text if self.lazy_normalize else str
             items = []
             for row in rows:
                 if row['user_message']:
                     items.append({
                         "role": "user",
-                        "content": row['user_message'],
+                        "content": read(row['user_message']),
                     })
                 if row['bot_reply']:
                     items.append({
                         "role": "assistant",
-                        "content": row['bot_reply']
+                        "content": read(row['bot_reply'])
                     })
 
             return items[-limit:] if limit else items
@@ -55,62 +128,46 @@ class MyCustomSession(Session):
         except Exception as e:
             print("DB Read Error:", e)
             return []
+
+    def _load_rows(self, limit: int | None) -> List[dict]:
+        rows = self._read_rows(limit)
+        if not rows and chatlog_archive.rehydrate(self.session_id):
+            rows = self._read_rows(limit)
+        return rows
+
+    def _read_rows(self, limit: int | None) -> List[dict]:
+        # Newest rows first off (customer_id, message_id), so the read stays bounded however long the history is.
+        # A row holds one or two items, so `limit` rows always covers `limit` items.
+        row_limit = limit or get_settings().chatlog_history_rows
+        conn = db.get_connection()
+        try:
+            rows = db.query(conn, "chatlog_recent", (self.session_id, row_limit))
+        finally:
+            conn.close()
+        rows.reverse()
+        return rows
     
 
     async def add_items(self, items: List[dict]) -> None:
         """Store user & bot text along with intent in chatlogs table."""
+        await asyncio.to_thread(self._write_items, items)
+
+    def _write_items(self, items: List[dict]) -> None:
+        conn = None
         try:
-            conn = mysql.connector.connect(**db_config)
-            cursor = conn.cursor()
+            conn = db.get_connection()
+
+            # "lazy" stores raw text and normalizes on read / via `python -m src.core.normalize --backfill`
+            normalize = raw_text if self.lazy_normalize else clean_text
+            detected = turn_intent(items)
 
-            def extract_clean_text(data):
-                if isinstance(data, str):
-                    cleaned = data.strip().replace("```json", "").replace("```", "").strip()
-                    try:
-                        parsed = json.loads(cleaned.replace("'", '"'))
-                        if isinstance(parsed, dict) and "text" in parsed:
-                            data = parsed["text"]
-                        else:
-                            data = str(parsed)
-                    except Exception:
-                        try:
-                            parsed = ast.literal_eval(cleaned)
-                            if isinstance(parsed, dict) and "text" in parsed:
-                                data = parsed["text"]
-                            else:
-                                data = str(parsed)
-                        except Exception:
-                            data = cleaned
-
-                elif isinstance(data, dict):
-                    return extract_clean_text(data.get("text", ""))
-
-                elif isinstance(data, list):
-                    return " ".join(extract_clean_text(d) for d in data)
-
-                text = str(data).strip()
-                text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)
-                text = re.sub(r'\*(.*?)\*', r'\1', text)
-                text = re.sub(r'`(.*?)`', r'\1', text)
-                text = re.sub(r'\[(.*?)\]\(.*?\)', r'\1', text)
-                text = re.sub(r'#+ ', '', text)
-                return text.strip()
-
-            for i in range(0, len(items), 2):
-                if i + 1 >= len(items):
-                    break
-
-                user_raw = items[i].get("content", "")
-                bot_raw = items[i + 1].get("content", "")
-                intent = items[i].get("intent", "unknown")
-
-                user_message = extract_clean_text(user_raw)
-                bot_reply = extract_clean_text(bot_raw)
-
-                query = """
-                    INSERT INTO chatlogs (customer_id, user_message, bot_reply, intent_detected, session_id)
-                    VALUES (%s, %s, %s, %s, %s)
-                """
+            for user_item, replies in _turns(items):
+                user_raw = _item_field(user_item, "content") if user_item else ""
+                bot_raw = replies[0] if len(replies) == 1 else replies
+                intent = (user_item.get("intent") if isinstance(user_item, dict) else None) or detected
+
+                user_message = normalize(user_raw or "")
+                bot_reply = normalize(bot_raw) if replies else ""
 
                 params = (
                     str(self.session_id),      
@@ -121,29 +178,38 @@ class MyCustomSession(Session):
                 )
 
                 try:
-                    cursor.execute(query, params)
+                    db.run(conn, "chatlog_insert", params)
                 except Exception as e:
                     print("DB Write Error:", e)
 
 
             conn.commit()
-            cursor.close()
-            conn.close()
 
         except Exception as e:
             print("DB Write Error:", e)
 
+        finally:
+            if conn:
+                conn.close()
+
     
     async def pop_item(self):
         return None  # Not implemented
 
     async def clear_session(self):
+        await asyncio.to_thread(self._delete_items)
+
+    def _delete_items(self):
+        conn = None
         try:
-            conn = mysql.connector.connect(**db_config)
+            conn = db.get_connection()
+            chatlog_archive.delete_conversation(conn, self.session_id)
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM chatlogs WHERE customer_id = %s", (self.session_id,))
+            chatlog_archive.forget(cursor, self.session_id)
             conn.commit()
             cursor.close()
-            conn.close()
         except Exception as e:
-            print("Clear Session Error:", e)
\ No newline at end of file
+            print("Clear Session Error:", e)
+        finally:
+            if conn:
+                conn.close()
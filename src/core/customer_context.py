@@ -0,0 +1,68 @@
+"""
+Per-session customer context: the users row is read once, when manage_user
+verifies the customer, and attached to the conversation; generate_quote
+(customer name) and shipping_calculator (address) read it instead of
+querying users again on every call. Pricing inputs (user type, verification
+status) are not taken from here: generate_quote re-reads them per quote, so
+a changed customer never gets a quote at the old discount.
+
+The context lives in the shared cache under the session id (set per turn
+in current_session by main.py), so any worker serving the next turn finds
+it. Each entry records the customer's version; invalidate(customer_id)
+bumps that version and every session holding the old row reloads it on its
+next read. The app itself never writes users; whatever does (an admin tool,
+an import) should call it after changing a row. CUSTOMER_CONTEXT_TTL bounds
+how long an edit made elsewhere (e.g. directly in SQL) can go unseen.
+
+Outside a chat turn (no session) get() simply loads the row.
+"""
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from src.core.cache import get_cache
+from src.core.settings import get_settings
+
+NAMESPACE = "customers"
+
+# Set per /chat turn (the session id), like db.routing_key.
+current_session: ContextVar[Optional[str]] = ContextVar("customer_session", default=None)
+
+stats = {"hits": 0, "loads": 0, "invalidations": 0}
+
+
+def _version(customer_id: int) -> int:
+    # Read from the backend on every lookup (no L1), so an invalidation is seen by every worker at once.
+    return get_cache().backend.get_int(f"customer-version:{customer_id}")
+
+
+def attach(user: dict) -> dict:
+    """Attaches a freshly read users row to the current session and returns it."""
+    session_id = current_session.get()
+    ttl = get_settings().customer_context_ttl
+    if session_id is not None and ttl > 0:
+        entry = {"customer_id": user["id"], "version": _version(user["id"]), "user": user}
+        get_cache().set(NAMESPACE, f"session:{session_id}", entry, ttl)
+    return user
+
+
+def get(customer_id: int, load: Callable[[], Optional[dict]]) -> Optional[dict]:
+    """The session's customer row when it is this customer and still current; otherwise load() and attach it."""
+    session_id = current_session.get()
+    if session_id is not None and get_settings().customer_context_ttl > 0:
+        entry = get_cache().get(NAMESPACE, f"session:{session_id}")
+        if entry is not None and entry["customer_id"] == customer_id and entry["version"] == _version(customer_id):
+            stats["hits"] += 1
+            return entry["user"]
+    stats["loads"] += 1
+    user = load()
+    return attach(user) if user else None
+
+
+def invalidate(customer_id: int):
+    """The customer's profile changed: sessions holding the old row reload it."""
+    get_cache().backend.incr(f"customer-version:{customer_id}")
+    stats["invalidations"] += 1
+
+
+def snapshot() -> dict:
+    return dict(stats)
@@ -0,0 +1,445 @@
+"""
+Shared database access for the tools and the chat session store.
+
+- One connection pool per process (DB_POOL_SIZE), C extension unless
+  DB_USE_PURE is set. get_connection() blocks until a connection is free
+  instead of failing when the pool is busy, so async code awaits
+  get_connection_async() (the wait happens in a worker thread) or runs its
+  database work in asyncio.to_thread.
+- Hot statements are registered once by name (STATEMENTS / register()).
+  run()/query() execute them through a server-side prepared statement that
+  is cached per pooled connection, so MySQL parses each statement once per
+  connection instead of once per call.
+
+    with db.transaction() as conn:
+        user = db.query_one(conn, "user_by_id", (customer_id,))
+        db.run(conn, "quote_insert", (...), pin=True)
+
+Set DB_PREPARED=false to send the same statements as plain text.
+
+Read/write splitting: with DB_REPLICA_HOSTS set ("host[:port],..."),
+get_connection(read_only=True) hands out a replica connection, round
+robin over replicas whose lag is within DB_REPLICA_MAX_LAG. Writes a tool
+reads back (run(..., pin=True): orders, quotes, inventory) pin the current
+session (routing_key) to the primary for DB_READ_YOUR_WRITES_WINDOW
+seconds, so e.g. availability right after order_placement sees the new
+inventory; chatlogs, tickets and outbox writes don't. With a shared cache backend (shm,
+redis) the pin is stored there too, so it holds whichever worker serves the
+session's next turn.
+
+DB_BACKEND=sqlite swaps MySQL for an embedded SQLite file in WAL mode
+(src/core/sqlite_backend.py): same statements, same connection API, no
+replicas. connect() gives scripts an unpooled connection on either backend.
+"""
+import asyncio
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence
+
+import mysql.connector
+from mysql.connector import pooling
+
+from src.core import sqlite_backend
+from src.core.settings import get_settings
+
+# name -> SQL. The connector re-prepares whenever it is handed a different string object,
+# so every execution of a statement must pass this exact object (run()/query() do).
+STATEMENTS: Dict[str, str] = {
+    # users
+    "user_by_id": "SELECT * FROM users WHERE id = %s",
+    "user_by_email": "SELECT * FROM users WHERE email = %s",
+    "user_pricing": "SELECT user_type, verified FROM users WHERE id = %s",
+    # products / inventory / shipping
+    "product_specs": "SELECT tech_specs FROM products WHERE id = %s",
+    "product_set_stock_status": "UPDATE products SET stock_status = %s WHERE id = %s",
+    "inventory_quantity": "SELECT quantity_left FROM inventory WHERE product_id = %s",
+    "inventory_by_product": "SELECT quantity_left, warehouse_location, last_counted FROM inventory "
+                            "WHERE product_id = %s",
+    "inventory_warehouse": "SELECT warehouse_location FROM inventory WHERE product_id = %s AND quantity_left > 0 "
+                           "LIMIT 1",
+    "inventory_decrement": "UPDATE inventory SET quantity_left = quantity_left - %s WHERE product_id = %s",
+    "shipping_rule": "SELECT base_rate, per_kg_rate, hazmat_fee, avg_eta_days FROM shipping_rules WHERE country = %s",
+    # quotes / orders / support
+    "quote_by_id": "SELECT * FROM quotes WHERE quote_id = %s",
+    "quote_insert": "INSERT INTO quotes (quote_id, customer_id, items, subtotal, shipping_cost, tax, total, currency, "
+                    "status) VALUES (%s, %s, CAST(%s AS JSON), %s, %s, %s, %s, %s, %s)",
+    "order_insert": "INSERT INTO orders (order_id, quote_id, customer_id, items, subtotal, tax, shipping_cost, total, "
+                    "currency, ship_to_address, billing_address, payment_method, payment_status, order_status, "
+                    "shipping_method, notes) "
+                    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+    "order_items_by_customer": "SELECT items FROM orders WHERE customer_id = %s",
+    "ticket_insert": "INSERT INTO support_tickets (customer_id, product_id, issue_text, status) "
+                     "VALUES (%s, %s, %s, %s)",
+    # chatlogs
+    "chatlog_recent": "SELECT message_id, customer_id, user_message, bot_reply, intent_detected, timestamp "
+                      "FROM chatlogs WHERE customer_id = %s ORDER BY message_id DESC LIMIT %s",
+    "chatlog_insert": "INSERT INTO chatlogs (customer_id, user_message, bot_reply, intent_detected, session_id) "
+                      "VALUES (%s, %s, %s, %s, %s)",
+}
+
+stats = {"checkouts": 0, "waits": 0, "replica_reads": 0, "primary_reads": 0, "sticky_reads": 0,
+         "prepares": 0, "prepared_executions": 0, "text_executions": 0}
+
+# Set per /chat turn (the session id); writes made under a key pin that key's reads to the primary.
+routing_key: ContextVar[Optional[str]] = ContextVar("db_routing_key", default=None)
+_sticky: Dict[str, float] = {}
+_pools_lock = threading.Lock()
+_primary = None
+_replicas = None
+_next_replica = itertools.count()
+
+
+def register(name: str, sql: str) -> str:
+    """Adds a hot statement. Re-registering the same name with different SQL is an error."""
+    existing = STATEMENTS.get(name)
+    if existing is not None and existing != sql:
+        raise ValueError(f"statement {name!r} is already registered with different SQL")
+    STATEMENTS.setdefault(name, sql)
+    return name
+
+
+class _Pool:
+    """A MySQLConnectionPool plus a semaphore so checkout waits instead of raising when every connection is busy."""
+
+    def __init__(self, name: str, config: dict, size: int):
+        self.name = name
+        self.host = config.get("host")
+        self.config = config
+        self.size = size
+        self.pool = None
+        self._lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(size)
+        # Replica health: (checked_at, lag seconds or None when replication isn't running)
+        self.lag = None
+        self.checked_at = 0.0
+
+    def _ensure(self):
+        # The connector opens every pooled connection up front, so build the pool on first use;
+        # a replica that is down then fails its health check instead of the whole process.
+        if self.pool is None:
+            with self._lock:
+                if self.pool is None and "sqlite_path" in self.config:
+                    self.pool = sqlite_backend.SQLitePool(self.config["sqlite_path"], self.size)
+                elif self.pool is None:
+                    self.pool = pooling.MySQLConnectionPool(
+                        pool_name=self.name,
+                        pool_size=self.size,
+                        # Resetting the session on checkout would drop the prepared statements.
+                        pool_reset_session=False,
+                        use_pure=get_settings().db_use_pure,
+                        **self.config,
+                    )
+        return self.pool
+
+    def get(self, timeout: float):
+        pool = self._ensure()
+        if not self.slots.acquire(blocking=False):
+            stats["waits"] += 1
+            if not self.slots.acquire(timeout=timeout):
+                raise pooling.PoolError(f"No {self.name} database connection available within "
+                                        f"{timeout:.1f}s (DB_POOL_SIZE={self.size})")
+        try:
+            conn = pool.get_connection()
+        except Exception:
+            self.slots.release()
+            raise
+        stats["checkouts"] += 1
+        original_close = conn.close
+        returned = []
+
+        def close():
+            if returned:
+                return
+            returned.append(True)
+            try:
+                # pool_reset_session is off, so never hand the next user an open transaction.
+                if conn.in_transaction:
+                    conn.rollback()
+            except Exception:
+                pass
+            finally:
+                original_close()
+                self.slots.release()
+
+        conn.close = close
+        return conn
+
+
+def _replica_config(host: str) -> dict:
+    config = get_settings().db_config()
+    host, _, port = host.partition(":")
+    config["host"] = host
+    if port:
+        config["port"] = int(port)
+    config["connection_timeout"] = 3  # an unreachable replica should fail its check quickly
+    return config
+
+
+def _pools():
+    global _primary, _replicas
+    if _primary is None:
+        with _pools_lock:
+            if _primary is None:
+                settings = get_settings()
+                if settings.db_backend == "sqlite":
+                    _replicas = []
+                    _primary = _Pool("primary", {"sqlite_path": settings.db_sqlite_path}, settings.db_pool_size)
+                    return _primary, _replicas
+                _replicas = [_Pool(f"replica{i}", _replica_config(host), settings.db_pool_size)
+                             for i, host in enumerate(settings.db_replica_hosts)]
+                _primary = _Pool("primary", settings.db_config(), settings.db_pool_size)
+    return _primary, _replicas
+
+
+def _check_lag(replica: _Pool):
+    """Refreshes replica.lag from SHOW REPLICA STATUS (SHOW SLAVE STATUS on older servers)."""
+    lag = None
+    conn = None
+    try:
+        conn = replica.get(timeout=1.0)
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except mysql.connector.Error:
+            cursor.execute("SHOW SLAVE STATUS")
+        row = cursor.fetchone()
+        cursor.close()
+        if row:
+            value = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+            lag = float(value) if value is not None else None
+    except Exception as e:
+        print(f"Replica {replica.name} check failed:", e)
+    finally:
+        if conn is not None:
+            conn.close()
+    replica.lag = lag
+    replica.checked_at = time.monotonic()
+
+
+def _healthy_replica() -> Optional[_Pool]:
+    settings = get_settings()
+    _, replicas = _pools()
+    if not replicas:
+        return None
+    start = next(_next_replica)
+    for i in range(len(replicas)):
+        replica = replicas[(start + i) % len(replicas)]
+        if time.monotonic() - replica.checked_at > settings.db_replica_check_interval:
+            _check_lag(replica)
+        if replica.lag is not None and replica.lag <= settings.db_replica_max_lag:
+            return replica
+    return None
+
+
+def _pin_backend():
+    """The shared cache backend, when there is one, so every worker sees a session's pin."""
+    if get_settings().cache_backend == "local":
+        return None
+    from src.core.cache import get_cache
+
+    return get_cache().backend
+
+
+def mark_write():
+    """Pins the current routing key's reads to the primary for DB_READ_YOUR_WRITES_WINDOW seconds."""
+    key = routing_key.get()
+    if key is None:
+        return
+    now = time.monotonic()
+    window = get_settings().db_read_your_writes_window
+    previous = _sticky.get(key, 0.0)
+    _sticky[key] = now + window
+    # The next turn may land on another worker; publish the pin there too, at most every half window.
+    backend = _pin_backend()
+    if backend is not None and previous - now < window / 2:
+        try:
+            backend.set(f"db-pin:{key}", b"1", window)
+        except Exception as e:
+            print("Read-your-writes pin error:", e)
+    if len(_sticky) > 10000:
+        for k in [k for k, until in list(_sticky.items()) if until < now]:
+            _sticky.pop(k, None)
+
+
+def pinned_to_primary() -> bool:
+    """True when the current routing key wrote recently, so its read_only connections come from the primary."""
+    key = routing_key.get()
+    if key is None:
+        return False
+    if _sticky.get(key, 0.0) > time.monotonic():
+        return True
+    backend = _pin_backend()
+    if backend is None or not _pools()[1]:  # without replicas every read goes to the primary anyway
+        return False
+    try:
+        return backend.get(f"db-pin:{key}") is not None
+    except Exception as e:
+        # Can't tell: the primary is always safe to read.
+        print("Read-your-writes pin error:", e)
+        return True
+
+
+def get_connection(timeout: Optional[float] = None, read_only: bool = False):
+    """
+    A pooled connection; close() returns it to the pool. Waits up to
+    DB_POOL_TIMEOUT for a free one. read_only=True goes to a healthy replica
+    (lag within DB_REPLICA_MAX_LAG) unless this session wrote recently or
+    no replica qualifies; anything that writes must leave it False.
+    """
+    timeout = get_settings().db_pool_timeout if timeout is None else timeout
+    primary, _ = _pools()
+    if read_only:
+        if pinned_to_primary():
+            stats["sticky_reads"] += 1
+        else:
+            replica = _healthy_replica()
+            if replica is not None:
+                stats["replica_reads"] += 1
+                return replica.get(timeout)
+        stats["primary_reads"] += 1
+    return primary.get(timeout)
+
+
+async def get_connection_async(timeout: Optional[float] = None, read_only: bool = False):
+    """get_connection() for coroutines: the pool wait and any replica lag check run off the event loop."""
+    return await asyncio.to_thread(get_connection, timeout, read_only)
+
+
+def connect():
+    """An unpooled connection for scripts and CLIs; close() really closes it."""
+    settings = get_settings()
+    if settings.db_backend == "sqlite":
+        return sqlite_backend.connect(settings.db_sqlite_path)
+    return mysql.connector.connect(**settings.db_config())
+
+
+@contextmanager
+def transaction():
+    """Pooled connection; commits on success, rolls back on error, always returns it to the pool."""
+    conn = get_connection()
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _raw(conn):
+    # PooledMySQLConnection wraps the real connection; prepared cursors live on the real one.
+    return getattr(conn, "_cnx", conn)
+
+
+def prepared(conn, name: str):
+    """The cached prepared (dictionary) cursor for statement `name` on this connection."""
+    raw = _raw(conn)
+    cached = getattr(raw, "_prepared_cursors", None)
+    # A reconnect (new server thread) forgets every prepared statement; start over.
+    if cached is None or cached[0] != raw.connection_id:
+        cached = raw._prepared_cursors = (raw.connection_id, {})
+    cursors = cached[1]
+    cursor = cursors.get(name)
+    if cursor is None:
+        cursor = cursors[name] = raw.cursor(prepared=True, dictionary=True)
+        stats["prepares"] += 1
+    return cursor
+
+
+def _execute(conn, name: str, params: Sequence):
+    sql = STATEMENTS[name]
+    if get_settings().db_prepared:
+        cursor = prepared(conn, name)
+        stats["prepared_executions"] += 1
+    else:
+        cursor = conn.cursor(dictionary=True)
+        stats["text_executions"] += 1
+    cursor.execute(sql, tuple(params))
+    return cursor
+
+
+def query(conn, name: str, params: Sequence = ()) -> List[dict]:
+    cursor = _execute(conn, name, params)
+    rows = cursor.fetchall()
+    if not get_settings().db_prepared:
+        cursor.close()
+    return [_decode(row) for row in rows]
+
+
+def query_one(conn, name: str, params: Sequence = ()) -> Optional[dict]:
+    rows = query(conn, name, params)
+    return rows[0] if rows else None
+
+
+def run(conn, name: str, params: Sequence = (), pin: bool = False) -> int:
+    """
+    Executes a write; returns lastrowid (or rowcount when there is none).
+    The caller commits. pin=True for writes a tool reads back later in the
+    session (orders, quotes, inventory); everything else leaves the
+    session's reads on replicas.
+    """
+    if pin:
+        mark_write()
+    cursor = _execute(conn, name, params)
+    result = cursor.lastrowid or cursor.rowcount
+    if not get_settings().db_prepared:
+        cursor.close()
+    return result
+
+
+def run_many(conn, name: str, rows: Sequence[Sequence], pin: bool = False) -> int:
+    """Executes a write once per parameter row on the same prepared statement. The caller commits."""
+    if pin:
+        mark_write()
+    total = 0
+    for params in rows:
+        cursor = _execute(conn, name, params)
+        total += cursor.rowcount
+        if not get_settings().db_prepared:
+            cursor.close()
+    return total
+
+
+def _decode(row: dict) -> dict:
+    # The binary protocol hands back TEXT/JSON columns as bytes/bytearray in some connector versions.
+    for key, value in row.items():
+        if isinstance(value, (bytes, bytearray)):
+            row[key] = value.decode("utf-8")
+    return row
+
+
+def snapshot() -> dict:
+    settings = get_settings()
+    replicas = [{"name": r.name, "host": r.host, "lag": r.lag,
+                 "healthy": r.lag is not None and r.lag <= settings.db_replica_max_lag} for r in (_replicas or [])]
+    return {"backend": settings.db_backend, "pool_size": settings.db_pool_size,
+            "c_extension": mysql.connector.HAVE_CEXT and not settings.db_use_pure,
+            "prepared": settings.db_prepared, "statements": len(STATEMENTS), "replicas": replicas,
+            "sticky_sessions": sum(1 for until in list(_sticky.values()) if until > time.monotonic()), **stats}
+
+
+def main():
+    """python -m src.core.db: checks the primary and every replica (lag) with the current settings."""
+    primary, replicas = _pools()
+    conn = primary.get(timeout=5)
+    cursor = conn.cursor()
+    if get_settings().db_backend == "sqlite":
+        cursor.execute("PRAGMA journal_mode")
+        print(f"sqlite: {get_settings().db_sqlite_path} (journal_mode={cursor.fetchone()[0]})")
+    else:
+        cursor.execute("SELECT @@hostname, @@port, @@read_only")
+        print("primary:", cursor.fetchone())
+    cursor.close()
+    conn.close()
+    for replica in replicas:
+        _check_lag(replica)
+        print(f"{replica.name} {replica.host}: lag={replica.lag}s "
+              f"({'healthy' if replica.lag is not None and replica.lag <= get_settings().db_replica_max_lag else 'unhealthy'})")
+
+
+if __name__ == "__main__":
+    main()
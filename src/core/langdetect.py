@@ -0,0 +1,242 @@
+"""
+Language detection for short chat messages (romanized Indian languages,
+Spanish, French, English).
+
+1. Keyword phrases of every language are compiled once into an
+   Aho-Corasick automaton over the normalized text (lowercase words
+   separated by single spaces), with phrases padded by spaces so only
+   whole words match: "hi" no longer fires inside "shipping". One pass
+   finds every phrase of every language. Each hit scores its number of
+   words (longer phrases are more specific), split between languages
+   that share it ("namaskar").
+2. Without a keyword hit, a character trigram profile per language
+   (built from the sample text below) picks the closest language when
+   the similarity is clear enough.
+
+    detect("kem cho, majama?")           -> Detection("gujarati", 1.0, "keyword")
+    detect_batch(["hola amigo", "ok"])
+    begin_turn(message); turn_language() -> detection of this turn's message, computed once
+"""
+import re
+import string
+import unicodedata
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from functools import lru_cache
+from math import sqrt
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+DEFAULT_LANGUAGE = "english"
+
+# Declaration order breaks exact ties.
+KEYWORDS: Dict[str, List[str]] = {
+    "gujarati": ["kem cho", "majama", "namaskar", "ram ram", "saru", "tame", "aavjo"],
+    "hindi": ["namaste", "kaise ho", "kya haal", "namaskar", "aap kaise", "dhanyavad", "shukriya"],
+    "punjabi": ["sat sri akal", "tussi thik ho", "ki haal", "tussi", "ki haal chaal"],
+    "marathi": ["namaskar", "kasa kai", "tumhi kase", "kai chalay", "kasa ahes"],
+    "spanish": ["hola", "buenos dias", "buenas tardes", "buenas noches", "como estas", "gracias"],
+    "french": ["bonjour", "salut", "ca va", "bonsoir", "merci", "comment ca va"],
+    "english": ["hi", "hello", "hey", "good morning", "good evening", "good afternoon", "thanks"],
+}
+
+# Romanized sample text for the trigram profiles.
+SAMPLES: Dict[str, str] = {
+    "gujarati": "kem cho majama tame kem cho hu saru chu tamaru naam shu che aavjo pachi malishu "
+                "mane aa joie che ketla rupiya thase tame kya raho cho saru che bhai",
+    "hindi": "namaste aap kaise ho main theek hoon aapka naam kya hai mujhe yeh chahiye kitne ka hai "
+             "kya haal hai bahut accha dhanyavad shukriya phir milenge mera order kab aayega",
+    "punjabi": "sat sri akal tussi thik ho main thik haan tuhada naam ki hai ki haal chaal menu eh "
+               "chahida hai kinne da hai bahut vadhiya tussi kithe rehnde ho fer milange",
+    "marathi": "namaskar tumhi kase ahat mi thik ahe tumche nav kay ahe kasa kai kai chalay mala he "
+               "pahije kiti la ahe khup chan dhanyavad punha bhetu majha order kadhi yeil",
+    "spanish": "hola como estas buenos dias estoy bien gracias cual es tu nombre quiero comprar este "
+               "producto cuanto cuesta donde esta mi pedido buenas tardes hasta luego muchas gracias",
+    "french": "bonjour comment ca va je vais bien merci quel est votre nom je voudrais acheter ce "
+              "produit combien ca coute ou est ma commande bonsoir salut a bientot merci beaucoup",
+    "english": "hello how are you i am fine thank you what is your name i want to buy this product "
+               "how much does it cost where is my order good morning see you later thanks a lot",
+}
+
+NGRAM = 3
+MIN_NGRAM_SCORE = 0.12  # cosine similarity below this is "don't know"
+MIN_NGRAM_MARGIN = 0.02  # best must beat the runner-up by this much
+
+_PUNCTUATION = str.maketrans({c: " " for c in string.punctuation})
+_SPACES = re.compile(r"\s+")
+
+
+class Detection(NamedTuple):
+    language: str
+    confidence: float
+    method: str  # "keyword", "ngram" or "default"
+
+
+def normalize(text: str) -> str:
+    """Lowercase, accents folded ("ça" -> "ca"), punctuation dropped, single spaces."""
+    folded = unicodedata.normalize("NFKD", (text or "").lower())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return _SPACES.sub(" ", folded.translate(_PUNCTUATION)).strip()
+
+
+# -------------------------------------------------
+# Aho-Corasick
+# -------------------------------------------------
+class AhoCorasick:
+    """Multi-pattern matcher: one pass over the text reports every pattern occurrence."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[str]] = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._link()
+
+    def _add(self, pattern: str):
+        node = 0
+        for ch in pattern:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            node = nxt
+        self.out[node].append(pattern)
+
+    def _link(self):
+        queue = list(self.goto[0].values())
+        for node in queue:  # breadth-first; the list grows while iterating
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(ch, 0)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def find(self, text: str) -> List[str]:
+        found, node = [], 0
+        for ch in text:
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            if self.out[node]:
+                found.extend(self.out[node])
+        return found
+
+
+class _Model:
+    def __init__(self):
+        owners = defaultdict(list)
+        for language, phrases in KEYWORDS.items():
+            for phrase in phrases:
+                owners[f" {normalize(phrase)} "].append(language)
+        self.owners = dict(owners)
+        self.automaton = AhoCorasick(self.owners)
+        self.order = {language: i for i, language in enumerate(KEYWORDS)}
+        self.profiles = {language: _profile(normalize(text)) for language, text in SAMPLES.items()}
+        self.norms = {language: _norm(p) for language, p in self.profiles.items()}
+
+
+@lru_cache(maxsize=1)
+def _model() -> _Model:
+    return _Model()
+
+
+def _profile(text: str) -> Counter:
+    padded = f" {text} "
+    return Counter(padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1))
+
+
+def _norm(profile: Counter) -> float:
+    return sqrt(sum(v * v for v in profile.values())) or 1.0
+
+
+# -------------------------------------------------
+# Detection
+# -------------------------------------------------
+def keyword_scores(text: str) -> Dict[str, float]:
+    model = _model()
+    scores = defaultdict(float)
+    for phrase in model.automaton.find(f" {normalize(text)} "):
+        languages = model.owners[phrase]
+        weight = len(phrase.split()) / len(languages)
+        for language in languages:
+            scores[language] += weight
+    return dict(scores)
+
+
+def ngram_scores(text: str) -> Dict[str, float]:
+    model = _model()
+    profile = _profile(normalize(text))
+    norm = _norm(profile)
+    return {language: sum(count * reference.get(gram, 0) for gram, count in profile.items())
+            / (norm * model.norms[language])
+            for language, reference in model.profiles.items()}
+
+
+def detect(text: str) -> Detection:
+    model = _model()
+    scores = keyword_scores(text)
+    if scores:
+        best = max(scores.values())
+        leaders = [language for language, score in scores.items() if score == best]
+        if len(leaders) > 1:
+            # Shared phrase (e.g. "namaskar"): let the rest of the message decide.
+            similarity = ngram_scores(text)
+            leaders.sort(key=lambda language: (-similarity[language], model.order[language]))
+        return Detection(leaders[0], round(best / sum(scores.values()), 3), "keyword")
+
+    if normalize(text):
+        ranked = sorted(ngram_scores(text).items(), key=lambda item: item[1], reverse=True)
+        (language, score), runner_up = ranked[0], ranked[1][1] if len(ranked) > 1 else 0.0
+        if score >= MIN_NGRAM_SCORE and score - runner_up >= MIN_NGRAM_MARGIN:
+            return Detection(language, round(score, 3), "ngram")
+    return Detection(DEFAULT_LANGUAGE, 0.0, "default")
+
+
+def detect_batch(texts: Iterable[str]) -> List[Detection]:
+    """detect() over many messages; repeated texts are detected once."""
+    seen: Dict[str, Detection] = {}
+    results = []
+    for text in texts:
+        detection = seen.get(text)
+        if detection is None:
+            detection = seen[text] = detect(text)
+        results.append(detection)
+    return results
+
+
+# -------------------------------------------------
+# Per-turn reuse
+# -------------------------------------------------
+class _TurnLanguage:
+    __slots__ = ("message", "detection")
+
+    def __init__(self, message: str):
+        self.message = message
+        self.detection: Optional[Detection] = None
+
+
+_turn: ContextVar[Optional[_TurnLanguage]] = ContextVar("turn_language", default=None)
+
+
+def begin_turn(message: str):
+    """Called once per chat turn; detection itself happens on first use. Returns a token for end_turn()."""
+    return _turn.set(_TurnLanguage(message))
+
+
+def end_turn(token):
+    _turn.reset(token)
+
+
+def turn_language(text: Optional[str] = None) -> Detection:
+    """This turn's detection (computed once); detects `text` directly when it isn't the turn's message."""
+    turn = _turn.get()
+    if turn is None or (text is not None and normalize(text) != normalize(turn.message)):
+        return detect(text or "")
+    if turn.detection is None:
+        turn.detection = detect(turn.message)
+    return turn.detection
@@ -0,0 +1,116 @@
+"""
+Bulk lead qualification: streams a CSV or JSONL lead list, scores it in
+batches with the same rules as the `lead_qualification` tool
+(src/Tools/lead.py) and writes the results to Leads with one multi-row
+INSERT per batch.
+
+    python -m src.core.lead_pipeline leads.csv
+    python -m src.core.lead_pipeline leads.jsonl --batch-size 2000 --output scored.jsonl
+    python -m src.core.lead_pipeline leads.csv --dry-run      # score only, no database
+
+Input rows need customer_id, budget_range, project_type and urgency
+(low | medium | high). Rows that fail validation are skipped and counted.
+"""
+import argparse
+import json
+import time
+from typing import List, Optional
+
+from pydantic import TypeAdapter, ValidationError
+
+from src.core import db
+from src.core.bulk_io import batched, read_rows
+from src.Tools.lead import LeadInput, score_leads
+
+INSERT_LEADS = """
+    INSERT INTO Leads (customer_id, budget_range, project_type, urgency, qualified)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+_batch_adapter = TypeAdapter(List[LeadInput])
+
+
+def validate(batch: List[dict]):
+    """Returns (leads, rejected count). Validates the batch in one call and falls back per row on errors."""
+    try:
+        return _batch_adapter.validate_python(batch), 0
+    except ValidationError:
+        leads, rejected = [], 0
+        for row in batch:
+            try:
+                leads.append(LeadInput.model_validate(row))
+            except ValidationError:
+                rejected += 1
+        return leads, rejected
+
+
+def run(path: str, batch_size: int = 1000, output: Optional[str] = None, dry_run: bool = False) -> dict:
+    stats = {"read": 0, "scored": 0, "rejected": 0, "inserted": 0, "hot": 0, "warm": 0, "cold": 0}
+    timings = {"validate": 0.0, "score": 0.0, "insert": 0.0}
+    conn = None if dry_run else db.connect()
+    cursor = conn.cursor() if conn else None
+    out = open(output, "w", encoding="utf-8") if output else None
+    started = time.perf_counter()
+    try:
+        for batch in batched(read_rows(path), batch_size):
+            stats["read"] += len(batch)
+
+            t = time.perf_counter()
+            leads, rejected = validate(batch)
+            timings["validate"] += time.perf_counter() - t
+            stats["rejected"] += rejected
+            if not leads:
+                continue
+
+            t = time.perf_counter()
+            scores = score_leads([l.budget_range for l in leads], [l.urgency for l in leads])
+            timings["score"] += time.perf_counter() - t
+            stats["scored"] += len(leads)
+            for lead_score, _ in scores:
+                stats[lead_score] += 1
+
+            if cursor is not None:
+                t = time.perf_counter()
+                # executemany on a plain INSERT is sent as a single multi-row INSERT
+                cursor.executemany(INSERT_LEADS, [
+                    (l.customer_id, l.budget_range, l.project_type, l.urgency, qualified)
+                    for l, (_, qualified) in zip(leads, scores)
+                ])
+                conn.commit()
+                timings["insert"] += time.perf_counter() - t
+                stats["inserted"] += len(leads)
+
+            if out is not None:
+                for lead, (lead_score, qualified) in zip(leads, scores):
+                    out.write(json.dumps({**lead.model_dump(), "lead_score": lead_score,
+                                          "qualified": qualified}) + "\n")
+    finally:
+        if out is not None:
+            out.close()
+        if conn is not None:
+            cursor.close()
+            conn.close()
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 3)
+    stats["leads_per_second"] = round(stats["read"] / elapsed) if elapsed else None
+    stats["timings"] = {k: round(v, 3) for k, v in timings.items()}
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk lead qualification.")
+    parser.add_argument("path", help="CSV or JSONL lead list ('-' for JSONL on stdin)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--output", help="also write scored leads as JSONL")
+    parser.add_argument("--dry-run", action="store_true", help="score without writing to the database")
+    args = parser.parse_args()
+
+    stats = run(args.path, args.batch_size, args.output, args.dry_run)
+    print(f"Read {stats['read']} leads in {stats['seconds']}s ({stats['leads_per_second']}/s): "
+          f"{stats['hot']} hot, {stats['warm']} warm, {stats['cold']} cold, "
+          f"{stats['rejected']} rejected, {stats['inserted']} inserted")
+    print("Time by stage (s):", stats["timings"])
+
+
+if __name__ == "__main__":
+    main()
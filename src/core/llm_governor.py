@@ -0,0 +1,280 @@
+import asyncio
+import heapq
+import itertools
+import random
+import re
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from agents.models.interface import Model
+from agents.models.multi_provider import MultiProvider
+
+from src.core.settings import get_settings
+
+# --- Priorities (lower is served first) ---
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BATCH = 2  # /chat/batch replays: served after every interactive turn
+
+# Set per /chat turn; every model call made during that turn inherits it.
+turn_priority: ContextVar[int] = ContextVar("turn_priority", default=PRIORITY_NORMAL)
+
+HIGH_PRIORITY_RE = re.compile(
+    r"\b(urgent|asap|immediately|right now|place (the |my )?order|proceed|payment|pay now|checkout)\b",
+    re.IGNORECASE,
+)
+HIGH_PRIORITY_TOOLS = {"order_placement", "generate_quote"}
+RETRY_DELAY_RE = re.compile(r"retry(?:Delay)?\D{0,10}(\d+(?:\.\d+)?)\s*s", re.IGNORECASE)
+
+
+def classify_priority(message: str) -> int:
+    """Cheap keyword check so order/urgent turns jump the queue."""
+    return PRIORITY_HIGH if HIGH_PRIORITY_RE.search(message or "") else PRIORITY_NORMAL
+
+
+class ModelBusyError(Exception):
+    """Raised when the model stays rate limited after all retries and no fallback is configured."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Model is rate limited, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    if type(exc).__name__ == "RateLimitError":
+        return True
+    return getattr(exc, "status_code", None) == 429
+
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """Reads Retry-After from the provider response, or Gemini's retryDelay from the message."""
+    for headers in (getattr(getattr(exc, "response", None), "headers", None),
+                    getattr(exc, "litellm_response_headers", None)):
+        if headers:
+            value = headers.get("retry-after") or headers.get("Retry-After")
+            if value:
+                try:
+                    return float(value)
+                except ValueError:
+                    pass
+    match = RETRY_DELAY_RE.search(str(exc))
+    return float(match.group(1)) if match else None
+
+
+# -------------------------------------------------
+# Adaptive concurrency limit (AIMD)
+# -------------------------------------------------
+class AdaptiveLimiter:
+    """
+    Concurrency limit that grows by ~1 per round trip while calls succeed
+    within the latency target and halves on a 429 (at most once per cooldown).
+    Waiters are served by priority, then arrival order.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, target_latency: float,
+                 decrease_cooldown: float = 2.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.decrease_cooldown = decrease_cooldown
+        self.in_flight = 0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._last_decrease = 0.0
+        self.stats = {"acquired": 0, "queued": 0, "rate_limited": 0, "timeouts": 0}
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    async def acquire(self, priority: int, timeout: float):
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+            self.stats["acquired"] += 1
+            return
+
+        self.stats["queued"] += 1
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._seq), future]
+        heapq.heappush(self._waiters, entry)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # Timed out, or the turn itself was cancelled (client gone, batch item timeout) while queued.
+            if future.done() and not future.cancelled():
+                # Slot was handed over just as we gave up; pass it on.
+                self.release()
+            else:
+                future.cancel()
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.stats["timeouts"] += 1
+            raise ModelBusyError(retry_after=timeout)
+        self.stats["acquired"] += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self._has_capacity():
+            _, _, future = heapq.heappop(self._waiters)
+            if future.cancelled():
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+
+    def on_success(self, latency: float):
+        if latency > self.target_latency:
+            self.limit = max(self.minimum, self.limit * 0.9)
+        else:
+            self.limit = min(self.maximum, self.limit + 1.0 / max(self.limit, 1.0))
+        self._wake()
+
+    def on_rate_limited(self):
+        self.stats["rate_limited"] += 1
+        now = time.monotonic()
+        if now - self._last_decrease >= self.decrease_cooldown:
+            self.limit = max(self.minimum, self.limit / 2)
+            self._last_decrease = now
+
+    def snapshot(self) -> dict:
+        return {"limit": round(self.limit, 2), "in_flight": self.in_flight,
+                "waiting": len(self._waiters), **self.stats}
+
+
+# -------------------------------------------------
+# Governed model
+# -------------------------------------------------
+def _turn_priority_for(input) -> int:
+    priority = turn_priority.get()
+    if priority == PRIORITY_BATCH:
+        return priority
+    if isinstance(input, list):
+        for item in input:
+            name = item.get("name") if isinstance(item, dict) else getattr(item, "name", None)
+            if name in HIGH_PRIORITY_TOOLS:
+                return PRIORITY_HIGH
+    return priority
+
+
+class LazyModel(Model):
+    """Resolves a model name on first use, so provider SDKs (litellm) aren't imported at startup."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._model = None
+
+    def resolve(self) -> Model:
+        if self._model is None:
+            self._model = MultiProvider().get_model(self.model_name)
+        return self._model
+
+    async def get_response(self, *args, **kwargs):
+        return await self.resolve().get_response(*args, **kwargs)
+
+    def stream_response(self, *args, **kwargs):
+        return self.resolve().stream_response(*args, **kwargs)
+
+
+class GovernedModel(Model):
+    """
+    Wraps the primary model with an adaptive concurrency limit, retries with
+    jittered exponential backoff on 429s (honoring Retry-After), and an
+    optional fallback model used once the primary's retries are exhausted.
+    The fallback goes through the same limiter and retries; when it stays
+    rate limited too, the caller gets ModelBusyError (a 429 for /chat).
+    """
+
+    def __init__(self, primary: Model, fallback: Optional[Model] = None, limiter: AdaptiveLimiter = None,
+                 max_retries: int = 4, base_delay: float = 0.5, max_delay: float = 20.0,
+                 queue_timeout: float = 60.0):
+        self.primary = primary
+        self.fallback = fallback
+        self.limiter = limiter or limiter_from_env()
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.queue_timeout = queue_timeout
+        self.stats = {"calls": 0, "retries": 0, "fallbacks": 0, "busy": 0}
+
+    @classmethod
+    def from_names(cls, model_name: str, fallback_name: Optional[str] = None) -> "GovernedModel":
+        settings = get_settings()
+        return cls(
+            LazyModel(model_name),
+            fallback=LazyModel(fallback_name) if fallback_name else None,
+            max_retries=settings.llm_max_retries,
+            queue_timeout=settings.llm_queue_timeout,
+        )
+
+    def with_primary(self, primary: Model) -> "GovernedModel":
+        return GovernedModel(primary, fallback=self.fallback, max_retries=self.max_retries,
+                             base_delay=self.base_delay, max_delay=self.max_delay,
+                             queue_timeout=self.queue_timeout)
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after:
+            delay = max(delay, retry_after + random.uniform(0, self.base_delay))
+        return delay
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema,
+                           handoffs, tracing, *, previous_response_id=None, prompt=None):
+        self.stats["calls"] += 1
+        priority = _turn_priority_for(input)
+        args = (system_instructions, input, model_settings, tools, output_schema, handoffs, tracing)
+        kwargs = {"previous_response_id": previous_response_id, "prompt": prompt}
+
+        response, retry_after = await self._with_retries(self.primary, priority, args, kwargs)
+        if response is None and self.fallback is not None:
+            self.stats["fallbacks"] += 1
+            response, retry_after = await self._with_retries(self.fallback, priority, args, kwargs)
+        if response is not None:
+            return response
+
+        self.stats["busy"] += 1
+        raise ModelBusyError(retry_after or self.max_delay)
+
+    async def _with_retries(self, model: Model, priority: int, args: tuple, kwargs: dict):
+        """(response, None), or (None, last Retry-After) once `model` stayed rate limited through every retry."""
+        retry_after = None
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(priority, self.queue_timeout)
+            started = time.monotonic()
+            try:
+                response = await model.get_response(*args, **kwargs)
+                self.limiter.on_success(time.monotonic() - started)
+                return response, None
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                self.limiter.on_rate_limited()
+                retry_after = retry_after_seconds(e)
+            finally:
+                self.limiter.release()
+
+            if attempt < self.max_retries:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+        return None, retry_after
+
+    def stream_response(self, *args, **kwargs):
+        # Streaming isn't used by /chat; pass straight through.
+        return self.primary.stream_response(*args, **kwargs)
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "fallback": self.fallback is not None, "limiter": self.limiter.snapshot()}
+
+
+def limiter_from_env() -> AdaptiveLimiter:
+    settings = get_settings()
+    return AdaptiveLimiter(
+        initial=settings.llm_initial_concurrency,
+        minimum=settings.llm_min_concurrency,
+        maximum=settings.llm_max_concurrency,
+        target_latency=settings.llm_target_latency,
+    )
@@ -0,0 +1,145 @@
+"""
+Normalizes chat turns before they are stored in (or read from) chatlogs.
+
+Agent output arrives as plain text, markdown, or JSON-ish wrappers such as
+```json {"text": "..."} ```. clean_text() unwraps those and strips markdown
+in one regex pass with precompiled patterns.
+
+    python -m src.core.normalize --backfill     # normalize raw rows in bulk
+"""
+import argparse
+import ast
+import json
+import re
+import time
+
+# One alternation instead of five re.sub passes; group order matches the old pass order.
+MARKDOWN_RE = re.compile(r"\*\*(.*?)\*\*|\*(.*?)\*|`(.*?)`|\[(.*?)\]\(.*?\)|#+ ")
+MARKDOWN_CHARS = frozenset("*`[#")
+FENCE_RE = re.compile(r"```(?:json)?")
+# Only these openings can hold a {"text": ...} payload or a wrapped string worth parsing.
+PARSE_START = frozenset("{[\"'")
+
+
+def _strip_markdown_match(match: re.Match) -> str:
+    inner = next((g for g in match.groups() if g is not None), "")
+    return strip_markdown(inner) if inner else ""
+
+
+def strip_markdown(text: str) -> str:
+    if MARKDOWN_CHARS.isdisjoint(text):
+        return text
+    return MARKDOWN_RE.sub(_strip_markdown_match, text)
+
+
+def _unwrap(parsed) -> str:
+    if isinstance(parsed, dict) and "text" in parsed:
+        return parsed["text"]
+    if isinstance(parsed, list):
+        return " ".join(clean_text(d) for d in parsed)
+    return str(parsed)
+
+
+def _parse_wrapped(cleaned: str):
+    """Returns the unwrapped payload, or `cleaned` unchanged if it isn't JSON/Python literal."""
+    if not cleaned or cleaned[0] not in PARSE_START:
+        return cleaned
+    try:
+        return _unwrap(json.loads(cleaned))
+    except ValueError:
+        pass
+    try:
+        return _unwrap(json.loads(cleaned.replace("'", '"')))
+    except ValueError:
+        pass
+    try:
+        return _unwrap(ast.literal_eval(cleaned))
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return cleaned
+
+
+def clean_text(data) -> str:
+    """Plain text for a message content value (str, {"text": ...} dict, or list of parts)."""
+    if isinstance(data, dict):
+        return clean_text(data.get("text", ""))
+    if isinstance(data, list):
+        return " ".join(clean_text(d) for d in data)
+    if isinstance(data, str):
+        cleaned = data.strip()
+        if "```" in cleaned:
+            cleaned = FENCE_RE.sub("", cleaned).strip()
+        data = _parse_wrapped(cleaned)
+        if not isinstance(data, str):
+            return clean_text(data)
+
+    return strip_markdown(str(data).strip()).strip()
+
+
+def raw_text(data) -> str:
+    """What lazy mode stores: strings as-is, structured content as JSON so clean_text can unwrap it later."""
+    if isinstance(data, str):
+        return data
+    try:
+        return json.dumps(data, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return str(data)
+
+
+# -------------------------------------------------
+# Bulk normalization
+# -------------------------------------------------
+def backfill(batch_size: int = 1000, limit: int = None) -> int:
+    """
+    Normalizes chatlogs rows written in lazy mode, walking message_id in
+    batches and updating only rows whose text changes. Returns rows updated.
+    """
+    from src.core import db
+
+    conn = db.connect()
+    cursor = conn.cursor()
+    last_id, scanned, updated = 0, 0, 0
+    started = time.perf_counter()
+    try:
+        while limit is None or scanned < limit:
+            cursor.execute(
+                "SELECT message_id, user_message, bot_reply FROM chatlogs "
+                "WHERE message_id > %s ORDER BY message_id LIMIT %s",
+                (last_id, batch_size),
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            changes = []
+            for message_id, user_message, bot_reply in rows:
+                clean_user = clean_text(user_message or "")
+                clean_bot = clean_text(bot_reply or "")
+                if clean_user != (user_message or "") or clean_bot != (bot_reply or ""):
+                    changes.append((clean_user, clean_bot, message_id))
+            if changes:
+                cursor.executemany("UPDATE chatlogs SET user_message = %s, bot_reply = %s WHERE message_id = %s",
+                                   changes)
+                conn.commit()
+            scanned += len(rows)
+            updated += len(changes)
+            last_id = rows[-1][0]
+    finally:
+        cursor.close()
+        conn.close()
+    print(f"Scanned {scanned} rows, normalized {updated} in {time.perf_counter() - started:.1f}s")
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chatlog text normalization.")
+    parser.add_argument("--backfill", action="store_true", help="normalize stored raw rows")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--limit", type=int, help="stop after scanning this many rows")
+    args = parser.parse_args()
+    if args.backfill:
+        backfill(args.batch_size, args.limit)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
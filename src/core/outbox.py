@@ -0,0 +1,287 @@
+"""
+Transactional outbox for downstream systems (ERP, fulfillment, CRM).
+
+generate_quote, order_placement and create_support_ticket call record()
+on the connection of their own write, before their commit, so an event
+exists if and only if the quote / order / ticket does. Nothing leaves the
+process inside the chat transaction.
+
+A background publisher (OUTBOX_POLL_INTERVAL > 0, one per worker) drains
+the table in batches of OUTBOX_BATCH_SIZE:
+
+1. claim: pending rows not leased by anyone are leased to this batch for
+   OUTBOX_LEASE_SECONDS, so several workers share the work instead of all
+   sending the same rows
+2. send the batch to every sink in OUTBOX_SINKS:
+       file     appends JSON lines to OUTBOX_FILE_PATH (local queue stand-in)
+       webhook  POSTs {"events": [...]} to OUTBOX_WEBHOOK_URL
+3. mark the rows published; on failure the lease is extended with an
+   exponential backoff and the batch is retried later
+
+Delivery is at least once: a crash between send and mark, an expired
+lease or one failing sink out of two means an event can arrive twice, so
+consumers dedupe on event_id. Published rows are deleted after
+OUTBOX_RETENTION_HOURS.
+
+    python -m src.core.outbox status
+    python -m src.core.outbox drain
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+from uuid import uuid4
+
+from src.core import db
+from src.core.settings import get_settings
+
+CLEANUP_EVERY = 100  # drain cycles between deletes of old published rows
+CLEANUP_BATCH = 5000
+
+db.register("outbox_insert", "INSERT INTO outbox (event_type, aggregate_id, payload, created_at) "
+                             "VALUES (%s, %s, CAST(%s AS JSON), %s)")
+
+
+def record(conn, event_type: str, aggregate_id, payload: dict):
+    """Adds an event to the caller's transaction; the caller commits."""
+    db.run(conn, "outbox_insert",
+           (event_type, str(aggregate_id), json.dumps(payload, ensure_ascii=False, default=str), datetime.now()))
+
+
+# -------------------------------------------------
+# Sinks
+# -------------------------------------------------
+class Sink:
+    name = "base"
+
+    def send(self, events: List[dict]):
+        """Delivers the whole batch or raises."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class FileSink(Sink):
+    """One JSON line per event, fsynced per batch; stands in for a local queue."""
+
+    name = "file"
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+
+    def send(self, events):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(e, ensure_ascii=False, default=str) + "\n" for e in events))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class WebhookSink(Sink):
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float):
+        import httpx
+
+        self.url = url
+        self._client = httpx.Client(timeout=timeout)
+
+    def send(self, events):
+        response = self._client.post(self.url, content=json.dumps({"events": events}, default=str),
+                                     headers={"content-type": "application/json",
+                                              "x-outbox-batch": str(events[0]["event_id"])})
+        response.raise_for_status()
+
+    def close(self):
+        self._client.close()
+
+
+def build_sinks(names: List[str]) -> List[Sink]:
+    settings = get_settings()
+    sinks = []
+    for name in names:
+        if name == "file":
+            sinks.append(FileSink(settings.outbox_file_path))
+        elif name == "webhook":
+            if not settings.outbox_webhook_url:
+                raise ValueError("OUTBOX_SINKS includes webhook but OUTBOX_WEBHOOK_URL is not set")
+            sinks.append(WebhookSink(settings.outbox_webhook_url, settings.outbox_webhook_timeout))
+        else:
+            raise ValueError(f"unknown outbox sink {name!r}")
+    return sinks
+
+
+# -------------------------------------------------
+# Publisher
+# -------------------------------------------------
+def _in(ids: List[int]) -> str:
+    return ", ".join(["%s"] * len(ids))
+
+
+class Publisher:
+    def __init__(self, sinks: List[Sink], batch_size: int, lease_seconds: float, max_backoff: float,
+                 retention_hours: float):
+        self.sinks = sinks
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_backoff = max_backoff
+        self.retention_hours = retention_hours
+        self.worker = f"{socket.gethostname()}:{os.getpid()}"
+        self._cycles = 0
+        self.stats = {"published": 0, "batches": 0, "failed_batches": 0, "pending": 0,
+                      "oldest_pending_seconds": 0.0, "publish_lag_seconds_last": 0.0,
+                      "publish_lag_seconds_max": 0.0, "send_seconds_last": 0.0, "last_error": None}
+
+    def _claim(self, conn, cursor) -> List[dict]:
+        now = datetime.now()
+        cursor.execute("SELECT event_id FROM outbox WHERE published_at IS NULL "
+                       "AND (claimed_until IS NULL OR claimed_until < %s) ORDER BY event_id LIMIT %s",
+                       (now, self.batch_size))
+        ids = [row["event_id"] for row in cursor.fetchall()]
+        if not ids:
+            conn.commit()
+            return []
+        # Another worker may claim some of the same rows between the SELECT and here; only one UPDATE wins each.
+        claim = f"{self.worker}:{uuid4().hex[:8]}"
+        cursor.execute(f"UPDATE outbox SET claimed_by = %s, claimed_until = %s WHERE event_id IN ({_in(ids)}) "
+                       f"AND published_at IS NULL AND (claimed_until IS NULL OR claimed_until < %s)",
+                       (claim, now + timedelta(seconds=self.lease_seconds), *ids, now))
+        conn.commit()
+        cursor.execute(f"SELECT event_id, event_type, aggregate_id, payload, created_at, attempts FROM outbox "
+                       f"WHERE event_id IN ({_in(ids)}) AND claimed_by = %s ORDER BY event_id", (*ids, claim))
+        rows = cursor.fetchall()
+        conn.commit()
+        return rows
+
+    def publish_batch(self) -> int:
+        """Claims, sends and marks one batch; returns the number of events published (0 when idle)."""
+        conn = db.get_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            rows = self._claim(conn, cursor)
+            if not rows:
+                return 0
+            events = [{"event_id": r["event_id"], "type": r["event_type"], "aggregate_id": r["aggregate_id"],
+                       "created_at": r["created_at"], "payload": _json(r["payload"])} for r in rows]
+            ids = [r["event_id"] for r in rows]
+            started = time.monotonic()
+            try:
+                for sink in self.sinks:
+                    sink.send(events)
+            except Exception as e:
+                attempts = min(r["attempts"] for r in rows) + 1
+                retry_at = datetime.now() + timedelta(seconds=min(self.max_backoff, 2 ** attempts))
+                cursor.execute(f"UPDATE outbox SET attempts = attempts + 1, last_error = %s, claimed_until = %s "
+                               f"WHERE event_id IN ({_in(ids)})", (f"{type(e).__name__}: {e}"[:500], retry_at, *ids))
+                conn.commit()
+                self.stats["failed_batches"] += 1
+                self.stats["last_error"] = f"{type(e).__name__}: {e}"
+                raise
+            self.stats["send_seconds_last"] = round(time.monotonic() - started, 4)
+
+            now = datetime.now()
+            cursor.execute(f"UPDATE outbox SET published_at = %s, attempts = attempts + 1, last_error = NULL "
+                           f"WHERE event_id IN ({_in(ids)})", (now, *ids))
+            conn.commit()
+            lag = max((now - r["created_at"]).total_seconds() for r in rows)
+            self.stats["published"] += len(rows)
+            self.stats["batches"] += 1
+            self.stats["publish_lag_seconds_last"] = round(lag, 3)
+            self.stats["publish_lag_seconds_max"] = round(max(self.stats["publish_lag_seconds_max"], lag), 3)
+            return len(rows)
+        finally:
+            cursor.close()
+            conn.close()
+
+    def drain(self, max_batches: Optional[int] = None) -> int:
+        """Publishes until the outbox is empty (or max_batches), then refreshes the backlog metrics."""
+        published, batches = 0, 0
+        while max_batches is None or batches < max_batches:
+            n = self.publish_batch()
+            published += n
+            batches += 1
+            if n < self.batch_size:
+                break
+        self._cycles += 1
+        self._housekeeping(cleanup=self._cycles % CLEANUP_EVERY == 1)
+        return published
+
+    def _housekeeping(self, cleanup: bool):
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT COUNT(*) FROM outbox WHERE published_at IS NULL")
+            pending = cursor.fetchone()[0]
+            cursor.execute("SELECT created_at FROM outbox WHERE published_at IS NULL ORDER BY event_id LIMIT 1")
+            row = cursor.fetchone()
+            oldest = row[0] if row else None
+            self.stats["pending"] = pending
+            self.stats["oldest_pending_seconds"] = round((datetime.now() - oldest).total_seconds(), 3) if oldest else 0.0
+            if cleanup and self.retention_hours > 0:
+                cursor.execute("DELETE FROM outbox WHERE published_at < %s ORDER BY event_id LIMIT %s",
+                               (datetime.now() - timedelta(hours=self.retention_hours), CLEANUP_BATCH))
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def snapshot(self) -> dict:
+        return {"sinks": [s.name for s in self.sinks], "worker": self.worker, **self.stats}
+
+
+def _json(value):
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode("utf-8")
+    return json.loads(value) if isinstance(value, str) else value
+
+
+_publisher: Optional[Publisher] = None
+
+
+def get_publisher() -> Publisher:
+    global _publisher
+    if _publisher is None:
+        settings = get_settings()
+        _publisher = Publisher(build_sinks(settings.outbox_sinks), settings.outbox_batch_size,
+                               settings.outbox_lease_seconds, settings.outbox_max_backoff,
+                               settings.outbox_retention_hours)
+    return _publisher
+
+
+async def publish_periodically(interval: float):
+    """Background loop for the app (OUTBOX_POLL_INTERVAL > 0)."""
+    publisher, failing = get_publisher(), False
+    while True:
+        try:
+            await asyncio.to_thread(publisher.drain)
+            failing = False
+        except Exception as e:
+            if not failing:  # once per outage, not every interval
+                print("Outbox publish error:", e)
+            failing = True
+        await asyncio.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transactional outbox.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="pending events and publish lag")
+    d = sub.add_parser("drain", help="publish every pending event now")
+    d.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+
+    publisher = get_publisher()
+    if args.command == "drain":
+        print(f"published {publisher.drain(args.max_batches)} events")
+    else:
+        publisher._housekeeping(cleanup=False)
+    print(json.dumps(publisher.snapshot(), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+On-demand sampling profiler for single /chat turns in production.
+
+Off unless PROFILE_TOKEN is set. A turn is profiled when it carries
+`X-Profile: <token>`, or when POST /admin/profile (X-Profile-Token header)
+has armed the next turn (optionally of one session_id). Costs nothing
+otherwise: one header lookup per turn.
+
+While the turn runs, a daemon thread samples every thread's stack with
+sys._current_frames() every PROFILE_INTERVAL_MS, so time spent in executor
+threads (to_thread tools, ReportLab) shows up next to the event loop.
+Threads parked in a selector, lock or queue wait are skipped. The sampler
+stops itself after PROFILE_MAX_SECONDS, and only one profile runs at a time
+(others are declined, the turn runs normally). Because it samples the
+whole process, turns running concurrently on the same worker show up too.
+
+Output in PROFILE_DIR, named <time>-<session>:
+    .folded  collapsed stacks ("thread;outer;...;inner count"), for
+             flamegraph.pl, speedscope or inferno
+    .txt     top-N functions by self and by cumulative samples
+The /chat response carries X-Profile-Id; GET /admin/profiles lists recent
+profiles and GET /admin/profiles/{id} returns the .folded file.
+"""
+import hmac
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from src.core.settings import get_settings
+
+HEADER = "x-profile"
+TOKEN_HEADER = "x-profile-token"
+TOP_N = 25
+ARM_SECONDS = 600  # an armed profile not picked up by a turn within this is dropped
+MIN_INTERVAL_MS = 1.0
+
+# Leaf frames of threads that are waiting, not working.
+IDLE_LEAVES = {
+    ("selectors.py", "select"), ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"),
+    ("thread.py", "_worker"), ("queue.py", "get"), ("socket.py", "accept"), ("connection.py", "wait"),
+}
+
+_running = threading.Lock()  # one profile at a time
+_armed: Optional[Tuple[Optional[str], float]] = None  # (session_id or None for any, armed at)
+_labels: Dict[object, str] = {}
+recent: deque = deque(maxlen=20)
+
+
+def enabled() -> bool:
+    return bool(get_settings().profile_token)
+
+
+def authorized(token: Optional[str]) -> bool:
+    expected = get_settings().profile_token
+    return bool(expected) and token is not None and hmac.compare_digest(token.encode(), expected.encode())
+
+
+def arm(session_id: Optional[str] = None):
+    """Profiles the next /chat turn (of session_id, or of any session)."""
+    global _armed
+    _armed = (session_id, time.monotonic())
+
+
+def requested(header: Optional[str], session_id: str) -> Optional["Profile"]:
+    """A Profile for this turn when the header carries the token or a profile is armed for it; else None."""
+    global _armed
+    if header is not None:
+        return Profile(session_id) if authorized(header) else None
+    if _armed is None:
+        return None
+    armed_for, armed_at = _armed
+    if time.monotonic() - armed_at > ARM_SECONDS:
+        _armed = None
+        return None
+    if armed_for is not None and armed_for != session_id:
+        return None
+    _armed = None
+    return Profile(session_id)
+
+
+# -------------------------------------------------
+# Sampling
+# -------------------------------------------------
+def _label(code) -> str:
+    label = _labels.get(code)
+    if label is None:
+        parts = code.co_filename.replace("\\", "/").split("/")
+        label = f"{code.co_qualname} ({'/'.join(parts[-2:])}:{code.co_firstlineno})".replace(";", ",")
+        if len(_labels) < 50000:
+            _labels[code] = label
+    return label
+
+
+def _idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_LEAVES
+
+
+def _stack(frame) -> Tuple[str, ...]:
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return tuple(labels)
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, interval: float, max_seconds: float):
+        super().__init__(name="profiler", daemon=True)
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        me = threading.get_ident()
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop_event.wait(self.interval) and time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me or _idle(frame):
+                    continue
+                self.stacks[(names.get(ident, str(ident)),) + _stack(frame)] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+# -------------------------------------------------
+# Profile
+# -------------------------------------------------
+def _top(stacks: Counter, n: int) -> Tuple[List[Tuple[str, int]], List[Tuple[str, int]]]:
+    own, cumulative = Counter(), Counter()
+    for stack, count in stacks.items():
+        own[stack[-1]] += count
+        for label in set(stack[1:]):
+            cumulative[label] += count
+    return own.most_common(n), cumulative.most_common(n)
+
+
+class Profile:
+    def __init__(self, label: str):
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", label)[:40]
+        self.name = f"{time.strftime('%Y%m%d-%H%M%S')}-{safe}"
+        self.saved = False
+        self.summary: Optional[dict] = None
+        self._sampler: Optional[_Sampler] = None
+        self._started = 0.0
+
+    def start(self) -> bool:
+        """Starts sampling; False when another profile is already running."""
+        if not _running.acquire(blocking=False):
+            return False
+        settings = get_settings()
+        self._sampler = _Sampler(max(settings.profile_interval_ms, MIN_INTERVAL_MS) / 1000,
+                                 settings.profile_max_seconds)
+        self._started = time.perf_counter()
+        self._sampler.start()
+        return True
+
+    def stop(self):
+        try:
+            self._sampler.stop()
+            self._save(time.perf_counter() - self._started)
+        except Exception as e:
+            print("Profile save error:", e)
+        finally:
+            _running.release()
+
+    def _save(self, duration: float):
+        settings = get_settings()
+        sampler = self._sampler
+        os.makedirs(settings.profile_dir, exist_ok=True)
+        base = os.path.join(settings.profile_dir, self.name)
+        with open(base + ".folded", "w", encoding="utf-8") as f:
+            for stack, count in sorted(sampler.stacks.items(), key=lambda item: -item[1]):
+                f.write(f"{';'.join(stack)} {count}\n")
+
+        own, cumulative = _top(sampler.stacks, TOP_N)
+        busy = sum(sampler.stacks.values())
+        total = busy or 1
+        lines = [f"profile {self.name}: {sampler.samples} samples over {duration:.2f}s "
+                 f"every {sampler.interval * 1000:g}ms, {busy} busy thread samples",
+                 "", "top self:"]
+        lines += [f"  {count / total:6.1%} {count:6d}  {label}" for label, count in own]
+        lines += ["", "top cumulative:"]
+        lines += [f"  {count / total:6.1%} {count:6d}  {label}" for label, count in cumulative]
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+        self.summary = {"id": self.name, "duration_s": round(duration, 3), "samples": sampler.samples,
+                        "top_self": [{"function": label, "samples": count} for label, count in own[:10]]}
+        recent.append(self.summary)
+        self.saved = True
+
+
+@contextmanager
+def sampling(profile: Optional[Profile]):
+    """Samples the enclosed block when a profile was requested; a no-op for None."""
+    if profile is None:
+        yield
+        return
+    started = profile.start()
+    try:
+        yield
+    finally:
+        if started:
+            profile.stop()
+
+
+def folded_path(profile_id: str) -> Optional[str]:
+    if not re.fullmatch(r"[A-Za-z0-9_.-]+", profile_id):
+        return None
+    path = os.path.join(get_settings().profile_dir, profile_id + ".folded")
+    return path if os.path.exists(path) else None
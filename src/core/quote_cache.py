@@ -0,0 +1,59 @@
+"""
+Quote reuse: asking for the same quote again within QUOTE_REUSE_TTL returns
+the quote (and PDF) already generated instead of a new quote_id, quotes row
+and PDF each time.
+
+Entries are keyed by (customer_id, product_id, quantity, pricing version).
+The pricing version is a hash of everything the price is computed from:
+the product's base price, the customer's discount (user type, verified)
+and the tax / shipping constants. A price import or a change of customer
+type therefore gives a new key and a fresh quote, with no explicit
+invalidation. Inventory is re-checked by generate_quote before a reuse, and
+placing an order from a quote drops it (forget()), so a quote that was
+already ordered is never handed out again.
+"""
+import hashlib
+import json
+import os
+from typing import Optional
+
+from src.core.cache import get_cache
+from src.core.settings import get_settings
+
+NAMESPACE = "quotes"
+
+
+def pricing_version(*inputs) -> str:
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def quote_key(customer_id: int, product_id: int, quantity: int, pricing: str) -> str:
+    return f"{customer_id}:{product_id}:{quantity}:{pricing}"
+
+
+def lookup(key: str) -> Optional[dict]:
+    """The remembered {"quote": ..., "pdf_path": ...}, or None when expired, unknown or its PDF is gone."""
+    if get_settings().quote_reuse_ttl <= 0:
+        return None
+    entry = get_cache().get(NAMESPACE, key)
+    if entry is None or not os.path.exists(entry["pdf_path"]):
+        return None
+    return entry
+
+
+def remember(key: str, quote: dict, pdf_path: str):
+    ttl = get_settings().quote_reuse_ttl
+    if ttl <= 0:
+        return
+    cache = get_cache()
+    cache.set(NAMESPACE, key, {"quote": quote, "pdf_path": pdf_path}, ttl)
+    cache.set(NAMESPACE, f"id:{quote['quote_id']}", key, ttl)
+
+
+def forget(quote_id: str):
+    """Drops a quote from reuse (it has been ordered)."""
+    cache = get_cache()
+    key = cache.get(NAMESPACE, f"id:{quote_id}")
+    if key is not None:
+        cache.delete(NAMESPACE, key)
+        cache.delete(NAMESPACE, f"id:{quote_id}")
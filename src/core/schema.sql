@@ -0,0 +1,194 @@
+-- MySQL schema used by the tools and MyCustomSession.
+-- Column names/types mirror what the queries in src/ expect.
+
+CREATE TABLE IF NOT EXISTS users (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    full_name VARCHAR(120) NOT NULL,
+    email VARCHAR(190) NOT NULL UNIQUE,
+    company VARCHAR(120) NULL,
+    user_type VARCHAR(32) NOT NULL DEFAULT 'guest',
+    country VARCHAR(64) NOT NULL,
+    state_province VARCHAR(64) NULL,
+    city VARCHAR(64) NULL,
+    postal_code VARCHAR(16) NULL,
+    age INT NOT NULL DEFAULT 0,
+    sign_up_date DATE NOT NULL,
+    verified VARCHAR(3) NOT NULL DEFAULT 'yes'
+);
+
+CREATE TABLE IF NOT EXISTS products (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    product_name VARCHAR(190) NOT NULL,
+    category VARCHAR(64) NOT NULL,
+    short_description VARCHAR(255) NULL,
+    long_description TEXT NULL,
+    tech_specs JSON NULL,
+    base_price DECIMAL(12, 2) NOT NULL,
+    stock_status TINYINT NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS inventory (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    product_id INT NOT NULL,
+    warehouse_location VARCHAR(64) NOT NULL,
+    quantity_left INT NOT NULL DEFAULT 0,
+    last_counted DATETIME NULL,
+    INDEX idx_inventory_product (product_id),
+    UNIQUE KEY uq_inventory_location (product_id, warehouse_location)
+);
+
+CREATE TABLE IF NOT EXISTS shipping_rules (
+    country VARCHAR(64) PRIMARY KEY,
+    base_rate DOUBLE NOT NULL,
+    per_kg_rate DOUBLE NOT NULL,
+    hazmat_fee DOUBLE NOT NULL DEFAULT 0,
+    avg_eta_days INT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS quotes (
+    quote_id VARCHAR(16) PRIMARY KEY,
+    customer_id INT NOT NULL,
+    items JSON NOT NULL,
+    subtotal DECIMAL(12, 2) NOT NULL,
+    shipping_cost DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    tax DECIMAL(12, 2) NOT NULL,
+    total DECIMAL(12, 2) NOT NULL,
+    currency CHAR(3) NOT NULL DEFAULT 'USD',
+    status VARCHAR(20) NOT NULL DEFAULT 'generated',
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_quotes_customer (customer_id),
+    INDEX idx_quotes_created (created_at, quote_id)
+);
+
+CREATE TABLE IF NOT EXISTS orders (
+    order_id VARCHAR(16) PRIMARY KEY,
+    quote_id VARCHAR(16) NOT NULL,
+    customer_id INT NOT NULL,
+    items JSON NOT NULL,
+    subtotal DECIMAL(12, 2) NOT NULL,
+    tax DECIMAL(12, 2) NOT NULL,
+    shipping_cost DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    total DECIMAL(12, 2) NOT NULL,
+    currency CHAR(3) NOT NULL DEFAULT 'USD',
+    ship_to_address TEXT NOT NULL,
+    billing_address TEXT NULL,
+    payment_method VARCHAR(32) NULL,
+    payment_status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    order_status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    shipping_method VARCHAR(32) NULL,
+    notes TEXT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_orders_customer (customer_id),
+    INDEX idx_orders_created (created_at, order_id)
+);
+
+CREATE TABLE IF NOT EXISTS chatlogs (
+    message_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    customer_id VARCHAR(64) NOT NULL,
+    session_id VARCHAR(64) NULL,
+    user_message TEXT NULL,
+    bot_reply TEXT NULL,
+    intent_detected VARCHAR(40) NULL,
+    timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_chatlogs_customer (customer_id, message_id),
+    INDEX idx_chatlogs_timestamp (timestamp)
+);
+-- Optional monthly RANGE partitioning on timestamp:
+--   python -m src.core.chatlog_archive partition
+
+-- Where archived (cold) conversations went; see src/core/chatlog_archive.py
+CREATE TABLE IF NOT EXISTS chatlog_archive (
+    customer_id VARCHAR(64) PRIMARY KEY,
+    archive_path VARCHAR(512) NOT NULL,
+    row_count INT NOT NULL,
+    first_ts DATETIME NULL,
+    last_ts DATETIME NULL,
+    archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS support_tickets (
+    ticket_id INT AUTO_INCREMENT PRIMARY KEY,
+    customer_id INT NOT NULL,
+    product_id INT NOT NULL,
+    issue_text TEXT NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'open',
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS Leads (
+    lead_id INT AUTO_INCREMENT PRIMARY KEY,
+    customer_id INT NOT NULL,
+    budget_range VARCHAR(64) NOT NULL,
+    project_type VARCHAR(120) NOT NULL,
+    urgency VARCHAR(8) NOT NULL,
+    qualified VARCHAR(3) NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Bumped by every catalog import; workers poll it to drop cached catalog reads
+CREATE TABLE IF NOT EXISTS catalog_version (
+    id TINYINT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- Events for downstream systems, written in the same transaction as the quote / order / ticket;
+-- drained by src/core/outbox.py
+CREATE TABLE IF NOT EXISTS outbox (
+    event_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    event_type VARCHAR(40) NOT NULL,
+    aggregate_id VARCHAR(64) NOT NULL,
+    payload JSON NOT NULL,
+    created_at DATETIME(3) NOT NULL,
+    attempts INT NOT NULL DEFAULT 0,
+    last_error VARCHAR(500) NULL,
+    claimed_by VARCHAR(128) NULL,
+    claimed_until DATETIME(3) NULL,
+    published_at DATETIME(3) NULL,
+    INDEX idx_outbox_pending (published_at, event_id)
+);
+
+-- Analytics rollups, maintained by src/core/analytics.py
+CREATE TABLE IF NOT EXISTS analytics_watermarks (
+    source VARCHAR(32) PRIMARY KEY,
+    last_ts DATETIME NULL,
+    last_id VARCHAR(64) NULL,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS analytics_intent_daily (
+    day DATE NOT NULL,
+    intent VARCHAR(40) NOT NULL,
+    messages INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, intent)
+);
+
+CREATE TABLE IF NOT EXISTS analytics_funnel_daily (
+    day DATE NOT NULL,
+    stage VARCHAR(16) NOT NULL,
+    conversations INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, stage)
+);
+
+CREATE TABLE IF NOT EXISTS analytics_funnel_seen (
+    day DATE NOT NULL,
+    stage VARCHAR(16) NOT NULL,
+    customer_id VARCHAR(64) NOT NULL,
+    PRIMARY KEY (day, stage, customer_id)
+);
+
+CREATE TABLE IF NOT EXISTS analytics_quotes_daily (
+    day DATE NOT NULL,
+    currency CHAR(3) NOT NULL,
+    quotes INT NOT NULL DEFAULT 0,
+    total DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, currency)
+);
+
+CREATE TABLE IF NOT EXISTS analytics_orders_daily (
+    day DATE NOT NULL,
+    currency CHAR(3) NOT NULL,
+    orders INT NOT NULL DEFAULT 0,
+    total DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, currency)
+);
@@ -0,0 +1,189 @@
+-- SQLite schema for DB_BACKEND=sqlite (src/core/sqlite_backend.py applies it on first open).
+-- Same tables and columns as schema.sql. JSON columns are TEXT, AUTO_INCREMENT is INTEGER PRIMARY KEY.
+-- DATETIME/DATE declared types are converted back to datetime/date on read.
+
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    full_name TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE,
+    company TEXT NULL,
+    user_type TEXT NOT NULL DEFAULT 'guest',
+    country TEXT NOT NULL,
+    state_province TEXT NULL,
+    city TEXT NULL,
+    postal_code TEXT NULL,
+    age INTEGER NOT NULL DEFAULT 0,
+    sign_up_date DATE NOT NULL,
+    verified TEXT NOT NULL DEFAULT 'yes'
+);
+
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    product_name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    short_description TEXT NULL,
+    long_description TEXT NULL,
+    tech_specs TEXT NULL,
+    base_price DECIMAL(12, 2) NOT NULL,
+    stock_status INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS inventory (
+    id INTEGER PRIMARY KEY,
+    product_id INTEGER NOT NULL,
+    warehouse_location TEXT NOT NULL,
+    quantity_left INTEGER NOT NULL DEFAULT 0,
+    last_counted DATETIME NULL,
+    UNIQUE (product_id, warehouse_location)
+);
+CREATE INDEX IF NOT EXISTS idx_inventory_product ON inventory (product_id);
+
+CREATE TABLE IF NOT EXISTS shipping_rules (
+    country TEXT PRIMARY KEY,
+    base_rate REAL NOT NULL,
+    per_kg_rate REAL NOT NULL,
+    hazmat_fee REAL NOT NULL DEFAULT 0,
+    avg_eta_days INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS quotes (
+    quote_id TEXT PRIMARY KEY,
+    customer_id INTEGER NOT NULL,
+    items TEXT NOT NULL,
+    subtotal DECIMAL(12, 2) NOT NULL,
+    shipping_cost DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    tax DECIMAL(12, 2) NOT NULL,
+    total DECIMAL(12, 2) NOT NULL,
+    currency TEXT NOT NULL DEFAULT 'USD',
+    status TEXT NOT NULL DEFAULT 'generated',
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_quotes_customer ON quotes (customer_id);
+CREATE INDEX IF NOT EXISTS idx_quotes_created ON quotes (created_at, quote_id);
+
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT PRIMARY KEY,
+    quote_id TEXT NOT NULL,
+    customer_id INTEGER NOT NULL,
+    items TEXT NOT NULL,
+    subtotal DECIMAL(12, 2) NOT NULL,
+    tax DECIMAL(12, 2) NOT NULL,
+    shipping_cost DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    total DECIMAL(12, 2) NOT NULL,
+    currency TEXT NOT NULL DEFAULT 'USD',
+    ship_to_address TEXT NOT NULL,
+    billing_address TEXT NULL,
+    payment_method TEXT NULL,
+    payment_status TEXT NOT NULL DEFAULT 'pending',
+    order_status TEXT NOT NULL DEFAULT 'pending',
+    shipping_method TEXT NULL,
+    notes TEXT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders (customer_id);
+CREATE INDEX IF NOT EXISTS idx_orders_created ON orders (created_at, order_id);
+
+CREATE TABLE IF NOT EXISTS chatlogs (
+    message_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    customer_id TEXT NOT NULL,
+    session_id TEXT NULL,
+    user_message TEXT NULL,
+    bot_reply TEXT NULL,
+    intent_detected TEXT NULL,
+    timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_chatlogs_customer ON chatlogs (customer_id, message_id);
+CREATE INDEX IF NOT EXISTS idx_chatlogs_timestamp ON chatlogs (timestamp);
+
+CREATE TABLE IF NOT EXISTS chatlog_archive (
+    customer_id TEXT PRIMARY KEY,
+    archive_path TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    first_ts DATETIME NULL,
+    last_ts DATETIME NULL,
+    archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS support_tickets (
+    ticket_id INTEGER PRIMARY KEY,
+    customer_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    issue_text TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'open',
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS Leads (
+    lead_id INTEGER PRIMARY KEY,
+    customer_id INTEGER NOT NULL,
+    budget_range TEXT NOT NULL,
+    project_type TEXT NOT NULL,
+    urgency TEXT NOT NULL,
+    qualified TEXT NOT NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS catalog_version (
+    id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS outbox (
+    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_type TEXT NOT NULL,
+    aggregate_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at DATETIME NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT NULL,
+    claimed_by TEXT NULL,
+    claimed_until DATETIME NULL,
+    published_at DATETIME NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_pending ON outbox (published_at, event_id);
+
+-- Analytics rollups, maintained by src/core/analytics.py
+CREATE TABLE IF NOT EXISTS analytics_watermarks (
+    source TEXT PRIMARY KEY,
+    last_ts DATETIME NULL,
+    last_id TEXT NULL,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS analytics_intent_daily (
+    day DATE NOT NULL,
+    intent TEXT NOT NULL,
+    messages INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, intent)
+);
+
+CREATE TABLE IF NOT EXISTS analytics_funnel_daily (
+    day DATE NOT NULL,
+    stage TEXT NOT NULL,
+    conversations INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, stage)
+);
+
+CREATE TABLE IF NOT EXISTS analytics_funnel_seen (
+    day DATE NOT NULL,
+    stage TEXT NOT NULL,
+    customer_id TEXT NOT NULL,
+    PRIMARY KEY (day, stage, customer_id)
+);
+
+CREATE TABLE IF NOT EXISTS analytics_quotes_daily (
+    day DATE NOT NULL,
+    currency TEXT NOT NULL,
+    quotes INTEGER NOT NULL DEFAULT 0,
+    total DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, currency)
+);
+
+CREATE TABLE IF NOT EXISTS analytics_orders_daily (
+    day DATE NOT NULL,
+    currency TEXT NOT NULL,
+    orders INTEGER NOT NULL DEFAULT 0,
+    total DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, currency)
+);
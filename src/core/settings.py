@@ -0,0 +1,151 @@
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from pydantic import BaseModel, field_validator
+
+
+class Settings(BaseModel):
+    """
+    All runtime configuration, read once from the environment (and .env).
+    Each field maps to the upper-cased environment variable of the same name.
+    """
+
+    # --- Database (mysql | sqlite) ---
+    db_backend: str = "mysql"  # "sqlite": embedded WAL-mode file at DB_SQLITE_PATH, no server needed
+    db_sqlite_path: str = "data/chatbot.sqlite"
+    db_host: Optional[str] = None
+    db_user: Optional[str] = None
+    db_password: Optional[str] = None
+    db_name: Optional[str] = None
+    db_pool_size: int = 10
+    db_pool_timeout: float = 10.0
+    db_prepared: bool = True  # server-side prepared statements for registered hot queries
+    db_use_pure: bool = False  # force the pure-Python driver instead of the C extension
+    db_replica_hosts: List[str] = []  # "replica1:3306,replica2" → read-only tool queries go there
+    db_replica_max_lag: float = 5.0
+    db_replica_check_interval: float = 2.0
+    db_read_your_writes_window: float = 10.0
+
+    # --- Model ---
+    openai_api_key: Optional[str] = None
+    gemini_api_key: Optional[str] = None
+    chat_model: str = "litellm/gemini/gemini-2.5-flash"
+    fallback_model: Optional[str] = None
+
+    # --- Model-call governor ---
+    llm_initial_concurrency: int = 8
+    llm_min_concurrency: int = 1
+    llm_max_concurrency: int = 32
+    llm_target_latency: float = 20.0
+    llm_max_retries: int = 4
+    llm_queue_timeout: float = 60.0
+
+    # --- Single-flight ---
+    singleflight: bool = True
+    singleflight_disable: List[str] = []
+
+    # --- Tool output shaping ---
+    tool_shaping: bool = True
+    tool_token_budgets: Dict[str, int] = {}  # "get_all_products=2000,manage_user=200"
+
+    # --- Shared cache (local | shm | redis) ---
+    cache_backend: str = "local"
+    cache_url: str = "redis://localhost:6379/0"
+    cache_shm_path: str = "/dev/shm/demo-chatbot-cache.sqlite"
+    catalog_cache_ttl: float = 60.0
+    catalog_version_poll: float = 5.0  # seconds between catalog_version checks; 0 disables
+    customer_context_ttl: float = 1800.0  # seconds a session keeps its verified customer row; 0 disables
+    quote_reuse_ttl: float = 900.0  # seconds an identical quote request gets the same quote back; 0 disables
+
+    # --- Chatlogs ---
+    chatlog_normalize: str = "eager"  # "lazy": store raw, normalize on read or in bulk
+    chatlog_history_rows: int = 100  # turns read back per conversation
+    chatlog_retention_days: int = 30
+    chatlog_archive_dir: str = "archive/chatlogs"
+
+    # --- Turn scheduling (per session) ---
+    turn_coalesce_window: float = 2.0  # identical message within this many seconds shares the running turn
+    turn_max_queue: int = 4
+    turn_lock_ttl: float = 120.0  # lease on a session while its turn runs (shm/redis cache); 0 = per worker only
+    turn_lock_wait: float = 60.0  # seconds to wait for another worker's turn of the same session
+
+    # --- Admission control (/chat, per worker) ---
+    admission_max_in_flight: int = 32  # turns running at once; 0 disables the cap
+    admission_max_queue: int = 64
+    admission_queue_timeout: float = 10.0
+    client_rate: float = 0.5  # turns per second per client; 0 disables the per-client limit
+    client_burst: int = 5
+    admission_trust_proxy: bool = False  # key clients by X-Forwarded-For (only behind a proxy that sets it)
+
+    # --- Batch chat (/chat/batch) ---
+    batch_max_items: int = 10000
+    batch_concurrency: int = 8  # default sessions in parallel per batch
+    batch_max_concurrency: int = 32
+    batch_item_timeout: float = 60.0
+
+    # --- Outbox (events for downstream systems) ---
+    outbox_sinks: List[str] = ["file"]  # "file", "webhook" or both ("file,webhook")
+    outbox_file_path: str = "data/outbox.jsonl"
+    outbox_webhook_url: str = ""
+    outbox_webhook_timeout: float = 5.0
+    outbox_poll_interval: float = 1.0  # seconds between in-app drains; 0 = CLI only
+    outbox_batch_size: int = 100
+    outbox_lease_seconds: float = 30.0
+    outbox_max_backoff: float = 300.0
+    outbox_retention_hours: float = 72.0
+
+    # --- Analytics ---
+    analytics_refresh_interval: float = 0.0  # seconds between in-app rollup refreshes; 0 = cron/CLI only
+
+    # --- HTTP ---
+    gzip_min_size: int = 500  # bytes; smaller responses go out uncompressed
+    gzip_level: int = 6
+
+    # --- Profiling (off unless a token is set) ---
+    profile_token: str = ""  # X-Profile: <token> on /chat, or X-Profile-Token on /admin/profile*
+    profile_dir: str = "profiles"
+    profile_interval_ms: float = 5.0
+    profile_max_seconds: float = 120.0
+
+    # --- Startup ---
+    warm_tools_on_startup: bool = True
+
+    @field_validator("singleflight_disable", "db_replica_hosts", "outbox_sinks", mode="before")
+    @classmethod
+    def _split_csv(cls, value):
+        if isinstance(value, str):
+            return [v.strip() for v in value.split(",") if v.strip()]
+        return value
+
+    @field_validator("tool_token_budgets", mode="before")
+    @classmethod
+    def _split_pairs(cls, value):
+        if isinstance(value, str):
+            pairs = (item.split("=", 1) for item in value.split(",") if "=" in item)
+            return {name.strip(): int(budget) for name, budget in pairs}
+        return value
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        load_dotenv()
+        values = {}
+        for name in cls.model_fields:
+            raw = os.getenv(name.upper())
+            if raw is not None and raw != "":
+                values[name] = raw
+        return cls(**values)
+
+    def db_config(self) -> dict:
+        return {
+            "host": self.db_host,
+            "user": self.db_user,
+            "password": self.db_password,
+            "database": self.db_name,
+        }
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    return Settings.from_env()
@@ -0,0 +1,245 @@
+"""
+Shapes tool results before they reach the model. Each tool gets a token
+budget; its result is projected, tabulated or summarized to fit, and the
+tokens saved are counted. Tools keep returning their full results
+internally; only what the agent sees changes.
+
+    @function_tool
+    @shape_output("get_all_products")
+    @single_flight("get_all_products")
+    def get_all_products(): ...
+
+Budgets come from TOOL_TOKEN_BUDGETS ("name=tokens,..."), falling back to
+DEFAULT_BUDGETS; TOOL_SHAPING=false passes results through unchanged.
+"""
+import functools
+import inspect
+import json
+import threading
+from typing import Any, Callable, Dict
+
+from pydantic import BaseModel
+
+from src.core.settings import get_settings
+
+DEFAULT_BUDGETS = {
+    "get_all_products": 2000,
+    "manage_user": 200,
+    "availability_checker_tool": 200,
+}
+DEFAULT_BUDGET = 800
+CHARS_PER_TOKEN = 4
+TEXT_FIELD_CHARS = 160
+
+# Profile fields the conversation actually uses; the rest of the users row stays server-side.
+USER_FIELDS = ("id", "full_name", "email", "company", "user_type", "country", "verified")
+PRODUCT_COLUMNS = ("id", "product_name", "category", "base_price", "stock_status", "short_description")
+MAX_LISTED_CATEGORIES = 20
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token; close enough for budgeting without loading a tokenizer."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    return value
+
+
+def _clip(text: str, chars: int) -> str:
+    return text if len(text) <= chars else text[:chars - 1].rstrip() + "…"
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def fit_text(text: str, budget: int) -> str:
+    """Hard cap: keeps the head of the text and says how much was cut."""
+    limit = budget * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    note = f"\n[… truncated {len(text) - limit} characters]"
+    return text[:max(limit - len(note), 0)] + note
+
+
+# -------------------------------------------------
+# Shapers: (result, budget) -> str
+# -------------------------------------------------
+def shape_generic(result: Any, budget: int) -> str:
+    value = _plain(result)
+    if isinstance(value, str):
+        return fit_text(value, budget)
+    text = _dumps(value)
+    if estimate_tokens(text) > budget:
+        text = _dumps(_clip_strings(value, TEXT_FIELD_CHARS))
+    return fit_text(text, budget)
+
+
+def _clip_strings(value: Any, chars: int) -> Any:
+    if isinstance(value, str):
+        return _clip(value, chars)
+    if isinstance(value, list):
+        return [_clip_strings(v, chars) for v in value]
+    if isinstance(value, dict):
+        return {k: _clip_strings(v, chars) for k, v in value.items()}
+    return value
+
+
+def shape_user(result: Any, budget: int) -> str:
+    value = _plain(result)
+    if isinstance(value, dict) and isinstance(value.get("user"), dict):
+        value = {**value, "user": {k: value["user"][k] for k in USER_FIELDS if k in value["user"]}}
+    return shape_generic(value, budget)
+
+
+def shape_products(result: Any, budget: int) -> str:
+    """
+    One pipe-separated row per product, no long descriptions or specs; rows past the budget
+    are counted, not sent, with the offset of the next page.
+    """
+    if hasattr(result, "records"):
+        # CatalogView: read the shown columns from the store; no models, no spec parsing
+        products = result.records(PRODUCT_COLUMNS)
+        count = len(result)
+    else:
+        products = _plain(result)
+        if not isinstance(products, list) or not products:
+            return shape_generic(products, budget)
+        count = len(products)
+    if not count:
+        return shape_generic([], budget)
+
+    lines = [" | ".join(PRODUCT_COLUMNS)]
+    used = estimate_tokens(lines[0])
+    reserve = estimate_tokens(_more_products(result, count, count)) + 5
+    for i, product in enumerate(products):
+        row = [_clip("" if product.get(c) is None else str(product[c]), 80) for c in PRODUCT_COLUMNS]
+        line = " | ".join(row)
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget - reserve:
+            lines.append(_more_products(result, count - i, i))
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
+
+
+def _more_products(result: Any, remaining: int, shown: int) -> str:
+    """The truncation note: how to get the next page, and the categories to filter by."""
+    offset = getattr(result, "offset", None)
+    if offset is None:
+        return f"… {remaining} more products not shown."
+    note = (f"… {remaining} more products not shown; call get_all_products again with offset={offset + shown} "
+            f"(same filters) for the next page, or narrow with category= or name=.")
+    categories = getattr(getattr(result, "store", None), "categories", None)
+    if categories:
+        listed = ", ".join(categories[:MAX_LISTED_CATEGORIES])
+        more = len(categories) - MAX_LISTED_CATEGORIES
+        note += f" Categories: {listed}" + (f" (+{more} more)." if more > 0 else ".")
+    return note
+
+
+def shape_availability(result: Any, budget: int) -> str:
+    """Keeps the header and the largest warehouse lines; the rest become one summary line."""
+    if not isinstance(result, str):
+        return shape_generic(result, budget)
+    lines = result.splitlines()
+    if estimate_tokens(result) <= budget or len(lines) < 3:
+        return fit_text(result, budget)
+    header, stock = lines[0], lines[1:]
+
+    def units(line: str) -> int:
+        digits = line.lstrip("- ").split(" ", 1)[0]
+        return int(digits) if digits.isdigit() else 0
+
+    ranked = sorted(stock, key=units, reverse=True)
+    kept, used = [], estimate_tokens(header)
+    for line in ranked:
+        if used + estimate_tokens(line) + 20 > budget:
+            break
+        kept.append(line)
+        used += estimate_tokens(line) + 1
+    rest = ranked[len(kept):]
+    total = sum(units(line) for line in stock)
+    summary = f"- … {len(rest)} more warehouses with {sum(units(l) for l in rest)} units (total {total} units)"
+    return "\n".join([header, *kept, summary])
+
+
+SHAPERS: Dict[str, Callable[[Any, int], str]] = {
+    "get_all_products": shape_products,
+    "manage_user": shape_user,
+    "availability_checker_tool": shape_availability,
+}
+
+
+# -------------------------------------------------
+# Counters
+# -------------------------------------------------
+class ShapingStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tools = {}
+
+    def record(self, name: str, tokens_in: int, tokens_out: int):
+        with self._lock:
+            entry = self.tools.setdefault(name, {"calls": 0, "shaped": 0, "tokens_in": 0, "tokens_out": 0})
+            entry["calls"] += 1
+            entry["shaped"] += tokens_out < tokens_in
+            entry["tokens_in"] += tokens_in
+            entry["tokens_out"] += tokens_out
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            tools = {name: {**entry, "tokens_saved": entry["tokens_in"] - entry["tokens_out"]}
+                     for name, entry in self.tools.items()}
+        return {"tokens_saved": sum(t["tokens_saved"] for t in tools.values()), "tools": tools}
+
+
+stats = ShapingStats()
+
+
+def budget_for(name: str) -> int:
+    return get_settings().tool_token_budgets.get(name, DEFAULT_BUDGETS.get(name, DEFAULT_BUDGET))
+
+
+def shape(name: str, result: Any) -> Any:
+    """What the model sees for `result` of tool `name`."""
+    shaped = SHAPERS.get(name, shape_generic)(result, budget_for(name))
+    # What the agents SDK would send is str(result); lazy results estimate its length instead of building it
+    chars = getattr(result, "estimated_chars", None)
+    tokens_in = (chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN if chars is not None else estimate_tokens(str(result))
+    tokens_out = estimate_tokens(shaped)
+    if tokens_out >= tokens_in:
+        stats.record(name, tokens_in, tokens_in)
+        return result
+    stats.record(name, tokens_in, tokens_out)
+    return shaped
+
+
+def shape_output(name: str):
+    """Decorator placed directly under @function_tool; keeps the signature and docstring for the tool schema."""
+    enabled = get_settings().tool_shaping
+
+    def decorator(fn):
+        if not enabled:
+            return fn
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                return shape(name, await fn(*args, **kwargs))
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                return shape(name, fn(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
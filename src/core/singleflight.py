@@ -0,0 +1,185 @@
+import asyncio
+import functools
+import inspect
+import json
+import threading
+from collections import OrderedDict
+
+from pydantic import BaseModel
+
+from src.core import db
+from src.core.settings import get_settings
+
+# Tools that may share one in-flight execution between identical concurrent calls.
+# Only read-only tools belong here: the shared run executes in the first caller's context
+# (db.routing_key, customer session), and a write made there would be the leader's alone.
+DEFAULT_TOOLS = {"get_all_products", "shipping_calculator", "manage_user", "catalog.load_products"}
+MAX_TRACKED_KEYS = 1000
+
+
+def _enabled_names() -> set:
+    settings = get_settings()
+    if not settings.singleflight:
+        return set()
+    return DEFAULT_TOOLS - set(settings.singleflight_disable)
+
+
+def _jsonable(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    return value
+
+
+def make_key(name: str, args: tuple, kwargs: dict, primary: bool = False) -> str:
+    """`primary`: the caller's reads are pinned to the primary, so it must not share a replica read."""
+    payload = {"args": [_jsonable(a) for a in args], "kwargs": {k: _jsonable(v) for k, v in kwargs.items()}}
+    return f"{name}{'@primary' if primary else ''}:{json.dumps(payload, sort_keys=True, default=str)}"
+
+
+def _replicas() -> bool:
+    # Without replicas every read goes to the primary, so the pin can't change what a call sees.
+    return bool(get_settings().db_replica_hosts)
+
+
+class SingleFlight:
+    """
+    Collapses identical concurrent calls into one execution. Async callers
+    share one asyncio task; sync callers (threads) share a threading.Event.
+    Keeps per-key counters: calls, executions, shared, errors, peak_waiters.
+    """
+
+    def __init__(self):
+        self._async_inflight = {}
+        self._sync_inflight = {}
+        self._lock = threading.Lock()
+        self.metrics = OrderedDict()
+
+    def _track(self, key: str, field: str, waiters: int = 0):
+        with self._lock:
+            entry = self.metrics.get(key)
+            if entry is None:
+                entry = {"calls": 0, "executions": 0, "shared": 0, "errors": 0, "peak_waiters": 0}
+                self.metrics[key] = entry
+                if len(self.metrics) > MAX_TRACKED_KEYS:
+                    self.metrics.popitem(last=False)
+            entry[field] += 1
+            entry["peak_waiters"] = max(entry["peak_waiters"], waiters)
+
+    async def do(self, key: str, fn, *args, **kwargs):
+        """Runs `fn` once per key among concurrent awaiters. Sync `fn` runs in a worker thread."""
+        self._track(key, "calls")
+        inflight = self._async_inflight.get(key)
+        if inflight is None:
+            self._track(key, "executions")
+            # Own task, so a cancelled caller doesn't cancel the work the others are waiting on.
+            task = asyncio.ensure_future(self._run(key, fn, args, kwargs))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            inflight = self._async_inflight[key] = [task, 0]
+        else:
+            inflight[1] += 1
+            self._track(key, "shared", inflight[1])
+        return await asyncio.shield(inflight[0])
+
+    async def _run(self, key: str, fn, args: tuple, kwargs: dict):
+        try:
+            if inspect.iscoroutinefunction(fn):
+                return await fn(*args, **kwargs)
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        except Exception:
+            self._track(key, "errors")
+            raise
+        finally:
+            self._async_inflight.pop(key, None)
+
+    def do_sync(self, key: str, fn, *args, **kwargs):
+        """Thread-safe variant for plain functions called from worker threads."""
+        self._track(key, "calls")
+        with self._lock:
+            inflight = self._sync_inflight.get(key)
+            leader = inflight is None
+            if leader:
+                inflight = {"done": threading.Event(), "result": None, "error": None, "waiters": 0}
+                self._sync_inflight[key] = inflight
+            else:
+                inflight["waiters"] += 1
+                waiters = inflight["waiters"]
+
+        if not leader:
+            self._track(key, "shared", waiters)
+            inflight["done"].wait()
+            if inflight["error"] is not None:
+                raise inflight["error"]
+            return inflight["result"]
+
+        self._track(key, "executions")
+        try:
+            inflight["result"] = fn(*args, **kwargs)
+            return inflight["result"]
+        except BaseException as e:
+            self._track(key, "errors")
+            inflight["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._sync_inflight[key]
+            inflight["done"].set()
+
+    def snapshot(self, top: int = 20) -> dict:
+        with self._lock:
+            items = list(self.metrics.items())
+        totals = {"calls": 0, "executions": 0, "shared": 0, "errors": 0}
+        for _, entry in items:
+            for field in totals:
+                totals[field] += entry[field]
+        busiest = sorted(items, key=lambda kv: kv[1]["shared"], reverse=True)[:top]
+        return {**totals, "keys": dict(busiest)}
+
+
+group = SingleFlight()
+
+
+def single_flight(name: str):
+    """
+    Decorator for tool functions and loaders. Place it under @function_tool:
+
+        @function_tool
+        @single_flight("get_all_products")
+        def get_all_products(): ...
+
+    The wrapper is async (sync functions run in a worker thread), keeps the
+    original signature and docstring for the tool schema, and bypasses the
+    shared execution when `name` is disabled via SINGLEFLIGHT / SINGLEFLIGHT_DISABLE.
+    """
+    enabled = name in _enabled_names()
+
+    def decorator(fn):
+        is_async = inspect.iscoroutinefunction(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if not enabled:
+                return await fn(*args, **kwargs) if is_async else await asyncio.to_thread(fn, *args, **kwargs)
+            # The pin may live in the shared cache backend; look it up off the event loop.
+            primary = _replicas() and await asyncio.to_thread(db.pinned_to_primary)
+            return await group.do(make_key(name, args, kwargs, primary), fn, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def single_flight_sync(name: str):
+    """Same as single_flight for plain functions that stay synchronous (e.g. catalog loaders)."""
+    enabled = name in _enabled_names()
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            primary = _replicas() and db.pinned_to_primary()
+            return group.do_sync(make_key(name, args, kwargs, primary), fn, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,244 @@
+"""
+Embedded SQLite storage for DB_BACKEND=sqlite: a single-node or edge
+deployment (or a benchmark run) without a MySQL server. The database
+file (DB_SQLITE_PATH) runs in WAL mode, so readers never block the
+writer, and is created from schema_sqlite.sql on first open.
+
+Connections look like mysql-connector ones to the rest of the code:
+cursor(dictionary=True), %s placeholders, commit/rollback,
+in_transaction, lastrowid/rowcount, and errors raised as
+mysql.connector errors. The MySQL-only syntax the tools use is
+translated once per statement (translate()):
+
+    CAST(%s AS JSON)               -> ?
+    INSERT IGNORE                  -> INSERT OR IGNORE
+    ON DUPLICATE KEY UPDATE c = VALUES(c)
+                                   -> ON CONFLICT DO UPDATE SET c = excluded.c
+    DELETE ... ORDER BY ... LIMIT  -> DELETE ... WHERE rowid IN (SELECT ...)
+"""
+import itertools
+import os
+import queue
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+from mysql.connector import errors
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "schema_sqlite.sql")
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",  # durable at checkpoints; a crash loses at most the last commits, never corrupts
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",  # 16 MB page cache per connection
+)
+
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(datetime, lambda v: v.isoformat(" "))
+sqlite3.register_adapter(date, lambda v: v.isoformat())
+# Declared types in schema_sqlite.sql; values come back as the same Python types mysql-connector returns.
+sqlite3.register_converter("DATETIME", lambda v: datetime.fromisoformat(v.decode()))
+sqlite3.register_converter("DATE", lambda v: date.fromisoformat(v.decode()[:10]))
+
+_ids = itertools.count(1)
+_schema_lock = threading.Lock()
+_schema_ready = set()
+
+_DELETE_LIMIT = re.compile(r"^\s*DELETE\s+FROM\s+(\w+)\s+WHERE\s+(.+?)\s+(ORDER\s+BY\s+.+?\s+)?LIMIT\s+(\S+)\s*$",
+                           re.IGNORECASE | re.DOTALL)
+_UPSERT = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.IGNORECASE)
+_VALUES_REF = re.compile(r"\bVALUES\((\w+)\)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=512)
+def translate(sql: str) -> str:
+    """MySQL-flavoured statement -> SQLite. Cached, so each distinct statement is rewritten once."""
+    sql = re.sub(r"CAST\(\s*%s\s+AS\s+JSON\s*\)", "%s", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bINSERT\s+IGNORE\b", "INSERT OR IGNORE", sql, flags=re.IGNORECASE)
+    upsert = _UPSERT.search(sql)
+    if upsert:
+        updates = _VALUES_REF.sub(r"excluded.\1", sql[upsert.end():])
+        sql = sql[:upsert.start()] + "ON CONFLICT DO UPDATE SET" + updates
+    delete = _DELETE_LIMIT.match(sql)
+    if delete:
+        table, where, order, limit = delete.groups()
+        sql = (f"DELETE FROM {table} WHERE rowid IN "
+               f"(SELECT rowid FROM {table} WHERE {where} {order or ''}LIMIT {limit})")
+    return sql.replace("%s", "?")
+
+
+def _error(e: sqlite3.Error) -> errors.Error:
+    # Callers already catch mysql.connector errors; keep that contract on this backend.
+    if isinstance(e, sqlite3.IntegrityError):
+        return errors.IntegrityError(msg=str(e))
+    if isinstance(e, sqlite3.OperationalError):
+        return errors.OperationalError(msg=str(e))
+    if isinstance(e, sqlite3.ProgrammingError):
+        return errors.ProgrammingError(msg=str(e))
+    return errors.DatabaseError(msg=str(e))
+
+
+class SQLiteCursor:
+    """The subset of the mysql-connector cursor API the tools use."""
+
+    def __init__(self, conn: sqlite3.Connection, dictionary: bool):
+        self._cursor = conn.cursor()
+        self._dictionary = dictionary
+
+    def execute(self, sql: str, params=()):
+        try:
+            self._cursor.execute(translate(sql), tuple(params or ()))
+        except sqlite3.Error as e:
+            raise _error(e) from e
+
+    def executemany(self, sql: str, rows):
+        try:
+            self._cursor.executemany(translate(sql), [tuple(r) for r in rows])
+        except sqlite3.Error as e:
+            raise _error(e) from e
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip(self.column_names, row))
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        if not self._dictionary:
+            return rows
+        names = self.column_names
+        return [dict(zip(names, row)) for row in rows]
+
+    @property
+    def column_names(self):
+        return tuple(d[0] for d in self._cursor.description or ())
+
+    @property
+    def with_rows(self) -> bool:
+        return self._cursor.description is not None
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """One sqlite3 connection with a mysql-connector-shaped API."""
+
+    def __init__(self, path: str):
+        self.connection_id = next(_ids)
+        # Pool checkout already gives one thread at a time, so the connection may move between threads.
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False,
+                                     detect_types=sqlite3.PARSE_DECLTYPES, cached_statements=256)
+        for pragma in PRAGMAS:
+            self._conn.execute(pragma)
+        ensure_schema(self._conn, path)
+
+    def cursor(self, dictionary: bool = False, prepared: bool = False, buffered: bool = False) -> SQLiteCursor:
+        # sqlite3 already keeps compiled statements per connection (cached_statements), so prepared is implicit.
+        return SQLiteCursor(self._conn, dictionary)
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._conn.in_transaction
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect: bool = False, attempts: int = 1, delay: int = 0):
+        self._conn.execute("SELECT 1")
+
+    def is_connected(self) -> bool:
+        return True
+
+    def close(self):
+        self._conn.close()
+
+
+def ensure_schema(conn: sqlite3.Connection, path: str):
+    """Applies schema_sqlite.sql once per database file per process (every statement is IF NOT EXISTS)."""
+    if path in _schema_ready:
+        return
+    with _schema_lock:
+        if path in _schema_ready:
+            return
+        with open(SCHEMA_PATH, encoding="utf-8") as f:
+            conn.executescript(f.read())
+        _schema_ready.add(path)
+
+
+class PooledSQLiteConnection:
+    """Per-checkout handle, like mysql-connector's PooledMySQLConnection: close() returns the connection."""
+
+    def __init__(self, pool: "SQLitePool", cnx: SQLiteConnection):
+        self._pool = pool
+        self._cnx = cnx
+
+    def __getattr__(self, name):
+        return getattr(self._cnx, name)
+
+    def close(self):
+        if self._cnx is not None:
+            self._pool.put(self._cnx)
+            self._cnx = None
+
+
+class SQLitePool:
+    """Same shape as MySQLConnectionPool.get_connection(); connections are opened on demand up to `size`."""
+
+    def __init__(self, path: str, size: int):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def get_connection(self) -> PooledSQLiteConnection:
+        return PooledSQLiteConnection(self, self._checkout())
+
+    def _checkout(self) -> SQLiteConnection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return SQLiteConnection(self.path)
+                except Exception:
+                    self._opened -= 1
+                    raise
+        return self._idle.get()
+
+    def put(self, conn: SQLiteConnection):
+        self._idle.put(conn)
+
+
+def connect(path: str) -> SQLiteConnection:
+    """An unpooled connection; close() really closes it."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return SQLiteConnection(path)
@@ -0,0 +1,71 @@
+"""
+Breaks down worker import cost by module.
+
+    python -m src.core.startup_report            # import main (what uvicorn does)
+    python -m src.core.startup_report --agent    # plus building the agent / all tools
+    python -m src.core.startup_report --top 30
+
+Runs the import in a fresh interpreter with `-X importtime` and aggregates
+the per-module self time by top-level package.
+"""
+import argparse
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+
+def parse_importtime(stderr: str):
+    """Yields (module, self_us, cumulative_us) from `-X importtime` output."""
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+            yield module.strip(), int(self_us), int(cumulative_us)
+        except ValueError:
+            continue
+
+
+def run(statement: str):
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:], file=sys.stderr)
+        sys.exit(proc.returncode)
+    return wall, list(parse_importtime(proc.stderr))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup import cost report.")
+    parser.add_argument("--agent", action="store_true", help="also build the agent (imports every tool)")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    statement = "import main"
+    if args.agent:
+        # importlib.import_module isn't traced by -X importtime, so import the tools via __import__ first
+        statement += "; [__import__(m, fromlist=[n]) for m, n in main.TOOLS]; main.get_agent()"
+    wall, rows = run(statement)
+
+    by_package = defaultdict(int)
+    for module, self_us, _ in rows:
+        by_package[module.split(".")[0]] += self_us
+    total_us = sum(by_package.values())
+
+    print(f"`{statement}`: {wall * 1000:.0f} ms wall (interpreter included), "
+          f"{total_us / 1000:.0f} ms in imports, {len(rows)} modules\n")
+
+    print(f"{'package':<32}{'self ms':>10}{'share':>8}")
+    for package, us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"{package:<32}{us / 1000:>10.1f}{us / max(total_us, 1):>8.1%}")
+
+    print(f"\n{'module (cumulative)':<56}{'ms':>10}")
+    for module, _, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{module:<56}{cumulative_us / 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
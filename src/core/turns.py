@@ -0,0 +1,171 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Optional
+from uuid import uuid4
+
+from src.core.cache import CacheBackend, get_cache
+from src.core.settings import get_settings
+
+
+class TurnQueueFull(Exception):
+    """Raised when a session already has max_queue turns waiting."""
+
+
+class _Lane:
+    """One session's turns: a FIFO lock plus the turns currently queued or running."""
+
+    __slots__ = ("lock", "pending")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = []  # [(message key, submitted_at, task)] in arrival order
+
+
+def _message_key(message: str) -> str:
+    return " ".join((message or "").split()).lower()
+
+
+class TurnScheduler:
+    """
+    Runs chat turns one at a time per session (in arrival order) and
+    different sessions in parallel, so two turns never read and append the
+    same history concurrently. A message identical to one already queued or
+    running for that session within `coalesce_window` seconds (double send,
+    UI retry) shares that turn's result instead of running again.
+
+    Within a worker, lanes order the turns. Across workers (CACHE_BACKEND
+    shm or redis), a turn also holds a lease on its session in the shared
+    backend while it runs, renewed every lock_ttl / 3, so a session's turns
+    never overlap whichever worker they land on; a turn that can't get the
+    lease within lock_wait is refused like a full queue. Coalescing only
+    sees turns on the same worker.
+    """
+
+    def __init__(self, coalesce_window: float = 2.0, max_queue: int = 4, backend: Optional[CacheBackend] = None,
+                 lock_ttl: float = 120.0, lock_wait: float = 60.0):
+        self.coalesce_window = coalesce_window
+        self.max_queue = max_queue
+        self.backend = backend
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self._lanes: Dict[str, _Lane] = {}
+        self.stats = {"turns": 0, "executed": 0, "coalesced": 0, "rejected": 0, "errors": 0,
+                      "peak_depth": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0,
+                      "lock_waits": 0, "lock_timeouts": 0}
+
+    async def run(self, session_id: str, message: str, turn: Callable[[], Awaitable]):
+        """Awaits `turn()` in the session's lane and returns its result."""
+        self.stats["turns"] += 1
+        lane = self._lanes.get(session_id)
+        if lane is None:
+            lane = self._lanes[session_id] = _Lane()
+
+        key = _message_key(message)
+        now = time.monotonic()
+        for pending_key, submitted_at, task in lane.pending:
+            if pending_key == key and now - submitted_at <= self.coalesce_window:
+                self.stats["coalesced"] += 1
+                return await asyncio.shield(task)
+
+        if len(lane.pending) >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise TurnQueueFull(f"{len(lane.pending)} turns already queued for this session")
+
+        # Own task: a client that disconnects doesn't cancel a turn others may be sharing,
+        # and the turn's history write still happens.
+        task = asyncio.ensure_future(self._execute(session_id, lane, turn, now))
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        entry = (key, now, task)
+        lane.pending.append(entry)
+        self.stats["peak_depth"] = max(self.stats["peak_depth"], len(lane.pending))
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._retire(session_id, lane, entry)
+            else:
+                task.add_done_callback(lambda _: self._retire(session_id, lane, entry))
+
+    async def _execute(self, session_id: str, lane: _Lane, turn, submitted_at: float):
+        async with lane.lock, self._shared_lock(session_id):
+            waited = time.monotonic() - submitted_at
+            self.stats["wait_seconds_total"] += waited
+            self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], waited)
+            self.stats["executed"] += 1
+            try:
+                return await turn()
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+
+    @asynccontextmanager
+    async def _shared_lock(self, session_id: str):
+        """Holds the session's lease in the shared backend; a no-op without one."""
+        if self.backend is None:
+            yield
+            return
+        key = f"turn-lock:{session_id}"
+        owner = f"{os.getpid()}-{uuid4().hex[:12]}"
+        deadline = time.monotonic() + self.lock_wait
+        delay = 0.02
+        # Backend calls may go over the network (redis); keep them off the event loop.
+        if not await asyncio.to_thread(self.backend.acquire_lock, key, owner, self.lock_ttl):
+            self.stats["lock_waits"] += 1
+            while not await asyncio.to_thread(self.backend.acquire_lock, key, owner, self.lock_ttl):
+                if time.monotonic() >= deadline:
+                    self.stats["lock_timeouts"] += 1
+                    raise TurnQueueFull("a turn for this session is still running on another worker")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.5)
+        renew = asyncio.create_task(self._renew(key, owner))
+        try:
+            yield
+        finally:
+            renew.cancel()
+            await asyncio.to_thread(self.backend.release_lock, key, owner)
+
+    async def _renew(self, key: str, owner: str):
+        while True:
+            await asyncio.sleep(self.lock_ttl / 3)
+            try:
+                if not await asyncio.to_thread(self.backend.acquire_lock, key, owner, self.lock_ttl):
+                    print(f"Turn lease {key} was taken over while the turn was still running")
+            except Exception as e:
+                print("Turn lease renewal error:", e)
+
+    def _retire(self, session_id: str, lane: _Lane, entry):
+        if entry in lane.pending:
+            lane.pending.remove(entry)
+        if not lane.pending and self._lanes.get(session_id) is lane:
+            del self._lanes[session_id]
+
+    def depth(self, session_id: str) -> int:
+        lane = self._lanes.get(session_id)
+        return len(lane.pending) if lane else 0
+
+    def snapshot(self) -> dict:
+        depths = [len(lane.pending) for lane in self._lanes.values()]
+        return {
+            "active_sessions": len(depths),
+            "queued_turns": sum(depths),
+            "waiting_turns": sum(max(d - 1, 0) for d in depths),
+            "max_depth": max(depths, default=0),
+            **{k: round(v, 3) if isinstance(v, float) else v for k, v in self.stats.items()},
+        }
+
+
+_scheduler: Optional[TurnScheduler] = None
+
+
+def get_scheduler() -> TurnScheduler:
+    global _scheduler
+    if _scheduler is None:
+        settings = get_settings()
+        # The local backend is this process only, where the lanes already serialize.
+        shared = settings.cache_backend != "local" and settings.turn_lock_ttl > 0
+        _scheduler = TurnScheduler(settings.turn_coalesce_window, settings.turn_max_queue,
+                                   backend=get_cache().backend if shared else None,
+                                   lock_ttl=settings.turn_lock_ttl, lock_wait=settings.turn_lock_wait)
+    return _scheduler
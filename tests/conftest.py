@@ -0,0 +1,14 @@
+import os
+import tempfile
+
+# Tests run against the embedded SQLite backend and in-process cache; set before src is imported.
+_tmp = tempfile.mkdtemp(prefix="chatbot-tests-")
+os.environ.update({
+    "DB_BACKEND": "sqlite",
+    "DB_SQLITE_PATH": os.path.join(_tmp, "chatbot.sqlite"),
+    "CACHE_BACKEND": "local",
+    "CHATLOG_ARCHIVE_DIR": os.path.join(_tmp, "archive"),
+    "OUTBOX_FILE_PATH": os.path.join(_tmp, "outbox.jsonl"),
+    "OUTBOX_POLL_INTERVAL": "0",
+    "WARM_TOOLS_ON_STARTUP": "false",
+})
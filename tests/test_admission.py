@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from src.core.admission import AdmissionController, AdmissionRejected
+
+
+def controller(max_in_flight=1, max_queue=1, queue_timeout=5.0, client_rate=0.0, client_burst=2):
+    return AdmissionController(max_in_flight, max_queue, queue_timeout, client_rate, client_burst)
+
+
+def test_client_bucket_refuses_past_the_burst():
+    admission = controller(client_rate=0.5, client_burst=2)
+    admission.check_client("a")
+    admission.check_client("a")
+    with pytest.raises(AdmissionRejected) as refused:
+        admission.check_client("a")
+    assert refused.value.reason == "rate_limited"
+    assert refused.value.retry_after == 2
+    admission.check_client("b")  # other clients have their own bucket
+
+
+def test_client_rate_zero_disables_the_bucket():
+    admission = controller(client_rate=0.0)
+    for _ in range(100):
+        admission.check_client("a")
+
+
+def test_full_queue_is_refused_immediately():
+    async def scenario():
+        admission = controller(max_in_flight=1, max_queue=1)
+        await admission.acquire()
+        queued = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as refused:
+            await admission.acquire()
+        assert refused.value.reason == "queue_full"
+        admission.release()
+        await queued
+        assert admission.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_is_refused_and_dequeued():
+    async def scenario():
+        admission = controller(queue_timeout=0.05)
+        await admission.acquire()
+        with pytest.raises(AdmissionRejected) as refused:
+            await admission.acquire()
+        assert refused.value.reason == "queue_timeout"
+        assert admission.snapshot()["waiting"] == 0
+        admission.release()
+        assert admission.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_take_the_next_slot():
+    async def scenario():
+        admission = controller(max_queue=2)
+        await admission.acquire()
+        first = asyncio.create_task(admission.acquire())
+        second = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        admission.release()
+        await asyncio.wait_for(second, 1)
+        assert (admission.in_flight, admission.snapshot()["waiting"]) == (1, 0)
+
+    asyncio.run(scenario())
+
+
+def test_run_releases_the_slot_when_the_turn_fails():
+    async def scenario():
+        admission = controller()
+
+        async def failing():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await admission.run(failing)
+        assert admission.in_flight == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,64 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from src.core import analytics, db
+
+TABLES = ("chatlogs", "quotes", "orders", "analytics_watermarks", "analytics_intent_daily",
+          "analytics_funnel_daily", "analytics_funnel_seen", "analytics_quotes_daily", "analytics_orders_daily")
+
+
+@pytest.fixture(autouse=True)
+def empty_tables():
+    with db.transaction() as conn:
+        cursor = conn.cursor()
+        for table in TABLES:
+            cursor.execute(f"DELETE FROM {table}")
+        cursor.close()
+
+
+def _seed(when: datetime):
+    with db.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT INTO chatlogs (customer_id, user_message, bot_reply, intent_detected, session_id, timestamp) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            [("s1", "hi", "hello", "greeting", "s1", when), ("s2", "hi", "hello", "greeting", "s2", when)])
+        cursor.executemany(
+            "INSERT INTO quotes (quote_id, customer_id, items, subtotal, shipping_cost, tax, total, currency, "
+            "created_at) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            [("Q-1", 1, "[]", 100, 0, 10, 110.5, "USD", when), ("Q-2", 2, "[]", 50, 0, 5, 55.25, "USD", when)])
+        cursor.execute(
+            "INSERT INTO orders (order_id, quote_id, customer_id, items, subtotal, tax, shipping_cost, total, "
+            "currency, ship_to_address, order_status, created_at) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+            ("O-1", "Q-1", 1, "[]", 100, 10, 0, 110.5, "USD", "Somewhere", "pending", when))
+        cursor.close()
+
+
+def test_refresh_and_reports_on_sqlite():
+    today = date.today()
+    _seed(datetime.combine(today, datetime.min.time()))
+
+    assert analytics.refresh() == {"chatlogs": 2, "quotes": 2, "orders": 1}
+    assert analytics.refresh() == {"chatlogs": 0, "quotes": 0, "orders": 0}  # watermarks advanced
+
+    assert analytics.intent_mix(today) == [{"day": today.isoformat(), "intent": "greeting", "messages": 2}]
+    sales = analytics.sales(today)
+    assert sales["quotes"] == [{"day": today.isoformat(), "currency": "USD", "quotes": 2, "total": 165.75}]
+    assert sales["orders"] == [{"day": today.isoformat(), "currency": "USD", "orders": 1, "total": 110.5}]
+    assert analytics.funnel(today)[0]["chat"] == 2
+
+
+def test_sqlite_lease_keeps_a_second_run_out():
+    conn = db.connect()
+    cursor = conn.cursor()
+    try:
+        assert analytics._lock(conn, cursor, "first")
+        assert not analytics._lock(conn, cursor, "second")
+        assert analytics.refresh() is None
+        analytics._unlock(conn, cursor, "first")
+        assert analytics._lock(conn, cursor, "second")
+        analytics._unlock(conn, cursor, "second")
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from pydantic import ValidationError
+
+from src.core import db
+from src.core.admission import AdmissionRejected
+from src.core.batch import (MAX_SESSION_ID, BatchItem, BatchRequest, isolated_session, items_from_chatlogs,
+                            run_batch)
+
+
+def test_isolated_session_keeps_short_ids_readable():
+    assert isolated_session("run1", "abc") == "batch-run1-abc"
+
+
+def test_isolated_session_hashes_long_session_ids():
+    long_id = "s" * 64
+    session = isolated_session("r" * 16, long_id)
+    assert len(session) <= MAX_SESSION_ID
+    assert session == isolated_session("r" * 16, long_id)
+    assert session != isolated_session("r" * 16, long_id[:-1] + "t")
+
+
+def test_batch_request_rejects_unsafe_run_ids():
+    BatchRequest(items=[], run_id="nightly_2025-06")
+    for run_id in ("x" * 17, "", "a/b", "a b"):
+        with pytest.raises(ValidationError):
+            BatchRequest(items=[], run_id=run_id)
+
+
+def test_run_batch_rejects_a_long_run_id():
+    async def turn(session_id, message):
+        return message
+
+    async def scenario():
+        return [r async for r in run_batch([BatchItem(session_id="s", message="hi")], turn,
+                                           concurrency=1, timeout=1, run_id="x" * 40)]
+
+    with pytest.raises(ValueError):
+        asyncio.run(scenario())
+
+
+def test_run_batch_turns_use_the_isolated_session():
+    seen = []
+
+    async def turn(session_id, message):
+        seen.append(session_id)
+        return message
+
+    async def scenario():
+        return [r async for r in run_batch([BatchItem(session_id="s" * 64, message="hi")], turn,
+                                           concurrency=1, timeout=1, run_id="run1")]
+
+    results = asyncio.run(scenario())
+    assert results[-1]["summary"]["ok"] == 1
+    assert len(seen[0]) <= MAX_SESSION_ID and seen[0].startswith("batch-run1-")
+
+
+def test_refused_items_are_reported_as_rejected():
+    async def turn(session_id, message):
+        raise AdmissionRejected("queue_full", 2)
+
+    async def scenario():
+        return [r async for r in run_batch([BatchItem(session_id="s", message="hi")], turn,
+                                           concurrency=1, timeout=1, run_id="run1")]
+
+    result, summary = asyncio.run(scenario())
+    assert result["status"] == "rejected" and result["retry_after"] == 2
+    assert summary["summary"]["rejected"] == 1 and summary["summary"]["timeout"] == 0
+
+
+def test_chatlog_replay_skips_rows_without_a_user_message():
+    now = datetime.now()
+    with db.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM chatlogs WHERE customer_id = %s", ("replay-1",))
+        cursor.executemany(
+            "INSERT INTO chatlogs (customer_id, user_message, bot_reply, intent_detected, session_id, timestamp) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            [("replay-1", "quote please", "", "generate_quote", "replay-1", now),
+             ("replay-1", "", "Here is your quote", "generate_quote", "replay-1", now)])
+        cursor.close()
+    since, until = now - timedelta(minutes=1), now + timedelta(minutes=1)
+    items = [i for i in items_from_chatlogs(since, until, 100) if i["session_id"] == "replay-1"]
+    assert [i["message"] for i in items] == ["quote please"]
@@ -0,0 +1,72 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from src.core import cache
+from src.core.cache import Cache, LocalBackend
+from src.core.catalog_store import CatalogStore
+
+
+class SharedBackend(LocalBackend):
+    """LocalBackend that encodes values like Redis or shm do."""
+
+    in_process = False
+
+
+def test_get_or_load_keeps_a_result_loaded_across_a_bump_out_of_the_new_version():
+    store = Cache(LocalBackend())
+
+    def loader():
+        store.bump("catalog")  # the catalog changes while the old rows are being read
+        return "stale"
+
+    assert store.get_or_load("catalog", "products", loader) == "stale"
+    assert store.get("catalog", "products") is None
+    assert store.get_or_load("catalog", "products", lambda: "fresh") == "fresh"
+    assert store.get("catalog", "products") == "fresh"
+
+
+def test_shared_entries_are_json_with_tagged_types():
+    value = {"when": datetime(2025, 6, 1, 12, 30), "day": date(2025, 6, 1), "price": Decimal("12.50"),
+             "raw": b"\x00\x01", "items": [1, "a", None]}
+    raw = cache.dumps(value)
+    assert raw.startswith(b"{")
+    assert cache.loads(raw) == value
+
+
+def test_unregistered_types_are_refused():
+    with pytest.raises(TypeError):
+        cache.dumps({"obj": object()})
+
+
+def test_catalog_store_round_trips_through_the_shared_tier():
+    store = CatalogStore.from_rows([
+        (1, "Hawk", "Drones", "short", "long", '{"weight_kg": 2}', 10.5, 1),
+        (2, "Wall", "Firewalls", None, None, None, 99.0, 3),
+    ])
+    shared = Cache(SharedBackend())
+    shared.set("catalog", "products", store)
+    shared._l1.clear()  # force the read from the backend
+    copy = shared.get("catalog", "products")
+    assert isinstance(copy, CatalogStore)
+    assert [copy.record(i) for i in range(2)] == [store.record(i) for i in range(2)]
+    assert copy.matching(category="fire") == [1]
+
+
+def test_undecodable_shared_entry_is_a_miss():
+    backend = SharedBackend()
+    shared = Cache(backend)
+    backend.set("catalog:0:products", b"\x80\x04\x95 not json")
+    assert shared.get_or_load("catalog", "products", lambda: "reloaded") == "reloaded"
+    backend.set("catalog:0:renamed", b'{"__cache_type__": "old_store", "value": {}}')
+    assert shared.get("catalog", "renamed") is None
+    assert shared.get_or_load("catalog", "renamed", lambda: "reloaded") == "reloaded"
+
+
+def test_local_backend_keeps_objects_unencoded():
+    store = CatalogStore.from_rows([(1, "Hawk", "Drones", "short", "long", None, 10.5, 1)])
+    local = Cache(LocalBackend())
+    local.set("catalog", "products", store)
+    local._l1.clear()  # L1 expired: the backend still hands back the same object, nothing to decode
+    assert local.get("catalog", "products") is store
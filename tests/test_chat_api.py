@@ -0,0 +1,26 @@
+from fastapi.testclient import TestClient
+
+import main
+from src.core.config import valid_session_id
+
+
+def test_session_id_rules():
+    assert valid_session_id("load-3f2a9c1d4e5b")
+    assert valid_session_id("batch-run1-user@example.com")
+    assert valid_session_id("s" * 64)
+    for bad in ("s" * 65, "", "two words", "semi;colon", None, 42):
+        assert not valid_session_id(bad)
+
+
+def test_chat_refuses_an_invalid_session_id():
+    client = TestClient(main.app)
+    response = client.post("/chat", json={"message": "hi", "session_id": "x" * 65})
+    assert response.status_code == 400
+
+
+def test_metrics_do_not_build_the_agent(monkeypatch):
+    monkeypatch.setattr(main, "agent", None)
+    response = TestClient(main.app).get("/metrics")
+    assert response.status_code == 200
+    assert "limiter" in response.json()["llm"]
+    assert main.agent is None
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core import chatlog_archive, db
+
+
+@pytest.fixture(autouse=True)
+def empty_chatlogs():
+    with db.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM chatlogs")
+        cursor.execute("DELETE FROM chatlog_archive")
+        cursor.close()
+
+
+def _insert(conn, customer_id, message, when):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO chatlogs (customer_id, user_message, bot_reply, intent_detected, session_id, timestamp) "
+                   "VALUES (%s, %s, %s, %s, %s, %s)", (customer_id, message, "ok", "unknown", customer_id, when))
+    conn.commit()
+    cursor.close()
+    return cursor.lastrowid
+
+
+def _messages(conn, customer_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT user_message FROM chatlogs WHERE customer_id = %s ORDER BY message_id", (customer_id,))
+    rows = [r[0] for r in cursor.fetchall()]
+    cursor.close()
+    return rows
+
+
+def test_delete_conversation_keeps_rows_past_the_bound():
+    with db.transaction() as conn:
+        old = datetime.now() - timedelta(days=90)
+        first = _insert(conn, "bound-1", "a", old)
+        _insert(conn, "bound-1", "b", old)
+        assert chatlog_archive.delete_conversation(conn, "bound-1", chunk=1, upto=first) == 1
+        assert _messages(conn, "bound-1") == ["b"]
+
+
+def test_archive_then_rehydrate_round_trip(tmp_path):
+    with db.transaction() as conn:
+        old = datetime.now() - timedelta(days=90)
+        _insert(conn, "cold-1", "hello", old)
+        _insert(conn, "cold-1", "again", old + timedelta(minutes=1))
+        _insert(conn, "warm-1", "recent", datetime.now())
+
+    assert chatlog_archive.archive(retention_days=30, archive_dir=str(tmp_path)) == 1
+    with db.transaction() as conn:
+        assert _messages(conn, "cold-1") == []
+        assert _messages(conn, "warm-1") == ["recent"]
+
+    assert [r["user_message"] for r in chatlog_archive.load_archived("cold-1")] == ["hello", "again"]
+    assert chatlog_archive.rehydrate("cold-1") == 2
+    assert chatlog_archive.rehydrate("cold-1") == 0
+    with db.transaction() as conn:
+        assert _messages(conn, "cold-1") == ["hello", "again"]
+
+
+def test_customer_resuming_during_archive_keeps_the_conversation(tmp_path, monkeypatch):
+    with db.transaction() as conn:
+        _insert(conn, "resume-1", "old turn", datetime.now() - timedelta(days=90))
+
+    write_batch = chatlog_archive._write_batch
+
+    def write_then_resume(conn, customers, path):
+        result = write_batch(conn, customers, path)
+        _insert(conn, "resume-1", "new turn", datetime.now())
+        return result
+
+    monkeypatch.setattr(chatlog_archive, "_write_batch", write_then_resume)
+    assert chatlog_archive.archive(retention_days=30, archive_dir=str(tmp_path)) == 0
+    with db.transaction() as conn:
+        assert _messages(conn, "resume-1") == ["old turn", "new turn"]
+    assert chatlog_archive.rehydrate("resume-1") == 0
+
+
+def test_warm_candidates_do_not_stall_archiving(tmp_path):
+    with db.transaction() as conn:
+        old = datetime.now() - timedelta(days=90)
+        for customer_id in ("a-warm", "b-warm"):
+            _insert(conn, customer_id, "old", old)
+            _insert(conn, customer_id, "recent", datetime.now())
+        _insert(conn, "c-cold", "old", old + timedelta(minutes=1))
+
+    assert chatlog_archive.archive(retention_days=30, batch_size=2, archive_dir=str(tmp_path)) == 1
+    with db.transaction() as conn:
+        assert _messages(conn, "c-cold") == []
+        assert _messages(conn, "a-warm") == ["old", "recent"]
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+from agents.tool_context import ToolContext
+
+from src.core import customer_context, db
+from src.core.cache import get_cache
+from src.Tools.Quote_generator import QuoteRequestInput, _generate_quote
+from src.Tools.user import manage_user
+
+
+async def invoke(tool, args: dict):
+    ctx = ToolContext(context=None, tool_name=tool.name, tool_call_id="test")
+    return await tool.on_invoke_tool(ctx, json.dumps(args))
+
+
+def test_every_session_sharing_a_lookup_gets_the_customer_attached():
+    with db.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM users WHERE email = %s", ("shared@example.com",))
+        cursor.execute("INSERT INTO users (full_name, email, user_type, country, sign_up_date, verified) "
+                       "VALUES (%s, %s, %s, %s, %s, %s)",
+                       ("Shared Customer", "shared@example.com", "corporate", "US", "2025-01-01", "yes"))
+        customer_id = cursor.lastrowid
+        cursor.close()
+
+    async def turn(session_id):
+        token = customer_context.current_session.set(session_id)
+        try:
+            return await invoke(manage_user, {"email": "shared@example.com", "requested_category": None})
+        finally:
+            customer_context.current_session.reset(token)
+
+    async def scenario():
+        return await asyncio.gather(*(turn(f"ctx-session-{i}") for i in range(4)))
+
+    replies = asyncio.run(scenario())
+    assert all("Shared Customer" in str(reply) for reply in replies)
+    for i in range(4):
+        entry = get_cache().get(customer_context.NAMESPACE, f"session:ctx-session-{i}")
+        assert entry is not None and entry["customer_id"] == customer_id
+
+
+def test_unknown_email_is_not_found():
+    reply = asyncio.run(invoke(manage_user, {"email": "nobody@example.com", "requested_category": None}))
+    assert "not_found" in str(reply)
+
+
+def test_quote_discount_follows_the_current_users_row():
+    with db.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM users WHERE email = %s", ("pricing@example.com",))
+        cursor.execute("INSERT INTO users (full_name, email, user_type, country, sign_up_date, verified) "
+                       "VALUES (%s, %s, %s, %s, %s, %s)",
+                       ("Pricing Customer", "pricing@example.com", "guest", "US", "2025-01-01", "yes"))
+        customer_id = cursor.lastrowid
+        cursor.execute("INSERT INTO products (product_name, category, base_price) VALUES (%s, %s, %s)",
+                       ("Context Pricing Drone", "drone", 100))
+        cursor.execute("INSERT INTO inventory (product_id, warehouse_location, quantity_left) VALUES (%s, %s, %s)",
+                       (cursor.lastrowid, "ctx", 10))
+        cursor.close()
+
+    request = QuoteRequestInput(product_name="Context Pricing Drone", quantity=1, customer_id=customer_id)
+    token = customer_context.current_session.set("ctx-pricing")
+    try:
+        before = _generate_quote(request)
+        with db.transaction() as conn:  # changed outside the app, no invalidate()
+            cursor = conn.cursor()
+            cursor.execute("UPDATE users SET user_type = %s WHERE id = %s", ("military", customer_id))
+            cursor.close()
+        after = _generate_quote(request)
+    finally:
+        customer_context.current_session.reset(token)
+
+    assert before.items[0].discount_percent == 2.0
+    assert after.items[0].discount_percent == 17.0
+    assert after.quote_id != before.quote_id
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+from src.core import db
+
+
+def test_async_checkout_waits_off_the_event_loop(monkeypatch):
+    def slow_checkout(timeout=None, read_only=False):
+        time.sleep(0.2)  # a pool with every connection busy
+        return ("conn", read_only)
+
+    monkeypatch.setattr(db, "get_connection", slow_checkout)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        conn = await db.get_connection_async(read_only=True)
+        task.cancel()
+        assert conn == ("conn", True)
+        assert ticks >= 5
+
+    asyncio.run(scenario())
+
+
+def test_pooled_connection_round_trip():
+    async def scenario():
+        conn = await db.get_connection_async()
+        try:
+            return db.query_one(conn, "chatlog_recent", ("nobody", 1))
+        finally:
+            conn.close()
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_read_your_writes_pin_is_seen_by_other_workers(monkeypatch):
+    from src.core.cache import LocalBackend
+
+    shared = LocalBackend()
+    monkeypatch.setattr(db, "_pin_backend", lambda: shared)
+    monkeypatch.setattr(db, "_pools", lambda: ("primary", ["replica"]))
+    token = db.routing_key.set("session-1")
+    try:
+        db.mark_write()
+        assert db.pinned_to_primary()
+        db._sticky.clear()  # another worker: nothing pinned in its own process
+        assert db.pinned_to_primary()
+        shared.delete("db-pin:session-1")
+        assert not db.pinned_to_primary()
+    finally:
+        db.routing_key.reset(token)
+        db._sticky.clear()
+
+
+def test_only_pinned_writes_route_the_session_to_the_primary(monkeypatch):
+    monkeypatch.setattr(db, "_pin_backend", lambda: None)
+    token = db.routing_key.set("session-pin-opt-in")
+    try:
+        with db.transaction() as conn:
+            db.run(conn, "chatlog_insert", ("session-pin-opt-in", "hi", "hello", "unknown", "session-pin-opt-in"))
+        assert not db.pinned_to_primary()
+        with db.transaction() as conn:
+            db.run(conn, "ticket_insert", (1, 1, "broken", "open"), pin=True)
+        assert db.pinned_to_primary()
+    finally:
+        db._sticky.clear()
+        db.routing_key.reset(token)
+
+
+def test_catalog_version_poll_uses_the_pool(monkeypatch):
+    from src.core import catalog_version
+
+    monkeypatch.setattr(db, "connect", lambda *a, **k: (_ for _ in ()).throw(AssertionError("unpooled")))
+    with db.transaction() as conn:
+        catalog_version.bump(conn)
+    checkouts = db.stats["checkouts"]
+    version = catalog_version._poll()
+    assert version >= 1
+    assert db.stats["checkouts"] > checkouts
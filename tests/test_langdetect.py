@@ -0,0 +1,45 @@
+from src.core import langdetect
+from src.core.langdetect import AhoCorasick, Detection, detect, detect_batch, keyword_scores
+
+
+def test_aho_corasick_reports_overlapping_patterns():
+    assert sorted(AhoCorasick(["he", "she", "his", "hers"]).find("ushers")) == ["he", "hers", "she"]
+
+
+def test_keywords_match_whole_words_only():
+    assert keyword_scores("free shipping this week") == {}
+    assert detect("hi there") == Detection("english", 1.0, "keyword")
+
+
+def test_keywords_after_normalization():
+    assert detect("Kem cho, majama?") == Detection("gujarati", 1.0, "keyword")
+    assert detect("ÇA VA bien?").language == "french"
+
+
+def test_shared_phrase_is_settled_by_the_rest_of_the_message():
+    scores = keyword_scores("namaskar")
+    assert set(scores) == {"gujarati", "hindi", "marathi"}
+    assert detect("namaskar, kasa kai").language == "marathi"
+
+
+def test_trigram_fallback_without_keywords():
+    assert detect("quiero comprar este producto") == Detection("spanish", 0.444, "ngram")
+    assert detect("mujhe yeh chahiye kitne ka hai").method == "ngram"
+
+
+def test_weak_or_close_trigram_scores_fall_back_to_the_default(monkeypatch):
+    assert detect("shipping to Paris") == Detection("english", 0.0, "default")  # best score under the floor
+    assert detect("") == detect("!!!") == Detection("english", 0.0, "default")
+    monkeypatch.setattr(langdetect, "MIN_NGRAM_MARGIN", 1.0)
+    assert detect("quiero comprar este producto").method == "default"
+
+
+def test_batch_and_turn_reuse():
+    assert detect_batch(["hola", "hola", "merci"]) == [detect("hola"), detect("hola"), detect("merci")]
+    token = langdetect.begin_turn("Bonjour!")
+    try:
+        first = langdetect.turn_language()
+        assert langdetect.turn_language("bonjour") is first
+        assert langdetect.turn_language("gracias").language == "spanish"
+    finally:
+        langdetect.end_turn(token)
@@ -0,0 +1,182 @@
+import asyncio
+
+import pytest
+
+from src.core.llm_governor import (PRIORITY_BATCH, PRIORITY_HIGH, PRIORITY_NORMAL, AdaptiveLimiter, GovernedModel,
+                                   ModelBusyError)
+
+
+def limiter(limit: int = 1) -> AdaptiveLimiter:
+    return AdaptiveLimiter(initial=limit, minimum=1, maximum=limit, target_latency=10.0)
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def scenario():
+        lim = limiter()
+        await lim.acquire(PRIORITY_NORMAL, timeout=1)
+        waiter = asyncio.create_task(lim.acquire(PRIORITY_BATCH, timeout=5))
+        await asyncio.sleep(0)
+        assert lim.snapshot()["waiting"] == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert lim.snapshot()["waiting"] == 0
+
+        lim.release()
+        assert lim.in_flight == 0
+        await asyncio.wait_for(lim.acquire(PRIORITY_NORMAL, timeout=1), 1)
+        assert lim.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_waiter_cancelled_by_wait_for_releases_cleanly():
+    async def scenario():
+        lim = limiter()
+        await lim.acquire(PRIORITY_NORMAL, timeout=1)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(lim.acquire(PRIORITY_BATCH, timeout=5), 0.05)
+        lim.release()
+        assert (lim.in_flight, lim.snapshot()["waiting"]) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_raises_model_busy_and_frees_the_entry():
+    async def scenario():
+        lim = limiter()
+        await lim.acquire(PRIORITY_NORMAL, timeout=1)
+        with pytest.raises(ModelBusyError):
+            await lim.acquire(PRIORITY_NORMAL, timeout=0.05)
+        assert lim.snapshot()["waiting"] == 0
+        assert lim.stats["timeouts"] == 1
+        lim.release()
+        assert lim.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_release_skips_a_cancelled_waiter():
+    async def scenario():
+        lim = limiter()
+        await lim.acquire(PRIORITY_NORMAL, timeout=1)
+        first = asyncio.create_task(lim.acquire(PRIORITY_HIGH, timeout=5))
+        second = asyncio.create_task(lim.acquire(PRIORITY_NORMAL, timeout=5))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        lim.release()
+        await asyncio.wait_for(second, 1)
+        assert (lim.in_flight, lim.snapshot()["waiting"]) == (1, 0)
+
+    asyncio.run(scenario())
+
+
+def test_waiters_are_served_by_priority_then_arrival():
+    async def scenario():
+        lim = limiter()
+        await lim.acquire(PRIORITY_NORMAL, timeout=1)
+        order = []
+
+        async def call(name, priority):
+            await lim.acquire(priority, timeout=5)
+            order.append(name)
+            lim.release()
+
+        tasks = [asyncio.create_task(call("batch", PRIORITY_BATCH)),
+                 asyncio.create_task(call("normal-1", PRIORITY_NORMAL)),
+                 asyncio.create_task(call("high", PRIORITY_HIGH)),
+                 asyncio.create_task(call("normal-2", PRIORITY_NORMAL))]
+        await asyncio.sleep(0)
+        lim.release()
+        await asyncio.gather(*tasks)
+        assert order == ["high", "normal-1", "normal-2", "batch"]
+
+    asyncio.run(scenario())
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class FakeModel:
+    """Answers from a script: an exception to raise, or a response to return."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+
+    async def get_response(self, *args, **kwargs):
+        self.calls += 1
+        outcome = self.script.pop(0) if len(self.script) > 1 else self.script[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def governed(primary, fallback=None, max_retries=2):
+    return GovernedModel(primary, fallback=fallback, limiter=limiter(2), max_retries=max_retries,
+                         base_delay=0.0, max_delay=0.0)
+
+
+def respond(model):
+    return asyncio.run(model.get_response("system", "hi", None, [], None, [], None))
+
+
+def test_429s_are_retried_until_the_primary_answers():
+    primary = FakeModel(RateLimitError("slow down"), RateLimitError("slow down"), "ok")
+    model = governed(primary)
+    assert respond(model) == "ok"
+    assert primary.calls == 3
+    assert model.stats["retries"] == 2
+    assert model.limiter.in_flight == 0
+    assert model.limiter.stats["rate_limited"] == 2
+
+
+def test_other_errors_are_not_retried():
+    primary = FakeModel(ValueError("bad request"))
+    model = governed(primary)
+    with pytest.raises(ValueError):
+        respond(model)
+    assert primary.calls == 1
+    assert model.limiter.in_flight == 0
+
+
+def test_fallback_answers_once_the_primary_stays_rate_limited():
+    primary, fallback = FakeModel(RateLimitError("busy")), FakeModel("from fallback")
+    model = governed(primary, fallback)
+    assert respond(model) == "from fallback"
+    assert primary.calls == 3
+    assert model.stats["fallbacks"] == 1
+
+
+def test_rate_limited_fallback_is_retried_then_reported_busy():
+    primary, fallback = FakeModel(RateLimitError("busy")), FakeModel(RateLimitError("busy too"))
+    model = governed(primary, fallback)
+    with pytest.raises(ModelBusyError):
+        respond(model)
+    assert fallback.calls == 3
+    assert model.stats["busy"] == 1
+    assert model.limiter.in_flight == 0
+
+
+def test_busy_without_fallback_carries_retry_after():
+    model = governed(FakeModel(RateLimitError("quota exceeded, retryDelay: 7s")), max_retries=0)
+    with pytest.raises(ModelBusyError) as raised:
+        respond(model)
+    assert raised.value.retry_after == 7.0
+
+
+def test_acquired_counts_only_granted_slots():
+    async def scenario():
+        lim = limiter(1)
+        await lim.acquire(PRIORITY_NORMAL, 1)
+        with pytest.raises(ModelBusyError):
+            await lim.acquire(PRIORITY_NORMAL, 0.01)
+        return lim.stats
+
+    stats = asyncio.run(scenario())
+    assert stats["acquired"] == 1
+    assert stats["timeouts"] == 1
@@ -0,0 +1,51 @@
+import pytest
+
+from src.core.normalize import clean_text, raw_text, strip_markdown
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("**Hello** there", "Hello there"),
+    ("# Title", "Title"),
+    ("see [the docs](http://example.com) and `code`", "see the docs and code"),
+    ("*a* **b**", "a b"),
+    ("plain text", "plain text"),
+])
+def test_markdown_is_stripped(text, expected):
+    assert clean_text(text) == expected
+
+
+def test_text_without_markdown_characters_is_returned_as_is():
+    text = "nothing to strip here"
+    assert strip_markdown(text) is text
+
+
+def test_json_wrappers_are_unwrapped():
+    assert clean_text('```json {"text": "hi *you*"} ```') == "hi you"
+    assert clean_text("{'text': 'python repr'}") == "python repr"
+    assert clean_text('"quoted"') == "quoted"
+
+
+def test_raw_json_is_tried_before_quote_rewriting():
+    # An apostrophe inside valid JSON must survive: rewriting quotes first would break the parse.
+    assert clean_text('{"text": "it\'s **fine**"}') == "it's fine"
+
+
+def test_unparseable_openings_are_kept():
+    assert clean_text("{not json") == "{not json"
+    assert clean_text("[draft] reply") == "[draft] reply"
+
+
+def test_structured_content_is_flattened():
+    parts = [{"type": "output_text", "text": "a **b**", "annotations": []}, {"text": "c"}]
+    assert clean_text(parts) == "a b c"
+    assert clean_text({"text": "x"}) == "x"
+    assert clean_text(["a", "b"]) == "a b"
+
+
+@pytest.mark.parametrize("value", [
+    "**Hello**", [{"type": "output_text", "text": "a **b**"}], {"text": "x"}, "it's", "```json {\"text\": \"y\"} ```",
+])
+def test_lazy_mode_round_trip(value):
+    stored = raw_text(value)
+    assert isinstance(stored, str)
+    assert clean_text(stored) == clean_text(value)
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core import db, outbox
+from src.core.outbox import Publisher, Sink
+
+
+@pytest.fixture(autouse=True)
+def empty_outbox():
+    with db.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM outbox")
+        cursor.close()
+
+
+class ListSink(Sink):
+    name = "list"
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.batches = []
+
+    def send(self, events):
+        if self.fail:
+            raise ConnectionError("downstream is down")
+        self.batches.append(events)
+
+
+def publisher(sink, batch_size=10, lease_seconds=30.0, retention_hours=24.0):
+    return Publisher([sink], batch_size=batch_size, lease_seconds=lease_seconds, max_backoff=60.0,
+                     retention_hours=retention_hours)
+
+
+def record(n=1, event_type="quote.generated"):
+    with db.transaction() as conn:
+        for i in range(n):
+            outbox.record(conn, event_type, f"Q-{i}", {"quote_id": f"Q-{i}", "total": 10.5})
+
+
+def rows():
+    with db.transaction() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT event_id, attempts, claimed_until, published_at, last_error FROM outbox "
+                       "ORDER BY event_id")
+        result = cursor.fetchall()
+        cursor.close()
+    return result
+
+
+def test_events_are_published_once_in_batches():
+    record(5)
+    sink = ListSink()
+    assert publisher(sink, batch_size=2).drain() == 5
+    assert [len(batch) for batch in sink.batches] == [2, 2, 1]
+    assert sink.batches[0][0]["payload"] == {"quote_id": "Q-0", "total": 10.5}
+    assert all(r["published_at"] is not None for r in rows())
+    assert publisher(sink).drain() == 0
+
+
+def test_a_claimed_batch_is_not_sent_by_another_worker():
+    record(3)
+    first, second = publisher(ListSink()), publisher(ListSink())
+    with db.transaction() as conn:
+        cursor = conn.cursor(dictionary=True)
+        claimed = first._claim(conn, cursor)
+        assert len(claimed) == 3
+        assert second._claim(conn, cursor) == []
+        cursor.close()
+
+
+def test_failed_send_backs_off_and_is_retried_later():
+    record(2)
+    failing = publisher(ListSink(fail=True))
+    with pytest.raises(ConnectionError):
+        failing.publish_batch()
+    after = rows()
+    assert all(r["attempts"] == 1 and r["published_at"] is None for r in after)
+    assert all(r["claimed_until"] > datetime.now() for r in after)
+    assert "downstream is down" in after[0]["last_error"]
+    assert publisher(ListSink()).publish_batch() == 0  # still backing off
+
+    with db.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE outbox SET claimed_until = %s", (datetime.now() - timedelta(seconds=1),))
+        cursor.close()
+    assert publisher(ListSink()).publish_batch() == 2
+
+
+def test_cleanup_deletes_old_published_rows(monkeypatch):
+    record(4)
+    publisher(ListSink()).drain()
+    with db.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE outbox SET published_at = %s WHERE event_id IN "
+                       "(SELECT event_id FROM outbox ORDER BY event_id LIMIT 3)",
+                       (datetime.now() - timedelta(hours=48),))
+        cursor.close()
+    monkeypatch.setattr(outbox, "CLEANUP_BATCH", 2)
+    cleaner = publisher(ListSink())
+    cleaner._housekeeping(cleanup=True)
+    assert len(rows()) == 2  # one batch of CLEANUP_BATCH per cleanup
+    cleaner._housekeeping(cleanup=True)
+    assert len(rows()) == 1
+    assert cleaner.snapshot()["pending"] == 0
@@ -0,0 +1,39 @@
+import json
+
+from src.core.catalog_store import CatalogStore, CatalogView
+from src.core.shaping import shape_products
+from src.Tools.product_discover import ProductQueryOutput
+
+
+def catalog(n=300):
+    return CatalogStore.from_rows(
+        (i, f"{'Drone' if i % 3 == 0 else 'Sensor'} model {i}", "Aerial Drones" if i % 3 == 0 else "Sensors",
+         "short", "long " * 20, json.dumps({"weight_kg": i}), 100.0 + i, 1)
+        for i in range(1, n + 1))
+
+
+def test_matching_filters_by_category_and_name_case_insensitively():
+    store = catalog(30)
+    drones = store.matching(category="drone")
+    assert [store.ids[i] for i in drones] == [3, 6, 9, 12, 15, 18, 21, 24, 27, 30]
+    assert [store.ids[i] for i in store.matching(category="drone", name="MODEL 1")] == [12, 15, 18]
+    assert len(store.matching()) == 30
+    assert store.matching(name="nothing like this") == []
+
+
+def test_view_slices_keep_their_offset():
+    view = CatalogView(catalog(10), ProductQueryOutput)
+    page = view[4:]
+    assert page.offset == 4 and page[0].id == 5
+    assert page[2:].offset == 6
+
+
+def test_truncated_listing_says_where_the_next_page_starts():
+    store = catalog()
+    shaped = shape_products(CatalogView(store, ProductQueryOutput, store.matching()[40:], offset=40), 500)
+    note = shaped.splitlines()[-1]
+    shown = len(shaped.splitlines()) - 2  # header and note
+    assert f"offset={40 + shown}" in note
+    assert f"{260 - shown} more products" in note
+    assert "Categories: Sensors, Aerial Drones" in note
+    assert len(shaped) <= 500 * 4
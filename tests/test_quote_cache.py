@@ -0,0 +1,69 @@
+from uuid import uuid4
+
+import pytest
+
+from src.core import db, quote_cache
+from src.Tools.order_placement import OrderPlacementInput, _place_order
+from src.Tools.Quote_generator import QuoteRequestInput, _generate_quote
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # quote PDFs land in ./quotes
+    tag = uuid4().hex[:8]
+    with db.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO users (full_name, email, user_type, country, sign_up_date) "
+                       "VALUES (%s, %s, %s, %s, %s)", ("Reuse Customer", f"reuse-{tag}@example.com", "corporate",
+                                                       "US", "2025-01-01"))
+        customer_id = cursor.lastrowid
+        cursor.execute("INSERT INTO products (product_name, category, base_price) VALUES (%s, %s, %s)",
+                       (f"Reuse Rover {tag}", "rover", 200))
+        product_id = cursor.lastrowid
+        cursor.execute("INSERT INTO inventory (product_id, warehouse_location, quantity_left) VALUES (%s, %s, %s)",
+                       (product_id, "reuse", 50))
+        cursor.close()
+    return customer_id, f"Reuse Rover {tag}", product_id
+
+
+def quote(catalog, quantity=2):
+    customer_id, product_name, _ = catalog
+    return _generate_quote(QuoteRequestInput(product_name=product_name, quantity=quantity, customer_id=customer_id))
+
+
+def test_pricing_version_tracks_every_input():
+    base = quote_cache.pricing_version(200.0, 0.12, 0.18, 25.0, 2.0)
+    assert base == quote_cache.pricing_version(200.0, 0.12, 0.18, 25.0, 2.0)
+    assert base != quote_cache.pricing_version(210.0, 0.12, 0.18, 25.0, 2.0)
+    assert base != quote_cache.pricing_version(200.0, 0.17, 0.18, 25.0, 2.0)
+
+
+def test_identical_request_reuses_the_quote(catalog):
+    first = quote(catalog)
+    assert quote(catalog).quote_id == first.quote_id
+    assert quote(catalog, quantity=3).quote_id != first.quote_id
+
+
+def test_price_change_gives_a_new_quote(catalog):
+    product_id = catalog[2]
+    first = quote(catalog)
+    with db.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE products SET base_price = %s WHERE id = %s", (250, product_id))
+        cursor.close()
+    second = quote(catalog)
+    assert second.quote_id != first.quote_id
+    assert second.items[0].unit_price == 250.0
+
+
+def test_ordered_quote_is_not_handed_out_again(catalog):
+    first = quote(catalog)
+    placed = _place_order(OrderPlacementInput(quote_id=first.quote_id, ship_to_address="1 Test Way"))
+    assert placed["quote_id"] == first.quote_id
+    assert quote(catalog).quote_id != first.quote_id
+
+
+def test_missing_pdf_is_not_reused(catalog, tmp_path):
+    first = quote(catalog)
+    (tmp_path / "quotes" / f"quote_{first.quote_id}.pdf").unlink()
+    assert quote(catalog).quote_id != first.quote_id
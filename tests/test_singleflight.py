@@ -0,0 +1,51 @@
+import asyncio
+
+from src.core import db, singleflight
+from src.core.singleflight import DEFAULT_TOOLS, SingleFlight, make_key
+
+
+def test_writers_are_not_shared_by_default():
+    assert "availability_checker_tool" not in DEFAULT_TOOLS
+
+
+def test_identical_concurrent_calls_run_once():
+    group = SingleFlight()
+    runs = 0
+
+    async def load(x):
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.01)
+        return x * 2
+
+    async def scenario():
+        key = make_key("load", (2,), {})
+        return await asyncio.gather(*(group.do(key, load, 2) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [4] * 5
+    assert runs == 1
+
+
+def test_pinned_caller_does_not_share_a_replica_read(monkeypatch):
+    group = SingleFlight()
+    monkeypatch.setattr(singleflight, "group", group)
+    monkeypatch.setattr(singleflight, "_enabled_names", lambda: {"lookup"})
+    monkeypatch.setattr(singleflight, "_replicas", lambda: True)
+    monkeypatch.setattr(db, "pinned_to_primary", lambda: db.routing_key.get() == "wrote")
+    seen = []
+
+    @singleflight.single_flight("lookup")
+    async def lookup(x):
+        seen.append(db.routing_key.get())
+        await asyncio.sleep(0.01)
+        return x
+
+    async def call(session):
+        db.routing_key.set(session)
+        return await lookup(1)
+
+    async def scenario():
+        return await asyncio.gather(call("reader-1"), call("reader-2"), call("wrote"))
+
+    assert asyncio.run(scenario()) == [1, 1, 1]
+    assert sorted(seen) == ["reader-1", "wrote"]
@@ -0,0 +1,70 @@
+import pytest
+from mysql.connector import errors
+
+from src.core.sqlite_backend import connect, translate
+
+
+def test_placeholders_become_question_marks():
+    assert translate("SELECT * FROM users WHERE id = %s AND email = %s") == \
+        "SELECT * FROM users WHERE id = ? AND email = ?"
+
+
+def test_cast_as_json_is_dropped():
+    assert translate("INSERT INTO t (specs) VALUES (CAST(%s AS JSON))") == "INSERT INTO t (specs) VALUES (?)"
+    assert translate("UPDATE t SET specs = cast( %s as json ) WHERE id = %s") == \
+        "UPDATE t SET specs = ? WHERE id = ?"
+
+
+def test_insert_ignore():
+    assert translate("INSERT IGNORE INTO t (k) VALUES (%s)") == "INSERT OR IGNORE INTO t (k) VALUES (?)"
+
+
+def test_on_duplicate_key_update():
+    sql = "INSERT INTO t (k, n, m) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE n = VALUES(n), m = m + VALUES(m)"
+    assert translate(sql) == ("INSERT INTO t (k, n, m) VALUES (?, ?, ?) "
+                              "ON CONFLICT DO UPDATE SET n = excluded.n, m = m + excluded.m")
+
+
+def test_delete_with_order_and_limit():
+    assert translate("DELETE FROM chatlogs WHERE customer_id = %s ORDER BY message_id LIMIT %s") == (
+        "DELETE FROM chatlogs WHERE rowid IN "
+        "(SELECT rowid FROM chatlogs WHERE customer_id = ? ORDER BY message_id LIMIT ?)")
+    assert translate("DELETE FROM t WHERE k < %s LIMIT 10") == \
+        "DELETE FROM t WHERE rowid IN (SELECT rowid FROM t WHERE k < ? LIMIT 10)"
+
+
+def test_plain_delete_is_untouched():
+    assert translate("DELETE FROM t WHERE k = %s") == "DELETE FROM t WHERE k = ?"
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connect(str(tmp_path / "t.sqlite"))
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE t (k TEXT PRIMARY KEY, n INTEGER NOT NULL)")
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_translated_statements_run(conn):
+    cursor = conn.cursor(dictionary=True)
+    cursor.executemany("INSERT INTO t (k, n) VALUES (%s, %s) ON DUPLICATE KEY UPDATE n = n + VALUES(n)",
+                       [("a", 1), ("b", 2), ("a", 5)])
+    cursor.execute("INSERT IGNORE INTO t (k, n) VALUES (%s, %s)", ("b", 99))
+    cursor.execute("SELECT k, n FROM t ORDER BY k")
+    assert cursor.fetchall() == [{"k": "a", "n": 6}, {"k": "b", "n": 2}]
+
+    cursor.execute("DELETE FROM t WHERE n > %s ORDER BY n DESC LIMIT %s", (0, 1))
+    assert cursor.rowcount == 1
+    cursor.execute("SELECT k FROM t")
+    assert cursor.fetchall() == [{"k": "b"}]
+
+
+def test_errors_are_mysql_connector_errors(conn):
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO t (k, n) VALUES (%s, %s)", ("a", 1))
+    with pytest.raises(errors.IntegrityError):
+        cursor.execute("INSERT INTO t (k, n) VALUES (%s, %s)", ("a", 2))
+    with pytest.raises(errors.ProgrammingError):
+        cursor.execute("SELECT * FROM t WHERE k = %s", ())
@@ -0,0 +1,64 @@
+from src.core import db
+from src.core.config import MyCustomSession, turn_intent
+
+
+def call(name, call_id="c1"):
+    return {"type": "function_call", "name": name, "call_id": call_id, "arguments": "{}"}
+
+
+def output(output, call_id="c1"):
+    return {"type": "function_call_output", "call_id": call_id, "output": output}
+
+
+USER = {"role": "user", "content": "hi"}
+REPLY = {"role": "assistant", "content": "hello"}
+
+
+def test_no_tools_is_unknown():
+    assert turn_intent([USER, REPLY]) == "unknown"
+
+
+def test_furthest_sales_step_wins():
+    items = [USER, call("manage_user", "a"), output("{}", "a"), call("generate_quote", "b"), output("{}", "b"),
+             call("order_placement", "c"), output("{}", "c"), REPLY]
+    assert turn_intent(items) == "order_placement"
+
+
+def test_nlu_output_is_used_when_no_sales_tool_ran():
+    items = [USER, call("chatbot_engine_NLU"), output("{'intent': 'greeting', 'urgency': 'low'}"),
+             call("get_all_products", "p"), output("[]", "p"), REPLY]
+    assert turn_intent(items) == "greeting"
+
+
+def test_sales_tool_beats_nlu_and_other_tools_fill_in():
+    items = [USER, call("chatbot_engine_NLU"), output('{"intent": "product_discovery"}'),
+             call("generate_quote", "q"), output("{}", "q"), REPLY]
+    assert turn_intent(items) == "generate_quote"
+    assert turn_intent([USER, call("get_all_products"), output("not a dict"), REPLY]) == "product_discovery"
+
+
+def _rows(session_id):
+    conn = db.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT user_message, bot_reply, intent_detected FROM chatlogs WHERE customer_id = %s "
+                       "ORDER BY message_id", (session_id,))
+        rows = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+    return rows
+
+
+def test_a_tool_turn_is_stored_as_one_row():
+    reply = {"type": "message", "role": "assistant", "status": "completed",
+             "content": [{"type": "output_text", "text": "Here is your **quote**", "annotations": []}]}
+    items = [{"role": "user", "content": "quote 2 of product 5"}, call("generate_quote", "q"),
+             output("{'quote_id': 'Q1'}", "q"), reply]
+    MyCustomSession("intent-tool-turn")._write_items(items)
+    assert _rows("intent-tool-turn") == [("quote 2 of product 5", "Here is your quote", "generate_quote")]
+
+
+def test_each_user_message_gets_its_own_row():
+    MyCustomSession("intent-two-turns")._write_items([USER, REPLY, {"role": "user", "content": "bye"}, REPLY])
+    assert _rows("intent-two-turns") == [("hi", "hello", "unknown"), ("bye", "hello", "unknown")]
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from src.core.cache import LocalBackend
+from src.core.turns import TurnQueueFull, TurnScheduler
+
+
+def recorder(log, name, delay=0.01):
+    async def turn():
+        log.append(("start", name))
+        await asyncio.sleep(delay)
+        log.append(("end", name))
+        return name
+    return turn
+
+
+def test_same_session_runs_in_arrival_order_without_overlap():
+    async def scenario():
+        scheduler, log = TurnScheduler(), []
+        results = await asyncio.gather(*(scheduler.run("s1", f"message {i}", recorder(log, i)) for i in range(3)))
+        assert results == [0, 1, 2]
+        assert log == [("start", 0), ("end", 0), ("start", 1), ("end", 1), ("start", 2), ("end", 2)]
+        assert scheduler.snapshot()["active_sessions"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_different_sessions_run_in_parallel():
+    async def scenario():
+        scheduler, log = TurnScheduler(), []
+        await asyncio.gather(scheduler.run("a", "hi", recorder(log, "a")), scheduler.run("b", "hi", recorder(log, "b")))
+        assert log[:2] == [("start", "a"), ("start", "b")]
+
+    asyncio.run(scenario())
+
+
+def test_identical_message_shares_the_running_turn():
+    async def scenario():
+        scheduler, log = TurnScheduler(coalesce_window=5), []
+        first, second = await asyncio.gather(scheduler.run("s1", "Hello  there", recorder(log, 1)),
+                                             scheduler.run("s1", "hello there", recorder(log, 2)))
+        assert (first, second) == (1, 1)
+        assert scheduler.stats["coalesced"] == 1 and scheduler.stats["executed"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_full_lane_is_refused():
+    async def scenario():
+        scheduler, log = TurnScheduler(max_queue=1), []
+        running = asyncio.ensure_future(scheduler.run("s1", "one", recorder(log, 1, delay=0.05)))
+        await asyncio.sleep(0)
+        with pytest.raises(TurnQueueFull):
+            await scheduler.run("s1", "two", recorder(log, 2))
+        await running
+
+    asyncio.run(scenario())
+
+
+def test_shared_lease_serializes_a_session_across_workers():
+    async def scenario():
+        backend, log = LocalBackend(), []
+        workers = [TurnScheduler(backend=backend), TurnScheduler(backend=backend)]
+        await asyncio.gather(workers[0].run("s1", "one", recorder(log, "w0", 0.05)),
+                             workers[1].run("s1", "two", recorder(log, "w1", 0.01)))
+        assert [event for event, _ in log] == ["start", "end", "start", "end"]
+        assert workers[1].stats["lock_waits"] == 1
+        assert backend.get("turn-lock:s1") is None
+
+    asyncio.run(scenario())
+
+
+def test_lease_wait_is_bounded():
+    async def scenario():
+        backend = LocalBackend()
+        backend.acquire_lock("turn-lock:s1", "other-worker", ttl=60)
+        scheduler = TurnScheduler(backend=backend, lock_wait=0.05)
+        with pytest.raises(TurnQueueFull):
+            await scheduler.run("s1", "hi", recorder([], 1))
+        assert scheduler.stats["lock_timeouts"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_lease_is_reentrant_for_its_owner_and_expires():
+    backend = LocalBackend()
+    assert backend.acquire_lock("k", "a", ttl=60)
+    assert backend.acquire_lock("k", "a", ttl=60)
+    assert not backend.acquire_lock("k", "b", ttl=60)
+    backend.release_lock("k", "b")  # not the holder: no effect
+    assert not backend.acquire_lock("k", "b", ttl=60)
+    backend.release_lock("k", "a")
+    assert backend.acquire_lock("k", "b", ttl=-1)  # already expired
+    assert backend.acquire_lock("k", "c", ttl=60)